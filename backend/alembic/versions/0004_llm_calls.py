@@ -0,0 +1,40 @@
+"""add llm_calls table for token usage and cost accounting
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_calls",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("provider", sa.String(30), nullable=False),
+        sa.Column("model", sa.String(100), nullable=True),
+        sa.Column("doc_type", sa.String(50), nullable=True),
+        sa.Column("success", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("error_kind", sa.String(30), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("completion_tokens", sa.Integer(), nullable=True),
+        sa.Column("cached_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cost_usd", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_llm_calls_created_at", "llm_calls", ["created_at"])
+    op.create_index("ix_llm_calls_job_id", "llm_calls", ["job_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("llm_calls")
@@ -0,0 +1,23 @@
+"""add prompt_version to llm_calls for prompt-cache hit tracking
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("llm_calls", sa.Column("prompt_version", sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("llm_calls", "prompt_version")
@@ -0,0 +1,33 @@
+"""add HNSW cosine index on medical_knowledge.embedding
+
+Without an ANN index ``ORDER BY embedding <=> :qvec`` is a sequential
+scan over every chunk.  HNSW (unlike IVFFlat) can be built on an empty
+table and needs no retraining as LOINC / RxNorm ingestion grows it.
+Built CONCURRENTLY so indexing a large catalog doesn't block reads.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_mk_embedding_hnsw "
+            "ON medical_knowledge USING hnsw (embedding vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_mk_embedding_hnsw")
@@ -0,0 +1,38 @@
+"""unique (source, entity_id, chunk_type) key on medical_knowledge
+
+Lets ``index_documents`` upsert with ``ON CONFLICT`` instead of a DELETE
+per chunk.  NULL chunk types (medicine chunks) must conflict too, hence
+NULLS NOT DISTINCT (PostgreSQL 15+).  Duplicates left by earlier
+re-indexing runs are removed first, keeping the newest row.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM medical_knowledge a
+        USING medical_knowledge b
+        WHERE a.source = b.source
+          AND a.entity_id IS NOT DISTINCT FROM b.entity_id
+          AND a.chunk_type IS NOT DISTINCT FROM b.chunk_type
+          AND a.id < b.id
+    """)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mk_source_entity_chunk "
+        "ON medical_knowledge (source, entity_id, chunk_type) NULLS NOT DISTINCT"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_mk_source_entity_chunk", table_name="medical_knowledge")
@@ -0,0 +1,24 @@
+"""add content_hash to medical_knowledge for incremental indexing
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows keep NULL and are re-embedded once by the next sync.
+    op.add_column("medical_knowledge", sa.Column("content_hash", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("medical_knowledge", "content_hash")
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.core.security import admin_token_auth
+from app.core.logging import get_logger
+from app.services.coverage import fast_path_stats
+from app.services.embedding_cache import cache_stats as embedding_cache_stats
+from app.services.http_clients import connection_stats
+from app.services.llm_usage import GROUP_BY, usage_report
+from app.services.llm_providers.circuit_breaker import published_breaker_states
+from app.services.llm_providers.routing import recent_decisions
+from app.services.metrics import all_counters
+
+logger = get_logger("admin")
+router = APIRouter(prefix="/admin", dependencies=[Depends(admin_token_auth)])
+
+
+@router.get("/llm/breakers")
+def get_llm_breakers():
+    """Circuit-breaker state for every LLM provider, as last published by each worker."""
+    try:
+        return {"breakers": published_breaker_states()}
+    except Exception as e:
+        logger.error(f"Failed to read breaker state: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Breaker state unavailable"
+        )
+
+
+@router.get("/llm/routing")
+def get_llm_routing(limit: int = 100):
+    """Recent model-routing decisions with complexity features and outcomes, newest first."""
+    try:
+        return {"decisions": recent_decisions(min(max(limit, 1), 1000))}
+    except Exception as e:
+        logger.error(f"Failed to read routing log: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Routing log unavailable"
+        )
+
+
+@router.get("/llm/usage")
+def get_llm_usage(days: int = 7, group_by: str = "model", db: Session = Depends(get_db)):
+    """Token, cost and latency totals + percentiles for LLM calls, grouped by
+    model, provider, doc_type or day."""
+    if group_by not in GROUP_BY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of: {', '.join(GROUP_BY)}"
+        )
+    try:
+        return usage_report(db, days=min(max(days, 1), 365), group_by=group_by)
+    except Exception as e:
+        logger.error(f"Failed to build LLM usage report: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="LLM usage unavailable"
+        )
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Operational counters (hedges, cache hits, fast-path jobs, …) from all processes,
+    plus per-host HTTP connection reuse."""
+    try:
+        return {"metrics": all_counters(), "http_connections": connection_stats()}
+    except Exception as e:
+        logger.error(f"Failed to read metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Metrics unavailable"
+        )
+
+
+@router.get("/fast-path")
+def get_fast_path_stats():
+    """Share of jobs answered by the rule-based fast path instead of the LLM."""
+    try:
+        return fast_path_stats()
+    except Exception as e:
+        logger.error(f"Failed to read fast-path stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fast-path stats unavailable"
+        )
+
+
+@router.get("/embeddings/cache")
+def get_embedding_cache_stats():
+    """Hit rate of the RAG query-embedding cache (in-process LRU + Redis)."""
+    try:
+        return embedding_cache_stats()
+    except Exception as e:
+        logger.error(f"Failed to read embedding cache stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Embedding cache stats unavailable"
+        )
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
@@ -21,7 +23,7 @@ router = APIRouter()
     response_model=ResultResponse,
     dependencies=[Depends(api_key_auth)]
 )
-def get_result(job_id: str, db: Session = Depends(get_db)):
+def get_result(job_id: str, response: Response, db: Session = Depends(get_db)):
     job = db.query(Job).filter(Job.id == job_id).first()
 
     if not job:
@@ -46,6 +48,12 @@ def get_result(job_id: str, db: Session = Depends(get_db)):
         )
 
     if job.status != "completed":
+        provisional = _provisional_result(job_id, db)
+        if provisional is not None:
+            # Will be replaced by the final result — don't let clients cache it.
+            response.headers["Cache-Control"] = "no-store"
+            return provisional
+
         logger.debug(f"Result requested for incomplete job {job_id}: {job.status}")
         raise HTTPException(
             status_code=status.HTTP_202_ACCEPTED,
@@ -54,7 +62,9 @@ def get_result(job_id: str, db: Session = Depends(get_db)):
 
     try:
         cached = get_cached_result(job_id)
-        if cached and isinstance(cached, dict):
+        # A provisional cache entry left behind (e.g. Redis was down when the
+        # final result was written) is skipped in favour of the database.
+        if cached and isinstance(cached, dict) and not _is_provisional(cached):
             logger.debug(f"Returning cached result for job {job_id}")
             try:
                 validated = ResultResponse.model_validate(cached)
@@ -83,7 +93,12 @@ def get_result(job_id: str, db: Session = Depends(get_db)):
     except Exception as e:
         logger.warning(f"Cache read failed for {job_id}: {e}")
 
-    result_row = db.query(Result).filter(Result.job_id == job_id).first()
+    result_row = (
+        db.query(Result)
+        .filter(Result.job_id == job_id)
+        .order_by(Result.version.desc())
+        .first()
+    )
 
     if not result_row or not result_row.result_json:
         logger.error(f"Result not found in database for completed job {job_id}")
@@ -131,4 +146,32 @@ def get_result(job_id: str, db: Session = Depends(get_db)):
                 "confidence_score": float(sanitized.get("confidence_score", 0.0)),
                 "metadata": sanitized.get("metadata", {"processing_time_sec": 0, "ocr_engine": "unknown", "llm_provider": "unknown", "model": "unknown", "cached": False})
             }
-            return ResultResponse.model_validate(safe)
\ No newline at end of file
+            return ResultResponse.model_validate(safe)
+
+
+def _is_provisional(result: dict) -> bool:
+    return bool(result.get("provisional") or (result.get("metadata") or {}).get("provisional"))
+
+
+def _provisional_result(job_id: str, db: Session) -> Optional[ResultResponse]:
+    """Newest provisional result for a job still being processed, if any."""
+    try:
+        cached = get_cached_result(job_id)
+        if cached and _is_provisional(cached):
+            return ResultResponse.model_validate(cached)
+    except Exception as e:
+        logger.warning(f"Provisional cache read failed for {job_id}: {e}")
+
+    row = (
+        db.query(Result)
+        .filter(Result.job_id == job_id)
+        .order_by(Result.version.desc())
+        .first()
+    )
+    if not row or not row.result_json:
+        return None
+    try:
+        return ResultResponse.model_validate(sanitize_result(dict(row.result_json)))
+    except Exception as e:
+        logger.error(f"Provisional result invalid for job {job_id}: {e}")
+        return None
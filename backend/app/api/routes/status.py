@@ -3,9 +3,10 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.models.job import Job
+from app.models.result import Result
 from app.models.schemas import StatusResponse
 from app.core.security import api_key_auth
-from app.core.constants import JOB_STATUS_EXPIRED
+from app.core.constants import JOB_STATUS_COMPLETED, JOB_STATUS_EXPIRED
 from app.core.logging import get_logger
 
 logger = get_logger("status")
@@ -36,10 +37,16 @@ def get_status(job_id: str, db: Session = Depends(get_db)):
 
     logger.debug(f"Status retrieved for job {job_id}: {job.status}")
 
+    # A provisional result can be shown while the LLM is still working.
+    result_available = job.status == JOB_STATUS_COMPLETED or (
+        db.query(Result.id).filter(Result.job_id == job_id).first() is not None
+    )
+
     return StatusResponse(
         job_id=job.id,
         status=job.status,
         progress=job.progress,
         stage=job.stage,
         updated_at=job.updated_at,
+        result_available=result_available,
     )
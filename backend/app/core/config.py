@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 # Base directory (used by relative path settings)
@@ -39,7 +39,10 @@ class Settings(BaseSettings):
     # ------------------------------------------------------------------
     #  LLM configuration
     # ------------------------------------------------------------------
-    LLM_PROVIDER: str = "groq"          # groq | openai | llama | ollama
+    LLM_PROVIDER: str = "groq"          # groq | openai | llama | ollama | replay
+    # Failover order (JSON list), e.g. ["groq","openai","llama"].
+    # Empty → [LLM_PROVIDER].
+    LLM_PROVIDER_CHAIN: List[str] = []
 
     # ── Groq (OpenAI-compatible SDK) ──
     GROQ_API_KEY: Optional[str] = None
@@ -53,20 +56,162 @@ class Settings(BaseSettings):
     LLAMA_MODEL: str = "llama3.1:8b"
     LLAMA_MAX_TOKENS: int = 4096
 
+    # ── Replay (recorded responses, for load tests / offline benchmarks) ──
+    # LLM_REPLAY_MODE=record forwards calls to LLM_REPLAY_RECORD_FROM and
+    # writes fixtures; replay serves them by prompt hash.  Misses: synthetic
+    # (rule-based result) | any (round-robin recorded response) | error.
+    LLM_REPLAY_DIR: str = "fixtures/llm"
+    LLM_REPLAY_MODE: str = "replay"             # replay | record
+    LLM_REPLAY_RECORD_FROM: str = "groq"
+    LLM_REPLAY_ON_MISS: str = "synthetic"       # synthetic | any | error
+    LLM_REPLAY_LATENCY_MODE: str = "recorded"   # recorded | fixed | uniform | lognormal
+    LLM_REPLAY_LATENCY_MS: float = 1500.0       # fixed / mean / median latency
+    LLM_REPLAY_LATENCY_JITTER: float = 0.5      # uniform ± fraction, lognormal sigma
+    # Failure injection probabilities, e.g. {"rate_limit":0.05,"timeout":0.02,"truncated":0.03}.
+    LLM_REPLAY_FAILURES: Dict[str, float] = {}
+    LLM_REPLAY_RETRY_AFTER_SEC: float = 1.0
+    LLM_REPLAY_SEED: Optional[int] = None
+
     # Model routing: heavy model for full analysis, light model for
     # simpler tasks (medicine lookups, summary generation, etc.)
     LLM_MODEL_HEAVY: str = "llama-3.3-70b-versatile"
     LLM_MODEL_LIGHT: str = "openai/gpt-oss-20b"
+    # Heavy/light pair per provider in the failover chain; providers not
+    # listed use LLM_MODEL_HEAVY / LLM_MODEL_LIGHT (Groq model ids).
+    LLM_MODELS: Dict[str, Dict[str, str]] = {
+        "openai": {"heavy": "gpt-4o", "light": "gpt-4o-mini"},
+    }
 
     # Token limits — Llama 3.3 70B max output = 32 768
     LLM_MAX_TOKENS_HEAVY: int = 4096
     LLM_MAX_TOKENS_LIGHT: int = 2048
 
+    # Adaptive routing (services/llm_providers/routing.py): the light
+    # model takes documents whose complexity score is at most
+    # LLM_ROUTING_LIGHT_MAX_SCORE while its rolling error rate, p95
+    # latency and output quality stay in bounds.  LLM_ROUTING_OVERRIDES
+    # pins a model per document class, e.g. {"groq:lab_report": "..."}.
+    LLM_ROUTING_ENABLED: bool = True
+    LLM_ROUTING_LIGHT_MAX_SCORE: float = 12.0
+    LLM_ROUTING_WINDOW: int = 50
+    LLM_ROUTING_MIN_SAMPLES: int = 5
+    LLM_ROUTING_MAX_ERROR_RATE: float = 0.2
+    LLM_ROUTING_MAX_P95_SEC: float = 30.0
+    LLM_ROUTING_MIN_QUALITY: float = 0.8
+    LLM_ROUTING_OVERRIDES: Dict[str, str] = {}
+    LLM_ROUTING_LOG_SIZE: int = 1000
+
+    # Prompt token budget — the input cap is shrunk further to fit the
+    # model's context window minus max_tokens.  RAG chunks always get at
+    # least LLM_RAG_MIN_TOKENS (when any were retrieved).
+    LLM_INPUT_TOKEN_BUDGET: int = 6000
+    LLM_DEFAULT_CONTEXT_WINDOW: int = 8192
+    LLM_CONTEXT_WINDOWS: Dict[str, int] = {
+        "llama-3.3-70b-versatile": 131072,
+        "openai/gpt-oss-20b": 131072,
+        "gpt-4o": 128000,
+        "gpt-4o-mini": 128000,
+        "llama3.1:8b": 8192,
+    }
+    LLM_RAG_MIN_TOKENS: int = 800
+
+    # Map-reduce for long reports: above the threshold the document is
+    # split into page/section parts analysed concurrently, then merged.
+    LLM_MAP_REDUCE_ENABLED: bool = False
+    LLM_MAP_REDUCE_THRESHOLD_TOKENS: int = 2500
+    LLM_MAP_CHUNK_TOKENS: int = 1500
+    LLM_MAP_MAX_PARTS: int = 8
+
+    # Deterministic fast path: documents whose parser coverage score
+    # (see services/coverage.py) reaches the threshold are answered from
+    # the catalogs without an LLM call.  With LLM_FAST_PATH_UPGRADE the
+    # LLM still runs afterwards and replaces the rule-based result.
+    LLM_FAST_PATH_ENABLED: bool = False
+    LLM_FAST_PATH_THRESHOLD: float = 0.95
+    LLM_FAST_PATH_UPGRADE: bool = False
+
+    # Store a rule-based provisional result right after parsing so
+    # /result has content within seconds; the LLM result replaces it.
+    PROVISIONAL_RESULTS_ENABLED: bool = True
+
+    # Single-flight: identical concurrent OCR / LLM work (same file hash /
+    # same prompt inputs) runs once; other jobs wait for the leader's
+    # result and take over if its lease expires.
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_LEASE_SEC: float = 30.0
+    SINGLE_FLIGHT_RESULT_TTL_SEC: int = 600
+    SINGLE_FLIGHT_WAIT_TIMEOUT_SEC: int = 300
+
+    # Cost accounting (GET /admin/llm/usage): USD per 1M tokens per model
+    # ("input", "output", optional "cached_input").  Unlisted models cost 0.
+    LLM_PRICING: Dict[str, Dict[str, float]] = {
+        "llama-3.3-70b-versatile": {"input": 0.59, "output": 0.79},
+        "openai/gpt-oss-20b": {"input": 0.075, "output": 0.30},
+        "gpt-4o": {"input": 2.50, "output": 10.00, "cached_input": 1.25},
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
+    }
+
     LLM_TEMPERATURE: float = 0.0
     LLM_TIMEOUT_SEC: int = 90
     LLM_RETRY_COUNT: int = 3
     LLM_RETRY_BACKOFF_SEC: int = 2
 
+    # Truncated output (finish_reason=length) is retried with double the
+    # max_tokens, up to the ceiling; if it still doesn't fit the document
+    # is split into sections (at most LLM_TRUNCATION_SPLIT_DEPTH times).
+    # Only transient failures are re-sent unchanged.
+    LLM_MAX_TOKENS_CEILING: int = 8192
+    LLM_TRUNCATION_SPLIT_DEPTH: int = 2
+    # Before growing the budget, keep every complete entry of a truncated
+    # response (services/llm_providers/json_repair.py) and ask only for
+    # the tests / medicines it is missing.
+    LLM_SALVAGE_TRUNCATED_OUTPUT: bool = True
+
+    # Shared (Redis) rate limits per provider+model; 0 disables a bucket.
+    # LLM_PROVIDER_RATE_LIMITS holds each provider's default (Groq's free
+    # tier; providers not listed are unlimited).  LLM_RATE_LIMITS
+    # overrides per "provider:model" or bare model id, e.g.
+    # {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}}
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    LLM_PROVIDER_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "groq": {"rpm": 30, "tpm": 12000},
+    }
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    # Longest a call may queue for capacity before it is failed instead.
+    LLM_RATE_LIMIT_MAX_WAIT_SEC: int = 120
+    # In-flight calls per provider+model in each process.
+    LLM_MAX_CONCURRENCY: int = 4
+
+    # Circuit breaker per provider in the failover chain.  A call is bad
+    # if it fails or exceeds LLM_BREAKER_SLOW_CALL_SEC; the circuit opens
+    # when the bad rate over the window reaches LLM_BREAKER_FAILURE_RATE.
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SEC: float = 45.0
+    LLM_BREAKER_OPEN_SEC: int = 30
+    LLM_BREAKER_HALF_OPEN_PROBES: int = 1
+
+    # Request hedging: if a call is still running after the given
+    # percentile of recent successful latency, send a second request
+    # (to LLM_HEDGE_PROVIDER, or the same provider when empty) and keep
+    # whichever finishes first.
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 10
+    LLM_HEDGE_MIN_DELAY_SEC: float = 5.0
+    LLM_HEDGE_PROVIDER: str = ""
+
+    # ------------------------------------------------------------------
+    #  Outbound HTTP (shared pooled clients for LLM + retrieval calls)
+    # ------------------------------------------------------------------
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SEC: float = 60.0
+    HTTP_CONNECT_TIMEOUT_SEC: float = 10.0
+    HTTP_TIMEOUT_SEC: float = 30.0
+    HTTP2_ENABLED: bool = True          # needs the `h2` package
+
     # ------------------------------------------------------------------
     #  RAG / Embeddings (pgvector + Jina AI)
     # ------------------------------------------------------------------
@@ -75,6 +220,52 @@ class Settings(BaseSettings):
     JINA_EMBEDDING_MODEL: str = "jina-embeddings-v3"
     JINA_DIMENSIONS: int = 512
     RAG_TOP_K: int = 5
+    # entity: fetch chunks of parsed test/medicine ids directly, vector
+    # search fills the rest of RAG_TOP_K | vector: similarity search only |
+    # multi: one query per entity (up to RAG_MULTI_QUERY_MAX), all searched
+    # in one SQL statement, RAG_MULTI_PER_QUERY neighbours each, merged
+    # under RAG_MULTI_TOKEN_BUDGET.
+    RAG_RETRIEVAL_MODE: str = "vector"
+    RAG_MULTI_QUERY_MAX: int = 20
+    RAG_MULTI_PER_QUERY: int = 2
+    RAG_MULTI_TOKEN_BUDGET: int = 1500
+    # ANN search tunables, applied per query with SET LOCAL: HNSW candidate
+    # list size (raised to at least top_k) and IVFFlat lists probed (if an
+    # IVFFlat index is used instead).  RAG_HNSW_ITERATIVE_SCAN
+    # (pgvector ≥ 0.8: relaxed_order | strict_order) keeps filtered
+    # searches from returning fewer than top_k rows; empty = not set.
+    RAG_HNSW_EF_SEARCH: int = 40
+    RAG_IVFFLAT_PROBES: int = 10
+    RAG_HNSW_ITERATIVE_SCAN: str = ""
+    # pgvector | memory (services/vector_index.py: float32 matrix in
+    # process, works without pgvector).  The memory index loads from
+    # RAG_MEMORY_SNAPSHOT (<path>.npy + <path>.json) or the DB and is
+    # refreshed per RAG_MEMORY_REFRESH: never | interval | on_change.
+    RAG_VECTOR_BACKEND: str = "pgvector"
+    RAG_MEMORY_SNAPSHOT: str = ""
+    RAG_MEMORY_REFRESH: str = "on_change"
+    RAG_MEMORY_REFRESH_SEC: int = 300
+    # jina (cloud API) | hashing (feature hashing, no model, offline) |
+    # onnx (local sentence-embedding model in EMBEDDING_ONNX_MODEL: a dir
+    # with model.onnx + tokenizer.json; needs onnxruntime + tokenizers).
+    # Local vectors are zero-padded to JINA_DIMENSIONS, the width of the
+    # index column.  Switching provider re-embeds on the next index sync.
+    EMBEDDING_PROVIDER: str = "jina"
+    EMBEDDING_ONNX_MODEL: str = ""
+    EMBEDDING_MAX_LENGTH: int = 256      # onnx: tokens per text
+    EMBEDDING_BATCH_SIZE: int = 32       # onnx: texts per inference run
+    EMBEDDING_THREADS: int = 0           # onnx: intra-op threads, 0 = all cores
+    # Query embeddings from concurrent jobs are coalesced into one provider
+    # call per micro-batch (services/embeddings.py).
+    EMBED_BATCH_SIZE: int = 64
+    EMBED_BATCH_WAIT_MS: float = 5.0
+    EMBED_MAX_CONCURRENT_BATCHES: int = 4
+    # Query embedding cache: in-process LRU + Redis, vectors packed as
+    # float16 (or float32) bytes.
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_LRU_SIZE: int = 4096
+    EMBED_CACHE_TTL_SEC: int = 30 * 24 * 3600
+    EMBED_CACHE_DTYPE: str = "float16"      # float16 | float32
 
     OCR_ENGINE: str = "tesseract"
 
@@ -82,6 +273,9 @@ class Settings(BaseSettings):
 
     REQUIRE_API_KEY: bool = True
     API_KEY: str = ""
+    # Guards /admin (X-Admin-Token).  Never the same value as API_KEY,
+    # which the frontend ships publicly; unset = admin endpoints disabled.
+    ADMIN_TOKEN: str = ""
 
     JOB_EXPIRY_DAYS: int = 7
     JOB_HARD_DELETE_DAYS: int = 30
@@ -95,6 +289,9 @@ class Settings(BaseSettings):
     QUEUED_POLL_INTERVAL_SEC: int = 30
     # Number of worker threads that run pipeline jobs concurrently.
     WORKER_CONCURRENCY: int = 4
+    # Operational counters (app.services.metrics) are buffered in-process
+    # and written to Redis in one pipeline this often.
+    METRICS_FLUSH_INTERVAL_SEC: float = 2.0
 
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -41,3 +41,9 @@ DEFAULT_PROGRESS_BY_STAGE = {
     STAGE_DONE: 100,
     STAGE_FAILED: 100,
 }
+
+# Result versions — a job's stored result is only ever replaced by a
+# higher version (provisional rule-based → final → LLM upgrade).
+RESULT_VERSION_PROVISIONAL = 1
+RESULT_VERSION_FINAL = 2
+RESULT_VERSION_UPGRADED = 3
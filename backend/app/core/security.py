@@ -1,3 +1,4 @@
+import hmac
 import os
 from fastapi import UploadFile, HTTPException, status, Request, Header
 from app.core.config import settings
@@ -65,3 +66,20 @@ def api_key_auth(x_api_key: str = Header(None)):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or missing API key"
             )
+
+
+def admin_token_auth(x_admin_token: str = Header(None)):
+    """FastAPI dependency — guard /admin with ADMIN_TOKEN (separate from the public API key).
+
+    403 while ADMIN_TOKEN is unset, 401 for a missing or wrong token.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled (ADMIN_TOKEN not set)"
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing admin token"
+        )
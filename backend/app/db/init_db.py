@@ -7,6 +7,7 @@ from app.core.logging import get_logger
 
 # Import models so they register with Base.metadata (used by Alembic env.py).
 from app.models.job import Job  # noqa: F401
+from app.models.llm_call import LLMCall  # noqa: F401
 from app.models.medical_knowledge import MedicalKnowledge  # noqa: F401
 from app.models.result import Result  # noqa: F401
 
@@ -1,28 +1,33 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, status, Header
+from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
+from app.core.security import admin_token_auth
 from app.db.init_db import init_db
 from app.db.session import SessionLocal
 from app.api.routes.upload import router as upload_router
 from app.api.routes.status import router as status_router
 from app.api.routes.result_routes import router as result_router
+from app.api.routes.admin import router as admin_router
 from app.services.job_lifecycle import cleanup_old_jobs
 from app.services.scheduler import start_scheduler
-from app.models import job, result  # noqa: F401 — registers models with SQLAlchemy
+from app.services import http_clients
+from app.models import job, result, llm_call  # noqa: F401 — registers models with SQLAlchemy
 
 logger = get_logger("main")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Start background services on startup; placeholder for shutdown cleanup."""
+    """Start background services on startup; close pooled HTTP clients on shutdown."""
     logger.info("Starting background scheduler")
     start_scheduler()
     yield
     logger.info("Application shutting down")
+    await http_clients.aclose_all()
+    http_clients.close_all()
 
 
 def create_app() -> FastAPI:
@@ -61,20 +66,14 @@ def create_app() -> FastAPI:
     app.include_router(upload_router, tags=["upload"])
     app.include_router(status_router, tags=["status"])
     app.include_router(result_router, tags=["result"])
+    app.include_router(admin_router, tags=["admin"])
 
     @app.get("/health")
     def health():
         return {"status": "ok", "app": settings.APP_NAME}
 
-    @app.post("/admin/cleanup")
-    def trigger_cleanup(x_admin_token: str = Header(None)):
-        if settings.REQUIRE_API_KEY and (not x_admin_token or x_admin_token != settings.API_KEY):
-            logger.warning("Unauthorized cleanup attempt")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or missing admin token"
-            )
-
+    @app.post("/admin/cleanup", dependencies=[Depends(admin_token_auth)])
+    def trigger_cleanup():
         db = SessionLocal()
         try:
             logger.info("Manual cleanup triggered via API")
@@ -0,0 +1,35 @@
+"""One row per LLM provider call, for token usage / cost / latency accounting."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, func
+
+from app.db.base import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+    __table_args__ = (
+        Index("ix_llm_calls_created_at", "created_at"),
+        Index("ix_llm_calls_job_id", "job_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Kept after the job is hard-deleted so cost history survives.
+    job_id = Column(String, ForeignKey("jobs.id", ondelete="SET NULL"), nullable=True)
+    provider = Column(String(30), nullable=False)
+    model = Column(String(100), nullable=True)
+    doc_type = Column(String(50), nullable=True)
+    prompt_version = Column(String(20), nullable=True)   # prompts.PROMPT_VERSION
+    success = Column(Boolean, nullable=False, default=True)
+    error_kind = Column(String(30), nullable=True)   # see llm_providers.errors
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    cached_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
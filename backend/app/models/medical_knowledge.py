@@ -18,6 +18,22 @@ class MedicalKnowledge(Base):
     __table_args__ = (
         Index("ix_mk_source", "source"),
         Index("ix_mk_entity_id", "entity_id"),
+        # Upsert key for re-indexing (migration 0007, NULLS NOT DISTINCT).
+        Index(
+            "ux_mk_source_entity_chunk",
+            "source", "entity_id", "chunk_type",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        # ANN index for cosine search (migration 0006); query-time recall
+        # is tuned with RAG_HNSW_EF_SEARCH.
+        Index(
+            "ix_mk_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -27,4 +43,5 @@ class MedicalKnowledge(Base):
     entity_id = Column(String(100), nullable=True)    # test key or medicine key
     chunk_type = Column(String(30), nullable=True)    # factual | clinical
     metadata_ = Column("metadata", JSONB, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # retrieval.content_hash, for incremental indexing
     created_at = Column(DateTime(timezone=True), default=_utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Boolean, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Float, Boolean, Integer, DateTime, ForeignKey, JSON, false
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime, timezone
 from app.db.base import Base
@@ -30,4 +30,8 @@ class Result(Base):
     llm_provider = Column(String)
     model = Column(String)
     cached = Column(Boolean, default=False)
+    # Monotonic version (see RESULT_VERSION_*); provisional results are
+    # rule-based placeholders served until the final result replaces them.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    provisional = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime(timezone=True), default=_utcnow)
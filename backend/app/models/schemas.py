@@ -18,6 +18,7 @@ class StatusResponse(BaseModel):
     progress: int  # Percentage complete (0-100)
     stage: str  # Current processing stage
     updated_at: datetime  # Last update timestamp
+    result_available: bool = False  # True once /result serves content (possibly provisional)
 
 
 class AbnormalValue(BaseModel):
@@ -71,6 +72,8 @@ class Metadata(BaseModel):
     llm_provider: str
     model: str
     cached: bool
+    provisional: bool = False  # rule-based placeholder; final result pending
+    version: int = 1
 
 
 class ResultResponse(BaseModel):
@@ -89,6 +92,7 @@ class ResultResponse(BaseModel):
     lifestyle_action_plan: Optional[dict] = None
     red_flags: Optional[List[str]] = None
     confidence_score: float
+    provisional: bool = False  # True while a rule-based preview awaits the final result
     metadata: Metadata
 
 
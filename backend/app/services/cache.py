@@ -7,6 +7,23 @@ from app.services.result_sanitizer import sanitize_result
 
 logger = get_logger("cache")
 
+# Write the result unless the cached one carries a higher metadata.version,
+# so a late provisional write can never replace the final result.
+_SET_IF_NEWER_LUA = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local ok, doc = pcall(cjson.decode, current)
+    if ok and type(doc) == 'table' and type(doc.metadata) == 'table' then
+        local cur_version = tonumber(doc.metadata.version)
+        if cur_version and cur_version > tonumber(ARGV[2]) then
+            return 0
+        end
+    end
+end
+redis.call('SETEX', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
 
 def get_cached_result(job_id: str) -> Optional[dict]:
     """Return the cached result for a job, or None if not found."""
@@ -27,7 +44,8 @@ def get_cached_result(job_id: str) -> Optional[dict]:
         return None
 
 
-def set_cached_result(job_id: str, result: dict, ttl_sec: int = 60 * 60 * 24 * 7):
+def set_cached_result(job_id: str, result: dict, ttl_sec: int = 60 * 60 * 24 * 7) -> bool:
+    """Cache a job result; returns False if a newer version is already cached."""
     try:
         r = get_redis_client()
         key = f"result:{job_id}"
@@ -35,7 +53,14 @@ def set_cached_result(job_id: str, result: dict, ttl_sec: int = 60 * 60 * 24 * 7
             safe = sanitize_result(result)
         except Exception:
             safe = result
-        r.setex(key, ttl_sec, json.dumps(safe))
+        version = (safe.get("metadata") or {}).get("version")
+        if version is None:
+            r.setex(key, ttl_sec, json.dumps(safe))
+        elif not r.eval(_SET_IF_NEWER_LUA, 1, key, json.dumps(safe), int(version), ttl_sec):
+            logger.info(f"Kept newer cached result for job {job_id} (offered v{version})")
+            return False
         logger.info(f"Cached result for job {job_id}")
+        return True
     except Exception as e:
         logger.error(f"Cache set failed: {e}")
+        return False
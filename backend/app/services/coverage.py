@@ -0,0 +1,142 @@
+"""
+Parser coverage scoring for the deterministic fast path.
+
+``score_coverage(parsed_data)`` estimates how completely the rule-based
+parser captured the document:
+
+  • tests     — share of parsed tests with a numeric value, a unit and a
+                catalog reference range;
+  • medicines — share of parsed medicines whose catalog entry has every
+                field the explanation needs (``MEDICINE_REQUIRED_FIELDS``);
+  • raw text  — share of result-looking OCR lines (number + unit or
+                reference range) / drug lines that a parsed entity
+                accounts for.
+
+The score is the product of the applicable shares (0.0 when nothing was
+parsed).  Jobs scoring at least ``LLM_FAST_PATH_THRESHOLD`` are answered
+by ``llm.generate_rule_based_explanation`` without an LLM call.
+"""
+
+import re
+from typing import Dict, List, Set
+
+from app.services import metrics
+from app.services.catalog import MEDICINE_CATALOG, SYNONYMS, TEST_CATALOG, UNITS
+from app.services.llm_providers.prompt_budget import clean_ocr_text
+
+MEDICINE_REQUIRED_FIELDS = ("purpose", "mechanism", "common_side_effects", "how_to_take")
+
+_DATE_RE = re.compile(r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b")
+_RANGE_RE = re.compile(r"\d\s*[-–]\s*\d|[<>]\s*\d")
+_NUMBER_RE = re.compile(r"\d")
+_DRUG_LINE_RE = re.compile(r"\b(tab|tablet|cap|capsule|syp|syrup|inj|injection)\b\.?", re.IGNORECASE)
+_UNIT_RE = re.compile(
+    r"(?<![a-z])(" + "|".join(
+        re.escape(u) for u in sorted({*UNITS.keys(), *(v.lower() for v in UNITS.values())}, key=len, reverse=True) if u
+    ) + r")(?![a-z])"
+)
+
+
+def catalog_test_names(test_id: str) -> Set[str]:
+    """Lower-case names a test can appear under (id, display name, aliases, synonyms)."""
+    meta = TEST_CATALOG.get(test_id) or {}
+    names = {test_id.replace("_", " "), (meta.get("display_name") or "").lower()}
+    names.update(a.lower() for a in meta.get("aliases", []))
+    names.update(k for k, v in SYNONYMS.items() if v == test_id)
+    return {n for n in names if n}
+
+
+def catalog_medicine_names(med_id: str) -> Set[str]:
+    """Lower-case names a medicine can appear under."""
+    meta = MEDICINE_CATALOG.get(med_id) or {}
+    names = {med_id, (meta.get("display_name") or "").lower()}
+    names.update(a.lower() for a in meta.get("aliases", []))
+    return {n for n in names if n}
+
+
+def mentions(line: str, names: Set[str]) -> bool:
+    """True if any of ``names`` appears in (lower-case) ``line`` as a whole word."""
+    return any(re.search(rf"(?<![a-z]){re.escape(n)}(?![a-z])", line) for n in names)
+
+
+def _is_result_line(line: str) -> bool:
+    if not _NUMBER_RE.search(line) or _DATE_RE.search(line):
+        return False
+    return bool(_RANGE_RE.search(line) or _UNIT_RE.search(line))
+
+
+def _test_complete(t: dict) -> bool:
+    return (
+        t.get("id") in TEST_CATALOG
+        and isinstance(t.get("value"), (int, float))
+        and bool(t.get("unit"))
+        and t.get("normal_min") is not None
+        and t.get("normal_max") is not None
+    )
+
+
+def _medicine_complete(m: dict) -> bool:
+    meta = MEDICINE_CATALOG.get(m.get("id")) if isinstance(m, dict) else None
+    return bool(meta) and all(meta.get(f) for f in MEDICINE_REQUIRED_FIELDS)
+
+
+def score_coverage(parsed_data: dict) -> Dict:
+    """Return coverage details, including ``score`` in [0, 1]."""
+    tests = [t for t in parsed_data.get("tests", []) or [] if isinstance(t, dict)]
+    medicines = [m for m in parsed_data.get("medicines", []) or [] if isinstance(m, dict)]
+    text, _ = clean_ocr_text(str(parsed_data.get("raw_text") or ""))
+    lines = [line.lower() for line in text.splitlines()]
+
+    unique_tests = {t.get("id") or t.get("name"): t for t in tests}
+    known_tests: Set[str] = set()
+    for test_id in unique_tests:
+        known_tests |= catalog_test_names(str(test_id))
+    med_names: Set[str] = set()
+    for m in medicines:
+        med_names |= catalog_medicine_names(str(m.get("id") or m.get("name") or "").lower())
+
+    result_lines = [l for l in lines if _is_result_line(l) and not _DRUG_LINE_RE.search(l)]
+    drug_lines = [l for l in lines if _DRUG_LINE_RE.search(l)]
+    result_covered = sum(1 for l in result_lines if mentions(l, known_tests))
+    drug_covered = sum(1 for l in drug_lines if mentions(l, med_names))
+
+    shares: List[float] = []
+    if unique_tests:
+        shares.append(sum(1 for t in unique_tests.values() if _test_complete(t)) / len(unique_tests))
+    if medicines:
+        shares.append(sum(1 for m in medicines if _medicine_complete(m)) / len(medicines))
+    if result_lines:
+        shares.append(result_covered / len(result_lines))
+    if drug_lines:
+        shares.append(drug_covered / len(drug_lines))
+
+    score = 0.0
+    if unique_tests or medicines:
+        score = 1.0
+        for share in shares:
+            score *= share
+
+    return {
+        "score": round(score, 3),
+        "tests": len(unique_tests),
+        "tests_complete": sum(1 for t in unique_tests.values() if _test_complete(t)),
+        "medicines": len(medicines),
+        "medicines_complete": sum(1 for m in medicines if _medicine_complete(m)),
+        "result_lines": len(result_lines),
+        "result_lines_covered": result_covered,
+        "drug_lines": len(drug_lines),
+        "drug_lines_covered": drug_covered,
+    }
+
+
+def fast_path_stats() -> Dict:
+    """Jobs answered by the fast path vs the LLM (from ``metrics``)."""
+    counters = metrics.get_counters("fast_path")
+    served = counters.get("served", 0)
+    total = served + counters.get("llm", 0)
+    return {
+        "served": served,
+        "llm": counters.get("llm", 0),
+        "upgraded": counters.get("upgraded", 0),
+        "fraction": round(served / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,158 @@
+"""
+Two-level cache for RAG query embeddings.
+
+``_build_query`` strings repeat a lot (the same common panels and
+drugs), so query vectors are cached:
+
+  • in-process LRU of ``EMBED_CACHE_LRU_SIZE`` vectors;
+  • Redis (``emb:<model>:<dims>:<dtype>:<sha1>``), shared by every
+    worker, for ``EMBED_CACHE_TTL_SEC``.
+
+Keys cover the embedding provider's model, dimensions and the normalized query text
+(case-folded, whitespace collapsed — the normalized text is what gets
+embedded, so a cached vector is exactly what a miss would compute).
+Vectors are stored as packed little-endian float16 (default) or float32
+bytes rather than JSON lists: 1 KB instead of ~5 KB for 512 dims.
+
+Lookups are counted in the ``embedding_cache`` metric group
+(``lru_hits``, ``redis_hits``, ``misses``); ``cache_stats`` turns them
+into a hit rate for ``GET /admin/embeddings/cache``.
+"""
+
+import hashlib
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import metrics
+from app.services.embedding_providers import get_embedding_provider
+from app.services.redis_client import get_redis_binary_client
+
+logger = get_logger("embedding_cache")
+
+_FORMATS = {"float16": "e", "float32": "f"}
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def _dtype() -> str:
+    return settings.EMBED_CACHE_DTYPE if settings.EMBED_CACHE_DTYPE in _FORMATS else "float16"
+
+
+def cache_key(normalized: str) -> str:
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    model = get_embedding_provider().model_id
+    return f"emb:{model}:{settings.JINA_DIMENSIONS}:{_dtype()}:{digest}"
+
+
+def pack(vector: List[float], dtype: str = "float16") -> bytes:
+    return struct.pack(f"<{len(vector)}{_FORMATS[dtype]}", *vector)
+
+
+def unpack(blob: bytes, dtype: str = "float16") -> List[float]:
+    code = _FORMATS[dtype]
+    return list(struct.unpack(f"<{len(blob) // struct.calcsize(code)}{code}", blob))
+
+
+class _LRU:
+    def __init__(self):
+        self._items: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+            return vector
+
+    def put(self, key: str, vector: List[float]):
+        size = settings.EMBED_CACHE_LRU_SIZE
+        if size <= 0:
+            return
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_lru = _LRU()
+
+
+def get_many(keys: List[str]) -> Dict[str, List[float]]:
+    """Cached vectors for ``keys`` (LRU first, then one Redis MGET)."""
+    if not settings.EMBED_CACHE_ENABLED:
+        return {}
+
+    found: Dict[str, List[float]] = {}
+    for key in keys:
+        vector = _lru.get(key)
+        if vector is not None:
+            found[key] = vector
+    if found:
+        metrics.incr("embedding_cache", "lru_hits", len(found))
+
+    remaining = [k for k in keys if k not in found]
+    if remaining:
+        dtype = _dtype()
+        try:
+            blobs = get_redis_binary_client().mget(remaining)
+        except Exception as e:
+            logger.debug(f"Embedding cache read failed: {e}")
+            blobs = [None] * len(remaining)
+        redis_hits = 0
+        for key, blob in zip(remaining, blobs):
+            if blob:
+                found[key] = unpack(blob, dtype)
+                _lru.put(key, found[key])
+                redis_hits += 1
+        if redis_hits:
+            metrics.incr("embedding_cache", "redis_hits", redis_hits)
+        if len(remaining) > redis_hits:
+            metrics.incr("embedding_cache", "misses", len(remaining) - redis_hits)
+    return found
+
+
+def put_many(vectors: Dict[str, List[float]]):
+    """Store freshly computed vectors in both levels (best-effort for Redis)."""
+    if not settings.EMBED_CACHE_ENABLED or not vectors:
+        return
+    dtype = _dtype()
+    for key, vector in vectors.items():
+        _lru.put(key, vector)
+    try:
+        pipe = get_redis_binary_client().pipeline(transaction=False)
+        for key, vector in vectors.items():
+            pipe.setex(key, settings.EMBED_CACHE_TTL_SEC, pack(vector, dtype))
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Embedding cache write failed: {e}")
+
+
+def cache_stats() -> Dict:
+    """Hit counts and hit rate for query embeddings (from ``metrics``)."""
+    counters = metrics.get_counters("embedding_cache")
+    hits = counters.get("lru_hits", 0) + counters.get("redis_hits", 0)
+    total = hits + counters.get("misses", 0)
+    return {
+        "lru_hits": counters.get("lru_hits", 0),
+        "redis_hits": counters.get("redis_hits", 0),
+        "misses": counters.get("misses", 0),
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def clear_local():
+    """Drop the in-process level (tests)."""
+    _lru.clear()
@@ -0,0 +1,6 @@
+"""Embedding provider abstraction — cloud (Jina) or local CPU backends."""
+
+from app.services.embedding_providers.base import EmbeddingProvider
+from app.services.embedding_providers.factory import get_embedding_provider
+
+__all__ = ["EmbeddingProvider", "get_embedding_provider"]
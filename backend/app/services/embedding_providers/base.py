@@ -0,0 +1,64 @@
+"""
+Abstract base class for embedding providers.
+Each concrete provider must implement `embed` (one batch, blocking).
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class EmbeddingProvider(ABC):
+
+    # Short identifier used in config and logging.
+    name: str = "base"
+
+    # Most texts one `embed` call accepts.
+    max_batch: int = 64
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """Identifies the vectors this provider produces.
+
+        Part of the embedding cache key and of chunk content hashes, so
+        switching provider or model re-embeds instead of mixing vectors.
+        """
+        ...
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed at most ``max_batch`` texts, one vector per text, in order."""
+        ...
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async ``embed``; local providers run it on the default thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.embed, texts)
+
+    def embed_all(self, texts: List[str]) -> List[List[float]]:
+        """Embed any number of texts in ``max_batch`` slices."""
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.max_batch):
+            vectors.extend(self.embed(texts[i: i + self.max_batch]))
+        return vectors
+
+
+def fit_to_index(matrix: np.ndarray) -> List[List[float]]:
+    """L2-normalise rows and zero-pad them to the vector column width.
+
+    ``medical_knowledge.embedding`` is ``vector(JINA_DIMENSIONS)``; smaller
+    local models are padded with zeros, which leaves cosine distance
+    unchanged.
+    """
+    width = settings.JINA_DIMENSIONS
+    if matrix.shape[1] > width:
+        raise ValueError(f"Embedding has {matrix.shape[1]} dims; the index holds {width}")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+    if matrix.shape[1] < width:
+        matrix = np.pad(matrix, ((0, 0), (0, width - matrix.shape[1])))
+    return matrix.astype(np.float32).tolist()
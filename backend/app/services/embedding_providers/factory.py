@@ -0,0 +1,49 @@
+"""
+Provider factory — returns EmbeddingProvider singletons.
+EMBEDDING_PROVIDER options: jina | hashing | onnx
+"""
+
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.embedding_providers.base import EmbeddingProvider
+
+logger = get_logger("embeddings.factory")
+
+_providers: Dict[str, EmbeddingProvider] = {}
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """Return a lazily-initialised provider singleton (default: EMBEDDING_PROVIDER)."""
+    name = (name or settings.EMBEDDING_PROVIDER).lower().strip()
+    if name in _providers:
+        return _providers[name]
+
+    logger.info(f"Initialising embedding provider: {name}")
+
+    if name == "jina":
+        from app.services.embedding_providers.jina_provider import JinaEmbeddingProvider
+        provider = JinaEmbeddingProvider()
+
+    elif name == "hashing":
+        from app.services.embedding_providers.hashing_provider import HashingEmbeddingProvider
+        provider = HashingEmbeddingProvider()
+
+    elif name == "onnx":
+        from app.services.embedding_providers.onnx_provider import OnnxEmbeddingProvider
+        provider = OnnxEmbeddingProvider()
+
+    else:
+        raise ValueError(
+            f"Unknown EMBEDDING_PROVIDER={name!r}. "
+            f"Supported: jina, hashing, onnx"
+        )
+
+    _providers[name] = provider
+    return provider
+
+
+def reset_embedding_provider():
+    """Reset the singletons (useful in tests)."""
+    _providers.clear()
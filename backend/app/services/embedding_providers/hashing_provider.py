@@ -0,0 +1,51 @@
+"""
+Feature-hashing embeddings — a dependency-free local CPU baseline.
+
+Words and their character trigrams are hashed (CRC32) into
+``JINA_DIMENSIONS`` signed buckets.  Deterministic and instant, so
+retrieval works offline and without a model; quality is lexical
+(spelling variants and aliases that share trigrams match, synonyms do
+not).
+"""
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_providers.base import EmbeddingProvider, fit_to_index
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _features(text: str) -> List[str]:
+    features = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        padded = f"#{word}#"
+        features.append(word)
+        features.extend(padded[i: i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Word + trigram feature hashing, L2-normalised."""
+
+    name = "hashing"
+    max_batch = 1024
+
+    @property
+    def model_id(self) -> str:
+        return f"hashing-v1-{settings.JINA_DIMENSIONS}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        dims = settings.JINA_DIMENSIONS
+        matrix = np.zeros((len(texts), dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([zlib.crc32(f.encode("utf-8")) for f in _features(text)], dtype=np.uint32)
+            if not hashes.size:
+                continue
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], (hashes & 0x7FFFFFFF) % dims, signs)
+        return fit_to_index(matrix)
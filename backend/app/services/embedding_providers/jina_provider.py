@@ -0,0 +1,64 @@
+"""
+Jina AI embeddings API (``jina-embeddings-v3`` by default) over the
+pooled ``jina`` HTTP clients.
+"""
+
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.services.embedding_providers.base import EmbeddingProvider
+from app.services.http_clients import get_async_client, get_sync_client
+
+JINA_EMBED_URL = "https://api.jina.ai/v1/embeddings"
+JINA_TIMEOUT_SEC = 30.0
+
+
+class JinaEmbeddingProvider(EmbeddingProvider):
+    """Cloud embeddings from the Jina API."""
+
+    name = "jina"
+    max_batch = 64  # Jina API limit
+
+    @property
+    def model_id(self) -> str:
+        # Just the model name, so hashes from before providers existed stay valid.
+        return settings.JINA_EMBEDDING_MODEL
+
+    def _request(self, texts: List[str]) -> Tuple[dict, dict]:
+        if not settings.JINA_API_KEY:
+            raise RuntimeError("JINA_API_KEY is not configured")
+
+        headers = {
+            "Authorization": f"Bearer {settings.JINA_API_KEY}",
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "model": settings.JINA_EMBEDDING_MODEL,
+            "input": texts,
+            "task": "text-matching",
+            "dimensions": settings.JINA_DIMENSIONS,
+            "late_chunking": False,
+            "truncate": True,
+        }
+        return payload, headers
+
+    @staticmethod
+    def _vectors(data: dict) -> List[List[float]]:
+        # Sort by index to ensure order matches input
+        embeddings = sorted(data["data"], key=lambda x: x["index"])
+        return [item["embedding"] for item in embeddings]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        payload, headers = self._request(texts)
+        response = get_sync_client("jina").post(
+            JINA_EMBED_URL, json=payload, headers=headers, timeout=JINA_TIMEOUT_SEC
+        )
+        response.raise_for_status()
+        return self._vectors(response.json())
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        payload, headers = self._request(texts)
+        client = get_async_client("jina", timeout=JINA_TIMEOUT_SEC)
+        response = await client.post(JINA_EMBED_URL, json=payload, headers=headers)
+        response.raise_for_status()
+        return self._vectors(response.json())
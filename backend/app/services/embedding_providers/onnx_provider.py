@@ -0,0 +1,89 @@
+"""
+Local sentence-embedding model on ONNX Runtime (CPU).
+
+``EMBEDDING_ONNX_MODEL`` is a directory holding ``model.onnx`` and its
+Hugging Face ``tokenizer.json`` (e.g. an ONNX export of
+``sentence-transformers/all-MiniLM-L6-v2``).  Token embeddings are
+mean-pooled over the attention mask unless the model already outputs
+pooled sentence vectors; vectors are normalised and zero-padded to the
+index width.
+
+Needs the optional ``onnxruntime`` and ``tokenizers`` packages.
+``EMBEDDING_THREADS`` sets ONNX Runtime's intra-op threads (0 = one per
+core); ``EMBEDDING_BATCH_SIZE`` texts go through the model per run.
+"""
+
+import threading
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.embedding_providers.base import EmbeddingProvider, fit_to_index
+
+logger = get_logger("embeddings.onnx")
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token vectors over real (unpadded) tokens."""
+    mask = attention_mask[..., None].astype(np.float32)
+    return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """Sentence-transformer style model run with ONNX Runtime on the CPU."""
+
+    name = "onnx"
+
+    def __init__(self):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_PROVIDER=onnx needs the onnxruntime and tokenizers packages"
+            ) from e
+
+        model_dir = Path(settings.EMBEDDING_ONNX_MODEL)
+        if not (model_dir / "model.onnx").exists():
+            raise RuntimeError(f"EMBEDDING_ONNX_MODEL: no model.onnx in {model_dir}")
+
+        self._tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=settings.EMBEDDING_MAX_LENGTH)
+        self._tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(settings.EMBEDDING_THREADS, 0)
+        options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(
+            str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self._session.get_inputs()}
+        self._model_name = model_dir.name
+        self.max_batch = max(settings.EMBEDDING_BATCH_SIZE, 1)
+        # The tokenizer is not safe to share across threads mid-call.
+        self._lock = threading.Lock()
+        logger.info(f"Loaded ONNX embedding model {self._model_name} ({settings.EMBEDDING_THREADS or 'all'} threads)")
+
+    @property
+    def model_id(self) -> str:
+        return f"onnx-{self._model_name}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        with self._lock:
+            encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        output = self._session.run(None, {k: v for k, v in feed.items() if k in self._inputs})[0]
+
+        if output.ndim == 3:
+            output = mean_pool(output, attention_mask)
+        return fit_to_index(output)
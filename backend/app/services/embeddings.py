@@ -0,0 +1,162 @@
+"""
+Text embeddings — sync calls for indexing, micro-batched async calls
+for retrieval.
+
+Vectors come from the ``EMBEDDING_PROVIDER`` backend (see
+``embedding_providers``): the Jina API, or a local CPU model so
+retrieval can run entirely on the worker.
+
+Every job used to embed its single RAG query with its own blocking
+request on the worker's thread pool.  ``embed_async`` instead queues
+texts on a per-event-loop ``EmbeddingBatcher``, which coalesces the
+queries of all in-flight jobs into one provider call per micro-batch:
+
+  • a batch is sent as soon as ``EMBED_BATCH_SIZE`` texts (capped at the
+    provider's ``max_batch``; Jina's is 64) are queued, or
+    ``EMBED_BATCH_WAIT_MS`` after the first one;
+  • identical texts in a batch are embedded once;
+  • at most ``EMBED_MAX_CONCURRENT_BATCHES`` batches are in flight.
+
+Counts land in the ``embeddings`` metric group: ``texts``, ``batches``,
+``texts_sent`` and ``deduped``.
+
+Retrieval embeds through ``embed_queries`` / ``embed_queries_async``,
+which check the two-level ``embedding_cache`` first and only send the
+misses.
+"""
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import embedding_cache, metrics
+from app.services.embedding_providers import get_embedding_provider
+
+logger = get_logger("embeddings")
+
+
+def embed_sync(texts: List[str]) -> List[List[float]]:
+    """Embed texts with blocking provider calls (``max_batch`` texts each)."""
+    return get_embedding_provider().embed_all(texts)
+
+
+async def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return await get_embedding_provider().aembed(texts)
+
+
+# ── Cross-job micro-batching ─────────────────────────────────────────
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests on one event loop."""
+
+    def __init__(self, embed_batch=None):
+        self._embed_batch = embed_batch or _embed_batch
+        self._max_batch = max(1, min(settings.EMBED_BATCH_SIZE, get_embedding_provider().max_batch))
+        self._max_wait = max(settings.EMBED_BATCH_WAIT_MS, 0.0) / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._slots = asyncio.Semaphore(max(settings.EMBED_MAX_CONCURRENT_BATCHES, 1))
+        self._tasks: set = set()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            futures.append(future)
+            if len(self._pending) >= self._max_batch:
+                self._flush()
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._flush)
+
+        metrics.incr("embeddings", "texts", len(texts))
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        metrics.incr("embeddings", "batches")
+        metrics.incr("embeddings", "texts_sent", len(unique))
+        metrics.incr("embeddings", "deduped", len(batch) - len(unique))
+
+        try:
+            async with self._slots:
+                vectors = await self._embed_batch(unique)
+        except Exception as e:
+            logger.warning(f"Embedding batch of {len(unique)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+
+_batcher: Optional[Tuple[asyncio.AbstractEventLoop, EmbeddingBatcher]] = None
+
+
+def _get_batcher() -> EmbeddingBatcher:
+    global _batcher
+    loop = asyncio.get_running_loop()
+    if _batcher is None or _batcher[0] is not loop:
+        _batcher = (loop, EmbeddingBatcher())
+    return _batcher[1]
+
+
+async def embed_async(texts: List[str]) -> List[List[float]]:
+    """Embed texts, batched with concurrent requests from other jobs."""
+    if not texts:
+        return []
+    return await _get_batcher().embed(texts)
+
+
+# ── Cached query embeddings ──────────────────────────────────────────
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embed search queries, serving repeats from the embedding cache."""
+    normalized = [embedding_cache.normalize_query(q) for q in queries]
+    keys = [embedding_cache.cache_key(n) for n in normalized]
+    found = embedding_cache.get_many(keys)
+
+    missing = {k: n for k, n in zip(keys, normalized) if k not in found}
+    if missing:
+        fresh = dict(zip(missing, embed_sync(list(missing.values()))))
+        embedding_cache.put_many(fresh)
+        found.update(fresh)
+    return [found[k] for k in keys]
+
+
+async def embed_queries_async(queries: List[str]) -> List[List[float]]:
+    """``embed_queries`` with misses micro-batched across jobs."""
+    loop = asyncio.get_running_loop()
+    normalized = [embedding_cache.normalize_query(q) for q in queries]
+    keys = [embedding_cache.cache_key(n) for n in normalized]
+    found = await loop.run_in_executor(None, embedding_cache.get_many, keys)
+
+    missing = {k: n for k, n in zip(keys, normalized) if k not in found}
+    if missing:
+        fresh = dict(zip(missing, await embed_async(list(missing.values()))))
+        await loop.run_in_executor(None, embedding_cache.put_many, fresh)
+        found.update(fresh)
+    return [found[k] for k in keys]
+
+
+def reset_batcher():
+    """Forget the batcher (tests)."""
+    global _batcher
+    _batcher = None
@@ -0,0 +1,167 @@
+"""
+Process-wide pooled HTTP clients for all outbound calls (LLM + retrieval).
+
+Every logical upstream ("groq", "openai", "llama", "jina", …) gets one
+long-lived ``httpx`` client with keep-alive, bounded pools and HTTP/2
+(when the ``h2`` package is installed), so repeated calls reuse TCP/TLS
+connections instead of paying a handshake each time.
+
+Async clients are bound to the event loop that created them; if a caller
+runs on a different loop (e.g. the sync ``generate_explanation`` wrapper)
+a fresh client is created for that loop.
+
+Per-host connection reuse is counted in the ``http_connections`` metric
+group: ``<host>:requests``, ``<host>:new_connections`` and
+``<host>:tls_handshakes``.  Requests minus new connections = reuses;
+``connection_stats()`` (served under ``GET /admin/metrics``) does the
+subtraction.  The request hooks and trace callbacks run on the request
+path, so they only bump the in-process ``metrics`` buffer — no Redis
+round trip per request or per connect/TLS event.
+
+Call ``aclose_all()`` / ``close_all()`` on shutdown.
+"""
+
+import asyncio
+import importlib.util
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import metrics
+
+logger = get_logger("http_clients")
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_async_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+_sync_clients: Dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+# ── Connection-reuse instrumentation ─────────────────────────────────
+
+def _count(host: str, event: str):
+    metrics.incr("http_connections", f"{host}:{event}")
+
+
+def _on_trace_event(host: str, event_name: str):
+    if event_name == "connection.connect_tcp.complete":
+        _count(host, "new_connections")
+    elif event_name == "connection.start_tls.complete":
+        _count(host, "tls_handshakes")
+
+
+def _sync_request_hook(request: httpx.Request):
+    host = request.url.host
+    _count(host, "requests")
+
+    def trace(event_name, info):
+        _on_trace_event(host, event_name)
+
+    request.extensions["trace"] = trace
+
+
+async def _async_request_hook(request: httpx.Request):
+    host = request.url.host
+    _count(host, "requests")
+
+    async def trace(event_name, info):
+        _on_trace_event(host, event_name)
+
+    request.extensions["trace"] = trace
+
+
+# ── Client construction ──────────────────────────────────────────────
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SEC,
+    )
+
+
+def _timeout(timeout: Optional[float]) -> httpx.Timeout:
+    return httpx.Timeout(
+        timeout or settings.HTTP_TIMEOUT_SEC,
+        connect=settings.HTTP_CONNECT_TIMEOUT_SEC,
+    )
+
+
+def _http2() -> bool:
+    if settings.HTTP2_ENABLED and not _HTTP2_AVAILABLE:
+        logger.debug("HTTP2_ENABLED but 'h2' is not installed — using HTTP/1.1")
+    return settings.HTTP2_ENABLED and _HTTP2_AVAILABLE
+
+
+def get_async_client(name: str, timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """Return the shared async client for ``name`` on the running loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        entry = _async_clients.get(name)
+        if entry and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+
+        client = httpx.AsyncClient(
+            limits=_limits(),
+            timeout=_timeout(timeout),
+            http2=_http2(),
+            event_hooks={"request": [_async_request_hook]},
+        )
+        _async_clients[name] = (loop, client)
+        logger.info(f"HTTP client '{name}' initialised (async, http2={_http2()})")
+        return client
+
+
+def get_sync_client(name: str, timeout: Optional[float] = None) -> httpx.Client:
+    """Return the shared, thread-safe sync client for ``name``."""
+    with _lock:
+        client = _sync_clients.get(name)
+        if client is not None and not client.is_closed:
+            return client
+
+        client = httpx.Client(
+            limits=_limits(),
+            timeout=_timeout(timeout),
+            http2=_http2(),
+            event_hooks={"request": [_sync_request_hook]},
+        )
+        _sync_clients[name] = client
+        logger.info(f"HTTP client '{name}' initialised (sync, http2={_http2()})")
+        return client
+
+
+# ── Lifecycle ────────────────────────────────────────────────────────
+
+async def aclose_all():
+    """Close async clients owned by the running loop (call on shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        owned = {n: c for n, (lp, c) in _async_clients.items() if lp is loop}
+        for name in owned:
+            del _async_clients[name]
+    for client in owned.values():
+        await client.aclose()
+
+
+def close_all():
+    """Close every sync client (call on shutdown)."""
+    with _lock:
+        clients = list(_sync_clients.values())
+        _sync_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """Per-host request / new-connection / TLS-handshake counts."""
+    stats: Dict[str, Dict[str, int]] = {}
+    for key, value in metrics.get_counters("http_connections").items():
+        host, _, event = key.rpartition(":")
+        stats.setdefault(host, {})[event] = value
+    for host_stats in stats.values():
+        host_stats["reused"] = host_stats.get("requests", 0) - host_stats.get("new_connections", 0)
+    return stats
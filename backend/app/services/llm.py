@@ -5,17 +5,40 @@ All provider-specific logic now lives in ``llm_providers/``.
 This module provides:
   • ``generate_explanation_async(parsed_data, retrieval_context)``
   • ``generate_explanation(parsed_data)``
+  • ``generate_rule_based_explanation(parsed_data)`` — fast path, no LLM
 
-Retry + fallback logic is kept here (business logic, not provider detail).
+Retry, provider failover, map-reduce for long reports + fallback logic
+is kept here (business logic, not provider detail).
 """
 
 import asyncio
+import hashlib
+import json
+import time
 from typing import Optional, List
 
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.services.llm_providers import get_provider
+from app.services import llm_usage, metrics
+from app.services.llm_providers import LLMProvider, get_provider, get_provider_chain
+from app.services.llm_providers import routing
+from app.services.llm_providers.circuit_breaker import get_breaker
+from app.services.llm_providers.errors import (
+    ERROR_LENGTH,
+    LLMOutputTruncatedError,
+    LLMRateLimitError,
+    classify_error,
+    is_transient,
+)
+from app.services.llm_providers.prompt_budget import context_window
+from app.services.llm_providers.prompts import PROMPT_VERSION
 from app.services.catalog import TEST_CATALOG, MEDICINE_CATALOG
+from app.services.map_reduce import (
+    merge_results,
+    remainder_parsed,
+    should_map_reduce,
+    split_parsed,
+)
 from app.services.result_sanitizer import sanitize_result
 
 logger = get_logger("llm")
@@ -27,7 +50,10 @@ async def generate_explanation_async(
     parsed_data: dict,
     retrieval_context: Optional[List[str]] = None,
 ) -> dict:
-    """Generate medical explanation with retry + fallback.
+    """Generate medical explanation with failover, retry + fallback.
+
+    Long reports (see ``map_reduce.should_map_reduce``) are split into
+    page/section parts that are analysed concurrently and merged.
 
     This is the ONLY public entry point.  The sync wrapper
     ``generate_explanation()`` below calls this via ``asyncio.run()``.
@@ -39,25 +65,312 @@ async def generate_explanation_async(
     retrieval_context : list[str], optional
         RAG chunks retrieved from the vector store.
     """
-    provider = get_provider()
+    if should_map_reduce(parsed_data):
+        return await _generate_map_reduce(parsed_data, retrieval_context)
+    return await _generate_single(parsed_data, retrieval_context)
+
+
+async def _generate_single(
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]] = None,
+    split_depth: int = 0,
+) -> dict:
+    """One explanation call with failover across the provider chain.
+
+    Failures are classified (see ``llm_providers.errors``): truncated
+    output is retried at once with a larger ``max_tokens``; only
+    transient failures (rate limit, transport) are re-sent as-is after a
+    backoff.  If every provider still truncates, the document is split
+    into sections that are analysed separately and merged.
+    """
+    chain = [(name, get_provider(name)) for name in get_provider_chain()]
+    truncated = False
 
     for attempt in range(1, settings.LLM_RETRY_COUNT + 1):
-        try:
+        last_error: Optional[Exception] = None
+        transient = False
+
+        # Walk the failover chain; providers with an open circuit are
+        # skipped immediately so an upstream incident costs no timeouts.
+        for name, provider in chain:
+            breaker = get_breaker(name)
+            if not breaker.allow_request():
+                logger.info(f"Skipping provider {name}: circuit {breaker.state}")
+                continue
+
             logger.info(
                 f"LLM attempt {attempt}/{settings.LLM_RETRY_COUNT} "
-                f"(provider={settings.LLM_PROVIDER})"
+                f"(provider={name})"
             )
-            result = await provider.generate(parsed_data, retrieval_context)
-            return result
-        except Exception as e:
-            logger.warning(f"LLM attempt {attempt} failed: {e}")
-            if attempt < settings.LLM_RETRY_COUNT:
-                await asyncio.sleep(
-                    min(settings.LLM_RETRY_BACKOFF_SEC * attempt, 8)
-                )
-            else:
-                logger.error("All LLM attempts failed. Using fallback.")
-                return _fallback_explanation(parsed_data)
+            try:
+                return await _call_growing_budget(name, provider, parsed_data, retrieval_context)
+            except Exception as e:
+                kind = classify_error(e)
+                metrics.incr("llm_errors", kind)
+                logger.warning(f"LLM attempt {attempt} failed on {name} ({kind}): {e}")
+                last_error = e
+                transient = transient or is_transient(e)
+                truncated = truncated or kind == ERROR_LENGTH
+
+        if last_error is None:
+            logger.error("Every LLM provider circuit is open. Using fallback.")
+            return _fallback_explanation(parsed_data)
+
+        if not transient:
+            # Same prompt at temperature 0 → same failure; don't re-send.
+            break
+
+        if attempt < settings.LLM_RETRY_COUNT:
+            await asyncio.sleep(_retry_delay(last_error, attempt))
+
+    if truncated and split_depth < settings.LLM_TRUNCATION_SPLIT_DEPTH:
+        parts = split_parsed(parsed_data, parts=2)
+        if len(parts) > 1:
+            logger.info(f"Output still truncated — splitting into {len(parts)} sections")
+            metrics.incr("llm_errors", "length_split")
+            results = await asyncio.gather(
+                *(_generate_single(part, retrieval_context, split_depth + 1) for part in parts)
+            )
+            return sanitize_result(merge_results(list(results)))
+
+    logger.error("All LLM attempts failed. Using fallback.")
+    return _fallback_explanation(parsed_data)
+
+
+async def _generate_map_reduce(
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]],
+) -> dict:
+    """Analyse each page/section part concurrently, then merge.
+
+    Every part goes through the normal failover path (the shared limiter
+    bounds how many run at once); a part that fails entirely contributes
+    its rule-based fallback rather than failing the whole report.
+    """
+    parts = split_parsed(parsed_data)
+    logger.info(f"Long report: map-reduce over {len(parts)} parts")
+    metrics.incr("llm_map_reduce", "jobs")
+    metrics.incr("llm_map_reduce", "parts", len(parts))
+
+    results = await asyncio.gather(
+        *(_generate_single(part, retrieval_context) for part in parts)
+    )
+    return sanitize_result(merge_results(list(results)))
+
+
+def _grown_budget(error: LLMOutputTruncatedError) -> Optional[int]:
+    """Next ``max_tokens`` to try after a truncated response, or None.
+
+    Doubles the budget up to ``LLM_MAX_TOKENS_CEILING`` and half the
+    model's context window (the prompt needs the rest).
+    """
+    if not error.max_tokens:
+        return None
+    ceiling = min(settings.LLM_MAX_TOKENS_CEILING, context_window(error.model) // 2)
+    grown = min(error.max_tokens * 2, ceiling)
+    return grown if grown > error.max_tokens else None
+
+
+async def _call_growing_budget(
+    name: str,
+    provider: LLMProvider,
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]],
+) -> dict:
+    """Call ``provider``, doubling ``max_tokens`` while the output is truncated.
+
+    The caller must already have been admitted by ``allow_request()``.
+    """
+    max_tokens: Optional[int] = None
+    while True:
+        try:
+            if settings.LLM_HEDGE_ENABLED:
+                return await _call_hedged(name, provider, parsed_data, retrieval_context, max_tokens)
+            return await _call_provider(name, provider, parsed_data, retrieval_context, max_tokens)
+        except LLMOutputTruncatedError as e:
+            salvaged = await _complete_partial(name, provider, parsed_data, retrieval_context, e)
+            if salvaged is not None:
+                return salvaged
+            grown = _grown_budget(e)
+            if grown is None or not get_breaker(name).allow_request():
+                raise
+            logger.info(f"{name} output truncated at {e.max_tokens} tokens — retrying with {grown}")
+            metrics.incr("llm_errors", "length_regrow")
+            max_tokens = grown
+
+
+async def _complete_partial(
+    name: str,
+    provider: LLMProvider,
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]],
+    error: LLMOutputTruncatedError,
+) -> Optional[dict]:
+    """Keep what a truncated response finished; ask only for the rest.
+
+    Returns None (→ retry with a larger budget) when nothing useful was
+    salvaged or the partial result explains none of the parsed entities.
+    """
+    if not settings.LLM_SALVAGE_TRUNCATED_OUTPUT or not error.partial:
+        return None
+
+    partial = sanitize_result(dict(error.partial))
+    partial["_llm_provider_used"] = name
+    if error.model:
+        partial["_llm_model_used"] = error.model
+    remainder = remainder_parsed(parsed_data, partial)
+    if remainder is None:
+        logger.info(f"{name}: truncated output already explains every parsed item — keeping it")
+        metrics.incr("llm_errors", "length_salvaged")
+        return sanitize_result(merge_results([partial]))
+
+    missing = len(remainder["tests"]) + len(remainder["medicines"])
+    total = len(parsed_data.get("tests") or []) + len(parsed_data.get("medicines") or [])
+    if missing >= total or not get_breaker(name).allow_request():
+        return None
+
+    logger.info(f"{name}: salvaged {total - missing}/{total} items from truncated output — requesting the rest")
+    metrics.incr("llm_errors", "length_salvaged")
+    rest = await _call_growing_budget(name, provider, remainder, retrieval_context)
+    return sanitize_result(merge_results([partial, rest]))
+
+
+async def _call_provider(
+    name: str,
+    provider: LLMProvider,
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]],
+    max_tokens: Optional[int] = None,
+) -> dict:
+    """Single provider call with circuit-breaker and routing bookkeeping.
+
+    The caller must already have been admitted by ``allow_request()``.
+    Truncated output counts as a healthy call for the breaker — the
+    provider answered; the budget was too small.
+    """
+    breaker = get_breaker(name)
+    routing.begin_call()
+    llm_usage.begin_call()
+    kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+    started = time.monotonic()
+    try:
+        result = await provider.generate(parsed_data, retrieval_context, **kwargs)
+    except asyncio.CancelledError:
+        breaker.release()
+        llm_usage.finish_call(name, False, time.monotonic() - started, "cancelled")
+        raise
+    except LLMOutputTruncatedError as e:
+        breaker.record_success(time.monotonic() - started)
+        routing.record_outcome(False, time.monotonic() - started)
+        llm_usage.finish_call(name, False, time.monotonic() - started, classify_error(e))
+        raise
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - started)
+        routing.record_outcome(False, time.monotonic() - started)
+        llm_usage.finish_call(name, False, time.monotonic() - started, classify_error(e))
+        raise
+
+    breaker.record_success(time.monotonic() - started)
+    routing.record_outcome(True, time.monotonic() - started, parsed_data, result)
+    llm_usage.finish_call(name, True, time.monotonic() - started)
+    result["_llm_provider_used"] = name
+    return result
+
+
+def _hedge_delay(name: str) -> Optional[float]:
+    """Seconds to wait before hedging, or None if there's too little data."""
+    breaker = get_breaker(name)
+    if len(breaker.latencies()) < settings.LLM_HEDGE_MIN_SAMPLES:
+        return None
+    delay = breaker.latency_percentile(settings.LLM_HEDGE_PERCENTILE)
+    return max(delay, settings.LLM_HEDGE_MIN_DELAY_SEC)
+
+
+async def _call_hedged(
+    name: str,
+    provider: LLMProvider,
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]],
+    max_tokens: Optional[int] = None,
+) -> dict:
+    """Call ``provider``; if it is slower than usual, race a second request.
+
+    The hedge goes to LLM_HEDGE_PROVIDER (or the same provider).  The first
+    successful response wins and the other request is cancelled.  Counters
+    live in the ``llm_hedge`` metric group so the extra spend is visible.
+    """
+    delay = _hedge_delay(name)
+    if delay is None:
+        return await _call_provider(name, provider, parsed_data, retrieval_context, max_tokens)
+
+    primary = asyncio.create_task(
+        _call_provider(name, provider, parsed_data, retrieval_context, max_tokens)
+    )
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        hedge_name = (settings.LLM_HEDGE_PROVIDER or name).lower().strip()
+        if done or not get_breaker(hedge_name).allow_request():
+            return await primary
+
+        logger.info(f"Hedging LLM call on {name} after {delay:.1f}s → {hedge_name}")
+        metrics.incr("llm_hedge", "launched")
+        hedge = asyncio.create_task(
+            _call_provider(
+                hedge_name, get_provider(hedge_name), parsed_data, retrieval_context, max_tokens
+            )
+        )
+        tasks.append(hedge)
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    metrics.incr("llm_hedge", "hedge_won" if task is hedge else "primary_won")
+                    return task.result()
+
+        metrics.incr("llm_hedge", "both_failed")
+        raise primary.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt.
+
+    Rate-limit errors wait for the advertised Retry-After (the limiter has
+    already blocked the model for every worker); others back off linearly.
+    """
+    if isinstance(error, LLMRateLimitError) and error.retry_after:
+        return min(error.retry_after, settings.LLM_RATE_LIMIT_MAX_WAIT_SEC)
+    return min(settings.LLM_RETRY_BACKOFF_SEC * attempt, 8)
+
+
+def llm_request_key(
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]] = None,
+) -> str:
+    """Stable hash of everything that determines the LLM prompt/output.
+
+    Used to single-flight identical concurrent requests.
+    """
+    payload = {
+        "parsed_data": parsed_data,
+        "retrieval_context": retrieval_context or [],
+        "chain": get_provider_chain(),
+        "models": [routing.models_for(name) for name in get_provider_chain()] + [settings.LLAMA_MODEL],
+        "prompt_version": PROMPT_VERSION,
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def is_llm_result(result: dict) -> bool:
+    """True if every part of ``result`` came from an LLM (no rule-based fallback)."""
+    return bool(result.get("_llm_provider_used")) and not result.get("_fallback_parts")
 
 
 def generate_explanation(parsed_data: dict) -> dict:
@@ -125,6 +438,60 @@ def _fallback_explanation(parsed_data: dict) -> dict:
     return sanitize_result(result)
 
 
+# ── Deterministic fast path (rule-based, no LLM) ─────────────────────
+
+_URGENCY_BY_SEVERITY = {"critical": "urgent", "severe": "soon", "moderate": "soon"}
+
+
+def generate_rule_based_explanation(parsed_data: dict) -> dict:
+    """Catalog-driven explanation for documents the parser fully covers.
+
+    Builds on ``_fallback_explanation`` and adds what the LLM would
+    otherwise contribute: document type, urgency and red flags from the
+    severity of abnormal values, and a summary naming those values.
+    Confidence stays at the fallback's level — coverage measures how much
+    of the document was parsed, not how good the explanation is.
+    """
+    result = _fallback_explanation(parsed_data)
+    abnormal = result["abnormal_values"]
+    tests = parsed_data.get("tests", [])
+    medicines = parsed_data.get("medicines", [])
+
+    result["input_summary"]["document_type"] = (
+        "lab_report" if tests else "prescription" if medicines else "medical_report"
+    )
+
+    severities = {a.get("severity") for a in abnormal}
+    result["urgency_level"] = next(
+        (_URGENCY_BY_SEVERITY[s] for s in ("critical", "severe", "moderate") if s in severities),
+        "routine",
+    )
+    result["red_flags"] = [
+        f"{a['test_name']} ({a['value']}) is far outside the normal range — "
+        "contact your doctor promptly."
+        for a in abnormal if a.get("severity") == "critical"
+    ]
+
+    if abnormal:
+        names = ", ".join(a["test_name"] for a in abnormal)
+        result["overall_summary"] = (
+            f"{len(abnormal)} of {len(abnormal) + len(result['normal_values'])} "
+            f"test value(s) are outside the normal range: {names}. "
+            "Discuss these with your doctor."
+        )
+    elif tests:
+        result["overall_summary"] = (
+            f"All {len(result['normal_values'])} detected test values are within normal ranges."
+        )
+    elif medicines:
+        result["overall_summary"] = (
+            f"This prescription lists {len(result['medicines'])} medicine(s); "
+            "each is explained below."
+        )
+
+    return sanitize_result(result)
+
+
 # ── Catalog enrichment helpers ────────────────────────────────────────
 
 def _safe_float(x) -> Optional[float]:
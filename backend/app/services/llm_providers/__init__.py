@@ -1,6 +1,6 @@
 """LLM provider abstraction — swap backends without touching business logic."""
 
 from app.services.llm_providers.base import LLMProvider
-from app.services.llm_providers.factory import get_provider
+from app.services.llm_providers.factory import get_provider, get_provider_chain
 
-__all__ = ["LLMProvider", "get_provider"]
+__all__ = ["LLMProvider", "get_provider", "get_provider_chain"]
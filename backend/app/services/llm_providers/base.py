@@ -9,15 +9,24 @@ from typing import Optional
 
 class LLMProvider(ABC):
 
+    # Short identifier used for rate-limit keys and logging.
+    name: str = "base"
+
     @abstractmethod
     async def generate(
         self,
         parsed_data: dict,
         retrieval_context: Optional[list] = None,
+        max_tokens: Optional[int] = None,
     ) -> dict:
         """
         Analyse parsed medical data and return a dict matching ResultResponse schema.
-        Implementors must also set the internal ``_llm_model_used`` key.
+        Implementors must also set the internal ``_llm_model_used`` and
+        ``_prompt_stats`` keys.
+
+        ``max_tokens`` overrides the model's usual completion budget (used
+        when retrying a truncated response).  Failures should be raised as
+        the typed errors in ``errors.py``.
         """
         ...
 
@@ -0,0 +1,258 @@
+"""
+Per-provider circuit breakers for the LLM failover chain.
+
+Each provider keeps a rolling window of recent calls.  A call is "bad"
+when it raised or took longer than ``LLM_BREAKER_SLOW_CALL_SEC``; once
+the bad-call rate over at least ``LLM_BREAKER_MIN_CALLS`` calls reaches
+``LLM_BREAKER_FAILURE_RATE`` the circuit opens and the provider is
+skipped immediately (no timeout, no retry) for ``LLM_BREAKER_OPEN_SEC``.
+After that a limited number of half-open probes are let through: a good
+probe closes the circuit, a bad one re-opens it.
+
+Breakers live in-process (each worker routes on what it observes) and
+publish a snapshot to Redis on every state change so the API can expose
+them via ``GET /admin/llm/breakers``.  The snapshot is taken under the
+breaker's lock but handed over only after it is released, and a
+background thread does the Redis write — breakers are consulted on the
+event loop for every LLM call and must not wait on Redis.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.redis_client import get_redis_client
+
+logger = get_logger("llm.breaker")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+BREAKERS_REDIS_KEY = "llm:breakers"
+
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CircuitBreaker:
+    """Rolling-window breaker tracking error rate and latency."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = STATE_CLOSED
+        self.opened_at: Optional[float] = None
+        self._calls: deque = deque(maxlen=max(settings.LLM_BREAKER_WINDOW, 1))
+        self._probes_in_flight = 0
+        self._unpublished: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    # ── Routing ──────────────────────────────────────────────────────
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be sent to this provider now."""
+        with self._lock:
+            allowed = self._allow()
+        self._publish_pending()
+        return allowed
+
+    def _allow(self) -> bool:
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self.opened_at < settings.LLM_BREAKER_OPEN_SEC:
+                return False
+            self._transition(STATE_HALF_OPEN)
+
+        if self.state == STATE_HALF_OPEN:
+            if self._probes_in_flight >= settings.LLM_BREAKER_HALF_OPEN_PROBES:
+                return False
+            self._probes_in_flight += 1
+
+        return True
+
+    # ── Outcomes ─────────────────────────────────────────────────────
+
+    def record_success(self, latency_sec: float):
+        slow = latency_sec > settings.LLM_BREAKER_SLOW_CALL_SEC
+        self._record(ok=True, slow=slow, latency_sec=latency_sec)
+
+    def record_failure(self, latency_sec: float):
+        self._record(ok=False, slow=False, latency_sec=latency_sec)
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was cancelled."""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _record(self, ok: bool, slow: bool, latency_sec: float):
+        with self._lock:
+            self._calls.append((ok, slow, latency_sec))
+            bad = (not ok) or slow
+
+            if self.state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if bad:
+                    self._transition(STATE_OPEN)
+                else:
+                    self._calls.clear()
+                    self._calls.append((ok, slow, latency_sec))
+                    self._transition(STATE_CLOSED)
+            elif self.state == STATE_CLOSED and len(self._calls) >= settings.LLM_BREAKER_MIN_CALLS:
+                if self._bad_rate() >= settings.LLM_BREAKER_FAILURE_RATE:
+                    self._transition(STATE_OPEN)
+        self._publish_pending()
+
+    # ── Stats ────────────────────────────────────────────────────────
+
+    def _bad_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        bad = sum(1 for ok, slow, _ in self._calls if not ok or slow)
+        return bad / len(self._calls)
+
+    def latencies(self, successful_only: bool = True) -> List[float]:
+        """Latencies in the current window (oldest first)."""
+        with self._lock:
+            return [lat for ok, _, lat in self._calls if ok or not successful_only]
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Percentile (0–1) of successful call latency in the window."""
+        return _percentile(sorted(self.latencies()), pct)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        calls = list(self._calls)
+        latencies = sorted(lat for ok, _, lat in calls if ok)
+        return {
+            "provider": self.name,
+            "state": self.state,
+            "worker": _WORKER_ID,
+            "window_calls": len(calls),
+            "error_rate": round(sum(1 for ok, _, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+            "slow_rate": round(sum(1 for _, slow, _ in calls if slow) / len(calls), 3) if calls else 0.0,
+            "p50_latency_sec": _percentile(latencies, 0.50),
+            "p95_latency_sec": _percentile(latencies, 0.95),
+            "opened_at": self.opened_at,
+            "updated_at": time.time(),
+        }
+
+    def _transition(self, new_state: str):
+        if new_state == self.state:
+            return
+        logger.warning(f"Circuit {self.name}: {self.state} → {new_state}")
+        self.state = new_state
+        if new_state == STATE_OPEN:
+            self.opened_at = time.monotonic()
+            self._probes_in_flight = 0
+        elif new_state == STATE_CLOSED:
+            self.opened_at = None
+        # Called under self._lock; published once the lock is released.
+        self._unpublished = self._snapshot()
+
+    def _publish_pending(self):
+        with self._lock:
+            snapshot, self._unpublished = self._unpublished, None
+        if snapshot is not None:
+            _publish(snapshot)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(int(round(pct * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[idx], 3)
+
+
+# ── Publishing ───────────────────────────────────────────────────────
+
+# Latest unpublished snapshot per provider, drained by a daemon thread.
+_outbox: Dict[str, dict] = {}
+_outbox_ready = threading.Condition()
+_publisher_pid: Optional[int] = None
+
+
+def _publish(snapshot: dict):
+    """Queue a breaker snapshot for the admin endpoint; never blocks on Redis."""
+    _ensure_publisher()
+    with _outbox_ready:
+        _outbox[snapshot["provider"]] = snapshot
+        _outbox_ready.notify()
+
+
+def _write_snapshots(snapshots: List[dict]):
+    """Best-effort write of breaker snapshots in one pipeline."""
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for snapshot in snapshots:
+            pipe.hset(BREAKERS_REDIS_KEY, f"{snapshot['provider']}@{snapshot['worker']}", json.dumps(snapshot))
+        pipe.expire(BREAKERS_REDIS_KEY, 86400)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Breaker publish failed: {e}")
+
+
+def _publisher():
+    while True:
+        with _outbox_ready:
+            while not _outbox:
+                _outbox_ready.wait()
+            snapshots = list(_outbox.values())
+            _outbox.clear()
+        _write_snapshots(snapshots)
+
+
+def _ensure_publisher():
+    global _publisher_pid
+    # A forked worker inherits the flag but not the thread.
+    if _publisher_pid == os.getpid():
+        return
+    with _outbox_ready:
+        if _publisher_pid == os.getpid():
+            return
+        threading.Thread(target=_publisher, name="breaker-publish", daemon=True).start()
+        _publisher_pid = os.getpid()
+
+
+# ── Registry ─────────────────────────────────────────────────────────
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider name."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> List[dict]:
+    """Snapshots of every breaker in this process."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
+
+
+def published_breaker_states() -> List[dict]:
+    """Snapshots published by every worker (read from Redis)."""
+    r = get_redis_client()
+    raw = r.hgetall(BREAKERS_REDIS_KEY) or {}
+    return sorted(
+        (json.loads(v) for v in raw.values()),
+        key=lambda s: (s.get("provider", ""), s.get("worker", "")),
+    )
+
+
+def reset_breakers():
+    """Drop all breaker state (useful in tests)."""
+    with _registry_lock:
+        _breakers.clear()
@@ -0,0 +1,108 @@
+"""
+Typed provider failures.
+
+Providers translate SDK/HTTP exceptions into these so the retry loop in
+``app.services.llm`` can react to *why* a call failed instead of blindly
+re-sending the same request:
+
+  • rate_limit     — wait for Retry-After, then re-send;
+  • transport      — timeout / connection / 5xx: re-send after backoff;
+  • length         — output hit max_tokens: re-send with a larger budget,
+                     or split the document into sections;
+  • invalid_output — unparseable JSON / schema mismatch / empty output: at
+                     temperature 0 an identical re-send would fail the same
+                     way, so only the next provider in the chain is tried;
+  • request        — 4xx other than 408/409/429 (bad request, auth, unknown
+                     model): the provider rejects the request itself, so
+                     likewise only the next provider is tried.
+
+Anything unclassified is treated as transient.
+"""
+
+from typing import Optional
+
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_TRANSPORT = "transport"
+ERROR_LENGTH = "length"
+ERROR_INVALID_OUTPUT = "invalid_output"
+ERROR_REQUEST = "request"
+ERROR_UNKNOWN = "unknown"
+
+TRANSIENT_ERRORS = {ERROR_RATE_LIMIT, ERROR_TRANSPORT, ERROR_UNKNOWN}
+
+
+class LLMProviderError(RuntimeError):
+    """Base class for classified LLM provider failures."""
+
+    kind = ERROR_UNKNOWN
+
+
+class LLMRateLimitError(LLMProviderError):
+    """Upstream (or our own limiter) refused the call — retry after a delay."""
+
+    kind = ERROR_RATE_LIMIT
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTransportError(LLMProviderError):
+    """Timeout, connection failure or upstream 5xx — safe to re-send."""
+
+    kind = ERROR_TRANSPORT
+
+
+class LLMOutputTruncatedError(LLMProviderError):
+    """The completion stopped at ``max_tokens`` (finish_reason=length).
+
+    ``partial`` holds whatever could be salvaged from the cut-off output
+    (see ``json_repair``), or None.
+    """
+
+    kind = ERROR_LENGTH
+
+    def __init__(
+        self,
+        message: str,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        partial: Optional[dict] = None,
+    ):
+        super().__init__(message)
+        self.max_tokens = max_tokens
+        self.model = model
+        self.partial = partial
+
+
+class LLMInvalidOutputError(LLMProviderError):
+    """The model answered, but not with valid JSON matching the schema."""
+
+    kind = ERROR_INVALID_OUTPUT
+
+
+class LLMRequestError(LLMProviderError):
+    """The provider rejected the request (4xx) — re-sending it won't help."""
+
+    kind = ERROR_REQUEST
+
+
+# 4xx statuses that may succeed on a re-send (timeout, conflict, rate limit).
+_RETRYABLE_4XX = {408, 409, 429}
+
+
+def error_for_status(status_code: int, message: str) -> LLMProviderError:
+    """Classified error for an upstream HTTP error response."""
+    if 400 <= status_code < 500 and status_code not in _RETRYABLE_4XX:
+        return LLMRequestError(message)
+    return LLMTransportError(message)
+
+
+def classify_error(error: BaseException) -> str:
+    """Failure kind for ``error`` (one of the ``ERROR_*`` constants)."""
+    return getattr(error, "kind", ERROR_UNKNOWN) if isinstance(error, LLMProviderError) else ERROR_UNKNOWN
+
+
+def is_transient(error: BaseException) -> bool:
+    """True if re-sending the identical request might succeed."""
+    return classify_error(error) in TRANSIENT_ERRORS
@@ -1,9 +1,12 @@
 """
-Provider factory — returns the correct LLMProvider singleton.
-LLM_PROVIDER options: groq | openai | llama | ollama
+Provider factory — returns LLMProvider singletons.
+LLM_PROVIDER options: groq | openai | llama | ollama | replay
+
+``LLM_PROVIDER_CHAIN`` (e.g. ``["groq","openai","llama"]``) defines the failover
+order used by ``app.services.llm``; it defaults to just ``LLM_PROVIDER``.
 """
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 from app.core.config import settings
 from app.core.logging import get_logger
@@ -11,40 +14,50 @@ from app.services.llm_providers.base import LLMProvider
 
 logger = get_logger("llm.factory")
 
-_provider: Optional[LLMProvider] = None
+_providers: Dict[str, LLMProvider] = {}
 
 
-def get_provider() -> LLMProvider:
-    """Return a lazily-initialised provider singleton."""
-    global _provider
-    if _provider is not None:
-        return _provider
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """Return a lazily-initialised provider singleton (default: LLM_PROVIDER)."""
+    name = (name or settings.LLM_PROVIDER).lower().strip()
+    if name in _providers:
+        return _providers[name]
 
-    name = settings.LLM_PROVIDER.lower().strip()
     logger.info(f"Initialising LLM provider: {name}")
 
     if name == "groq":
         from app.services.llm_providers.groq_provider import GroqProvider
-        _provider = GroqProvider()
+        provider = GroqProvider()
 
     elif name == "openai":
         from app.services.llm_providers.openai_provider import OpenAIProvider
-        _provider = OpenAIProvider()
+        provider = OpenAIProvider()
 
     elif name in ("llama", "ollama"):
         from app.services.llm_providers.llama_provider import LlamaProvider
-        _provider = LlamaProvider()
+        provider = LlamaProvider()
+
+    elif name == "replay":
+        from app.services.llm_providers.replay_provider import ReplayProvider
+        provider = ReplayProvider()
 
     else:
         raise ValueError(
             f"Unknown LLM_PROVIDER={name!r}. "
-            f"Supported: groq, openai, llama, ollama"
+            f"Supported: groq, openai, llama, ollama, replay"
         )
 
-    return _provider
+    _providers[name] = provider
+    return provider
+
+
+def get_provider_chain() -> List[str]:
+    """Ordered provider names to try (primary first, duplicates removed)."""
+    chain = settings.LLM_PROVIDER_CHAIN or [settings.LLM_PROVIDER]
+    names = [n.lower().strip() for n in chain if n and n.strip()]
+    return list(dict.fromkeys(names))
 
 
 def reset_provider():
-    """Reset the singleton (useful in tests)."""
-    global _provider
-    _provider = None
+    """Reset the singletons (useful in tests)."""
+    _providers.clear()
@@ -0,0 +1,141 @@
+"""
+Single-pass tolerant JSON scanner for LLM output.
+
+``scan_json(text)`` walks the text once from the first ``{`` tracking
+strings, escapes and the stack of open objects/arrays:
+
+  • if the object closes, the exact JSON span is parsed normally;
+  • if the text ends first (the model hit ``max_tokens``), the output is
+    cut back to the last point where a value was complete and every open
+    string / array / object is closed, so everything the model finished
+    is kept.
+
+Array elements are all-or-nothing: a test entry cut off half-way is
+dropped rather than kept with missing fields, so salvaged lists only hold
+fully generated elements (e.g. 14 of 16 tests).  A string cut off as an
+object field value (e.g. ``overall_summary``) is closed and kept.
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Container states
+_KEY = "key"        # object: expecting a key (or the closing brace)
+_COLON = "colon"    # object: key read, expecting ':'
+_VALUE = "value"    # expecting a value
+_COMMA = "comma"    # value read, expecting ',' or the closer
+
+
+def _keeps_partial(types: List[str]) -> bool:
+    """True unless we are inside an object that is itself an array element.
+
+    Cutting back to such a point would keep a half-generated element.
+    """
+    seen_array = False
+    for t in types:
+        if t == "[":
+            seen_array = True
+        elif seen_array:
+            return False
+    return True
+
+
+def _close(prefix: str, types: List[str]) -> str:
+    return prefix.rstrip().rstrip(",") + "".join(_CLOSERS[t] for t in reversed(types))
+
+
+def _loads_object(text: str) -> Optional[dict]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def scan_json(text: str) -> Tuple[Optional[dict], bool]:
+    """Parse the first JSON object in ``text`` in one pass.
+
+    Returns ``(data, complete)``.  ``complete`` is False when the text
+    ended inside the object; ``data`` is then the salvaged prefix (or None
+    if nothing usable was complete).  ``data`` is None for a complete but
+    malformed object.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None, True
+
+    stack: List[list] = []          # [type, state]
+    safe: Optional[str] = None      # closed-off prefix at the last complete value
+    in_string = is_key = escape = False
+    i, n = start, len(text)
+
+    def value_done(end: int):
+        nonlocal safe
+        if stack:
+            stack[-1][1] = _COMMA
+            types = [t for t, _ in stack]
+            if _keeps_partial(types):
+                safe = _close(text[start:end], types)
+
+    while i < n:
+        ch = text[i]
+
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if is_key:
+                    stack[-1][1] = _COLON
+                else:
+                    value_done(i + 1)
+            i += 1
+            continue
+
+        if ch in " \t\r\n":
+            pass
+        elif ch == '"':
+            in_string = True
+            is_key = bool(stack) and stack[-1][0] == "{" and stack[-1][1] == _KEY
+        elif ch in "{[":
+            stack.append([ch, _KEY if ch == "{" else _VALUE])
+            types = [t for t, _ in stack]
+            if _keeps_partial(types):
+                safe = _close(text[start:i + 1], types)
+        elif ch in "}]":
+            stack.pop()
+            if not stack:
+                return _loads_object(text[start:i + 1]), True
+            value_done(i + 1)
+        elif ch == ":":
+            stack[-1][1] = _VALUE
+        elif ch == ",":
+            stack[-1][1] = _KEY if stack[-1][0] == "{" else _VALUE
+        else:
+            # Number / true / false / null: complete only if something follows.
+            j = i
+            while j < n and text[j] not in ",]} \t\r\n":
+                j += 1
+            if j == n:
+                break
+            value_done(j)
+            i = j
+            continue
+        i += 1
+
+    # Truncated.  A string cut off as an object field value is closed and kept.
+    if in_string and not is_key and stack and stack[-1][0] == "{":
+        types = [t for t, _ in stack]
+        if _keeps_partial(types):
+            body = text[start:n]
+            if escape:
+                body = body[:-1]
+            data = _loads_object(body + '"' + "".join(_CLOSERS[t] for t in reversed(types)))
+            if data is not None:
+                return data, False
+
+    return (_loads_object(safe) if safe else None), False
@@ -0,0 +1,257 @@
+"""
+Cross-worker LLM rate limiter + per-process concurrency governor.
+
+Every provider+model pair gets two Redis token buckets (requests/min and
+tokens/min) shared by all API/worker processes.  Buckets are allowed to
+go into debt: each call atomically *reserves* its cost and is told how
+long to sleep before its reservation matures.  Because reservations are
+handed out in arrival order, waiting callers are served FIFO instead of
+racing each other for freed capacity (and none of them is failed unless
+the wait would exceed ``LLM_RATE_LIMIT_MAX_WAIT_SEC``).
+
+A ``Retry-After`` from the upstream API blocks the pair for every worker
+until the advertised time has passed.
+
+Usage (inside a provider)::
+
+    async with llm_slot("groq", model, estimated_tokens) as slot:
+        response = await client.chat.completions.create(...)
+        await slot.settle(response.usage.total_tokens)
+
+Redis calls run on the default executor, never on the event loop.
+Redis failures fail open — a broken limiter must never stop the pipeline.
+"""
+
+import asyncio
+import email.utils
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Mapping, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.llm_providers.errors import LLMRateLimitError
+from app.services.redis_client import get_redis_client
+
+logger = get_logger("llm.limiter")
+
+# Reserve capacity in both buckets, or return how long the caller must
+# wait.  Server time (TIME) is used so worker clock skew doesn't matter.
+#
+# KEYS[1] rpm bucket, KEYS[2] tpm bucket, KEYS[3] blocked-until key
+# ARGV[1] rpm limit, ARGV[2] tpm limit, ARGV[3] token cost, ARGV[4] max wait
+#
+# Returns the wait in seconds (as a string — Lua numbers are truncated
+# to integers in replies).  A negative value means "would exceed max
+# wait"; nothing was reserved in that case.
+_RESERVE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local max_wait = tonumber(ARGV[4])
+
+local function peek(key, capacity, cost)
+    if capacity <= 0 then
+        return 0, nil
+    end
+    local rate = capacity / 60.0
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    local after = level - math.min(cost, capacity)
+    local wait = 0
+    if after < 0 then
+        wait = -after / rate
+    end
+    return wait, after
+end
+
+local rpm_wait, rpm_after = peek(KEYS[1], tonumber(ARGV[1]), 1)
+local tpm_wait, tpm_after = peek(KEYS[2], tonumber(ARGV[2]), tonumber(ARGV[3]))
+
+local wait = math.max(rpm_wait, tpm_wait)
+local blocked = tonumber(redis.call('GET', KEYS[3]) or '0')
+if blocked > now then
+    wait = math.max(wait, blocked - now)
+end
+
+if wait > max_wait then
+    return tostring(-wait)
+end
+
+if rpm_after then
+    redis.call('HSET', KEYS[1], 'level', rpm_after, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+end
+if tpm_after then
+    redis.call('HSET', KEYS[2], 'level', tpm_after, 'ts', now)
+    redis.call('EXPIRE', KEYS[2], 120)
+end
+return tostring(wait)
+"""
+
+# Push the blocked-until deadline forward (never backwards).
+# KEYS[1] blocked-until key, ARGV[1] seconds from now
+_BLOCK_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local until_ts = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if until_ts > current then
+    redis.call('SET', KEYS[1], tostring(until_ts), 'PX', math.ceil(tonumber(ARGV[1]) * 1000) + 1000)
+end
+return 1
+"""
+
+
+def _keys(provider: str, model: str) -> Tuple[str, str, str]:
+    base = f"llm_rl:{provider}:{model}"
+    return f"{base}:rpm", f"{base}:tpm", f"{base}:blocked"
+
+
+def get_limits(provider: str, model: str) -> Tuple[int, int]:
+    """Return (rpm, tpm) for a provider+model; 0 means unlimited.
+
+    ``LLM_RATE_LIMITS`` overrides per ``"provider:model"`` or bare model
+    id; otherwise the provider's entry in ``LLM_PROVIDER_RATE_LIMITS``
+    applies.  Providers without an entry are unlimited.
+    """
+    overrides = settings.LLM_RATE_LIMITS
+    entry = overrides.get(f"{provider}:{model}") or overrides.get(model) or {}
+    default = settings.LLM_PROVIDER_RATE_LIMITS.get(provider, {})
+    rpm = int(entry.get("rpm", default.get("rpm", 0)))
+    tpm = int(entry.get("tpm", default.get("tpm", 0)))
+    return rpm, tpm
+
+
+def reserve(provider: str, model: str, tokens: int) -> float:
+    """Reserve one request + ``tokens`` and return the seconds to wait.
+
+    Raises LLMRateLimitError when the wait would exceed the configured
+    maximum.  Returns 0 when limiting is disabled or Redis is unavailable.
+    """
+    rpm, tpm = get_limits(provider, model)
+    if not settings.LLM_RATE_LIMIT_ENABLED or (rpm <= 0 and tpm <= 0):
+        return 0.0
+
+    try:
+        r = get_redis_client()
+        wait = float(
+            r.eval(
+                _RESERVE_LUA, 3, *_keys(provider, model),
+                rpm, tpm, max(int(tokens), 0), settings.LLM_RATE_LIMIT_MAX_WAIT_SEC,
+            )
+        )
+    except Exception as e:
+        logger.warning(f"LLM limiter unavailable, proceeding unthrottled: {e}")
+        return 0.0
+
+    if wait < 0:
+        raise LLMRateLimitError(
+            f"Rate limit queue for {provider}:{model} exceeds "
+            f"{settings.LLM_RATE_LIMIT_MAX_WAIT_SEC}s",
+            retry_after=-wait,
+        )
+    return wait
+
+
+def refund(provider: str, model: str, tokens: int):
+    """Return unused reserved tokens to the TPM bucket."""
+    _, tpm = get_limits(provider, model)
+    if not settings.LLM_RATE_LIMIT_ENABLED or tpm <= 0 or tokens <= 0:
+        return
+    try:
+        r = get_redis_client()
+        _, tpm_key, _ = _keys(provider, model)
+        r.hincrbyfloat(tpm_key, "level", tokens)
+    except Exception as e:
+        logger.warning(f"LLM limiter refund failed: {e}")
+
+
+def _block(provider: str, model: str, seconds: float):
+    try:
+        r = get_redis_client()
+        _, _, blocked_key = _keys(provider, model)
+        r.eval(_BLOCK_LUA, 1, blocked_key, seconds)
+        logger.warning(f"{provider}:{model} blocked for {seconds:.1f}s (Retry-After)")
+    except Exception as e:
+        logger.warning(f"LLM limiter block failed: {e}")
+
+
+async def block_for(provider: str, model: str, seconds: Optional[float]):
+    """Honour an upstream ``Retry-After`` across all workers."""
+    if seconds is None or seconds <= 0:
+        return
+    await asyncio.get_running_loop().run_in_executor(None, _block, provider, model, seconds)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(when.timestamp() - time.time(), 0.0)
+    except Exception:
+        return None
+
+
+# ── Concurrency governor (per process, per event loop) ───────────────
+
+# Semaphores bind to the loop that first waits on them, so keep one set
+# per loop (the sync ``generate_explanation`` wrapper spins up new loops).
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore(provider: str, model: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    per_loop = _semaphores.setdefault(loop, {})
+    key = f"{provider}:{model}"
+    if key not in per_loop:
+        per_loop[key] = asyncio.Semaphore(max(settings.LLM_MAX_CONCURRENCY, 1))
+    return per_loop[key]
+
+
+class _Slot:
+    """Handle yielded by ``llm_slot`` so callers can report real usage."""
+
+    def __init__(self, provider: str, model: str, reserved: int):
+        self.provider = provider
+        self.model = model
+        self.reserved = reserved
+
+    async def settle(self, actual_tokens: Optional[int]):
+        """Refund the difference between reserved and actually used tokens."""
+        if actual_tokens is None:
+            return
+        unused = self.reserved - int(actual_tokens)
+        self.reserved = int(actual_tokens)
+        if unused > 0:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, refund, self.provider, self.model, unused)
+
+
+@asynccontextmanager
+async def llm_slot(provider: str, model: str, tokens: int, rate_limited: bool = True):
+    """Wait for a concurrency slot and rate-limit capacity, then yield.
+
+    Local backends pass ``rate_limited=False`` to get only the
+    concurrency cap.
+    """
+    async with _get_semaphore(provider, model):
+        wait = 0.0
+        if rate_limited:
+            loop = asyncio.get_running_loop()
+            wait = await loop.run_in_executor(None, reserve, provider, model, tokens)
+        if wait > 0:
+            logger.info(f"LLM limiter: waiting {wait:.2f}s for {provider}:{model}")
+            await asyncio.sleep(wait)
+        yield _Slot(provider, model, tokens if rate_limited else 0)
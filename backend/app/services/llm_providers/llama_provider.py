@@ -13,10 +13,19 @@ import httpx
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services import llm_usage
+from app.services.http_clients import get_async_client
 from app.services.llm_providers.base import LLMProvider
+from app.services.llm_providers.errors import (
+    LLMInvalidOutputError,
+    LLMTransportError,
+    error_for_status,
+)
+from app.services.llm_providers.limiter import llm_slot
 from app.services.llm_providers.prompts import (
-    build_messages,
+    assemble_messages,
     parse_or_repair_json,
+    truncated_output,
     validate_schema,
     SYSTEM_PROMPT,
 )
@@ -28,6 +37,8 @@ logger = get_logger("llm.llama")
 class LlamaProvider(LLMProvider):
     """LLM provider for local Llama models via Ollama or vLLM."""
 
+    name = "llama"
+
     def __init__(self):
         self._endpoint = settings.LLAMA_ENDPOINT
         self._model = settings.LLAMA_MODEL
@@ -41,22 +52,40 @@ class LlamaProvider(LLMProvider):
         self,
         parsed_data: dict,
         retrieval_context: Optional[list] = None,
+        max_tokens: Optional[int] = None,
     ) -> dict:
-        model, max_tokens = self.choose_model(parsed_data)
-        messages = build_messages(parsed_data, retrieval_context)
-
-        if self._is_vllm:
-            result = await self._call_vllm(model, max_tokens, messages)
-        else:
-            result = await self._call_ollama(model, max_tokens, messages)
+        model, routed_max_tokens = self.choose_model(parsed_data)
+        max_tokens = max_tokens or routed_max_tokens
+        messages, prompt_stats = assemble_messages(
+            parsed_data, retrieval_context, model=model, max_tokens=max_tokens
+        )
+
+        llm_usage.note_request(model, prompt_stats["prompt_version"])
+
+        # Local backend: no shared quota, but cap in-flight generations.
+        async with llm_slot(self.name, model, 0, rate_limited=False):
+            try:
+                if self._is_vllm:
+                    output_text, finish_reason = await self._call_vllm(model, max_tokens, messages)
+                else:
+                    output_text, finish_reason = await self._call_ollama(model, max_tokens, messages)
+            except httpx.HTTPStatusError as e:
+                raise error_for_status(e.response.status_code, f"Llama request failed: {e}") from e
+            except httpx.TransportError as e:
+                raise LLMTransportError(f"Llama request failed: {e}") from e
+
+        if finish_reason == "length":
+            raise truncated_output(output_text, max_tokens, model)
+        result = self._postprocess(output_text, model, max_tokens)
 
         result["_llm_model_used"] = model
+        result["_prompt_stats"] = prompt_stats
         return result
 
 
     async def _call_vllm(
         self, model: str, max_tokens: int, messages: list
-    ) -> dict:
+    ) -> tuple:
         payload = {
             "model": model,
             "messages": messages,
@@ -65,17 +94,19 @@ class LlamaProvider(LLMProvider):
             "stream": False,
         }
 
-        async with httpx.AsyncClient(timeout=settings.LLM_TIMEOUT_SEC) as client:
-            resp = await client.post(self._endpoint, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_async_client("llama", timeout=settings.LLM_TIMEOUT_SEC)
+        resp = await client.post(self._endpoint, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
 
-        output_text = data["choices"][0]["message"]["content"].strip()
-        return self._postprocess(output_text)
+        usage = data.get("usage") or {}
+        llm_usage.note_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        choice = data["choices"][0]
+        return choice["message"]["content"].strip(), choice.get("finish_reason")
 
     async def _call_ollama(
         self, model: str, max_tokens: int, messages: list
-    ) -> dict:
+    ) -> tuple:
         payload = {
             "model": model,
             "messages": messages,
@@ -92,22 +123,23 @@ class LlamaProvider(LLMProvider):
 
         logger.info(f"Calling Ollama model={model} at {url}")
 
-        async with httpx.AsyncClient(timeout=settings.LLM_TIMEOUT_SEC) as client:
-            resp = await client.post(url, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        client = get_async_client("llama", timeout=settings.LLM_TIMEOUT_SEC)
+        resp = await client.post(url, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
 
+        llm_usage.note_usage(data.get("prompt_eval_count"), data.get("eval_count"))
         output_text = data.get("message", {}).get("content", "").strip()
-        return self._postprocess(output_text)
+        return output_text, data.get("done_reason")
 
-    def _postprocess(self, text: str) -> dict:
+    def _postprocess(self, text: str, model: str, max_tokens: int) -> dict:
         """Parse and sanitize raw LLM output (handles markdown fences)."""
         if not text:
-            raise RuntimeError("Empty response from Llama")
+            raise LLMInvalidOutputError("Empty response from Llama")
 
         logger.info(f"Llama raw output length={len(text)}")
 
-        parsed_json = parse_or_repair_json(text)
+        parsed_json = parse_or_repair_json(text, max_tokens=max_tokens, model=model)
         parsed_json = sanitize_result(parsed_json)
         validate_schema(parsed_json)
 
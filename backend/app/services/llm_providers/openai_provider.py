@@ -5,28 +5,60 @@ Switch to this by setting LLM_PROVIDER=openai + OPENAI_API_KEY.
 
 from typing import Optional, List
 
-from openai import AsyncOpenAI
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services import llm_usage
+from app.services.http_clients import get_async_client
 from app.services.llm_providers.base import LLMProvider
+from app.services.llm_providers.errors import (
+    LLMInvalidOutputError,
+    LLMRateLimitError,
+    LLMTransportError,
+    error_for_status,
+)
+from app.services.llm_providers.limiter import (
+    block_for,
+    llm_slot,
+    parse_retry_after,
+)
 from app.services.llm_providers.prompts import (
-    build_messages,
+    assemble_messages,
+    estimate_message_tokens,
     parse_or_repair_json,
+    truncated_output,
     validate_schema,
 )
+from app.services.llm_providers.routing import route
 from app.services.result_sanitizer import sanitize_result
 
 logger = get_logger("llm.openai")
 
 _async_client: Optional[AsyncOpenAI] = None
+# The pooled HTTP client _async_client was built on.
+_http_client = None
 
 
 def _get_client() -> AsyncOpenAI:
-    """Lazily create and return the shared OpenAI async client."""
-    global _async_client
-    if _async_client is None:
-        _async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    """Return the shared OpenAI async client (rebuilt if the pooled
+    HTTP client was replaced, e.g. on a new event loop)."""
+    global _async_client, _http_client
+    http_client = get_async_client("openai", timeout=settings.LLM_TIMEOUT_SEC)
+    if _async_client is None or _http_client is not http_client:
+        _http_client = http_client
+        # 429s/retries are handled by llm.py + the shared limiter.
+        _async_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            max_retries=0,
+        )
         logger.info("OpenAI client initialised")
     return _async_client
 
@@ -34,56 +66,79 @@ def _get_client() -> AsyncOpenAI:
 class OpenAIProvider(LLMProvider):
     """LLM provider backed by the official OpenAI API."""
 
-    def choose_model(self, parsed_data: dict) -> tuple:
-        tests = parsed_data.get("tests", [])
-        medicines = parsed_data.get("medicines", [])
-        raw_text = parsed_data.get("raw_text", "")
-
-        has_tests = len(tests) > 0
-        long_text = len(raw_text) > 500
+    name = "openai"
 
-        if has_tests or long_text:
-            return settings.LLM_MODEL_HEAVY, settings.LLM_MAX_TOKENS_HEAVY
-        if medicines:
-            return settings.LLM_MODEL_LIGHT, settings.LLM_MAX_TOKENS_LIGHT
-        return settings.LLM_MODEL_HEAVY, settings.LLM_MAX_TOKENS_HEAVY
+    def choose_model(self, parsed_data: dict) -> tuple:
+        return route(self.name, parsed_data)
 
     async def generate(
         self,
         parsed_data: dict,
         retrieval_context: Optional[list] = None,
+        max_tokens: Optional[int] = None,
     ) -> dict:
         client = _get_client()
-        model, max_tokens = self.choose_model(parsed_data)
-        messages = build_messages(parsed_data, retrieval_context)
+        model, routed_max_tokens = self.choose_model(parsed_data)
+        max_tokens = max_tokens or routed_max_tokens
+        messages, prompt_stats = assemble_messages(
+            parsed_data, retrieval_context, model=model, max_tokens=max_tokens
+        )
 
         logger.info(f"Calling OpenAI model={model}, max_tokens={max_tokens}")
 
-        response = await client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=settings.LLM_TEMPERATURE,
-            timeout=settings.LLM_TIMEOUT_SEC,
-            response_format={"type": "json_object"},
-        )
+        # Reserve prompt + worst-case completion; refunded once usage is known.
+        est_tokens = estimate_message_tokens(messages) + max_tokens
+
+        llm_usage.note_request(model, prompt_stats["prompt_version"])
+        async with llm_slot(self.name, model, est_tokens) as slot:
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=settings.LLM_TEMPERATURE,
+                    timeout=settings.LLM_TIMEOUT_SEC,
+                    response_format={"type": "json_object"},
+                    # Routes requests sharing the system prompt to the same
+                    # cache shard; passed raw for older SDK versions.
+                    extra_body={"prompt_cache_key": f"lumen-{prompt_stats['prompt_version']}"},
+                )
+            except RateLimitError as e:
+                retry_after = parse_retry_after(e.response.headers)
+                await block_for(self.name, model, retry_after)
+                raise LLMRateLimitError(
+                    f"OpenAI rate limited: {e}", retry_after=retry_after
+                ) from e
+            except (APIConnectionError, InternalServerError) as e:
+                raise LLMTransportError(f"OpenAI request failed: {e}") from e
+            except APIStatusError as e:
+                raise error_for_status(e.status_code, f"OpenAI request failed: {e}") from e
+
+            usage = getattr(response, "usage", None)
+            await slot.settle(getattr(usage, "total_tokens", None))
+            llm_usage.note_openai_usage(usage)
+
+        choice = response.choices[0]
+        output_text = (choice.message.content or "").strip()
+        logger.info(f"OpenAI output length={len(output_text)}, finish_reason={choice.finish_reason}")
 
-        output_text = (response.choices[0].message.content or "").strip()
-        logger.info(f"OpenAI output length={len(output_text)}")
-
-        usage = getattr(response, "usage", None)
         if usage:
             logger.info(
                 f"OpenAI tokens — model={model}, prompt={usage.prompt_tokens}, "
+                f"cached={llm_usage.cached_tokens_of(usage)}, "
                 f"completion={usage.completion_tokens}, total={usage.total_tokens}"
             )
 
+        if choice.finish_reason == "length":
+            raise truncated_output(output_text, max_tokens, model)
+
         if not output_text:
-            raise RuntimeError("Empty response from OpenAI")
+            raise LLMInvalidOutputError("Empty response from OpenAI")
 
-        parsed_json = parse_or_repair_json(output_text)
+        parsed_json = parse_or_repair_json(output_text, max_tokens=max_tokens, model=model)
         parsed_json = sanitize_result(parsed_json)
         validate_schema(parsed_json)
 
         parsed_json["_llm_model_used"] = model
+        parsed_json["_prompt_stats"] = prompt_stats
         return parsed_json
@@ -0,0 +1,221 @@
+"""
+Token-budget helpers used by ``prompts.build_messages``.
+
+  • ``clean_ocr_text``     — drop boilerplate OCR lines (page numbers,
+                             contact/address lines, running page headers
+                             and footers, signature/disclaimer footers).
+  • ``compact_structured`` — parser output with duplicates removed and
+                             tests already visible in raw_text reduced to
+                             the hints the text doesn't carry (ranges).
+  • ``fit_chunks``         — keep RAG chunks in relevance order until the
+                             token allowance is used up.
+  • ``truncate_to_tokens`` — cut text on a line boundary to a budget.
+  • ``input_budget``       — per-model input token budget.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.llm_providers.tokens import estimate_tokens
+from app.services.ocr import PAGE_BREAK
+
+# Lines that carry no clinical information.
+_BOILERPLATE_PATTERNS = [
+    r"^page\s*\d+(\s*(of|/)\s*\d+)?$",
+    r"^-+\s*\d+\s*-+$",
+    r"^([-=_*~.#]\s*){4,}$",                            # rules / separators
+    r"(e-?mail|email id)\s*[:\-]",
+    r"[\w.+-]+@[\w-]+\.[\w.]+",                          # email address
+    r"(https?://|www\.)\S+",                             # URL
+    r"^(tel|telephone|phone|mob|mobile|fax|helpline|toll[\s-]?free|customer care)\b.*\d",
+    r"^(\+?91[\s-]?)?\d{10}$|^\+\d[\d\s-]{9,}$",               # bare phone number
+    r"\b(road|rd\.|street|nagar|marg|sector|floor|opp\.|near|lane|colony)\b.*\b\d{6}\b",
+    r"computer[\s-]generated|electronically (generated|signed|verified)",
+    r"not valid for medico[\s-]?legal",
+    r"^\**\s*end of (the )?report\s*\**$",
+    r"^(authori[sz]ed )?signatory$",
+    r"^(lab|collection|sample collection) timings?\b",
+]
+_BOILERPLATE_RE = re.compile("|".join(f"(?:{p})" for p in _BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+
+def context_window(model: Optional[str]) -> int:
+    return settings.LLM_CONTEXT_WINDOWS.get(model or "", settings.LLM_DEFAULT_CONTEXT_WINDOW)
+
+
+def input_budget(model: Optional[str], max_tokens: int) -> int:
+    """Input token budget for ``model`` — the configured cap, shrunk to
+    fit the model's context window minus the output allowance."""
+    window = context_window(model)
+    return max(min(settings.LLM_INPUT_TOKEN_BUDGET, window - max_tokens - 64), 512)
+
+
+# Short result / unit lines that legitimately repeat ("Negative" for
+# several urine tests, "++", a unit on its own line) — never deduped.
+_RESULT_TOKEN_RE = re.compile(
+    r"^(\+{1,4}|[-+]?\d[\d.,]*|nil|negative|positive|absent|present|trace|normal|abnormal"
+    r"|reactive|non[\s-]?reactive|not seen|seen|occasional|few|plenty)$"
+    r"|^[a-zµμ]{0,8}\s*[/%]\s*[a-zµμ0-9.^]{0,8}$"
+    r"|^(mg|g|kg|iu|u|fl|pg|ng|mcg|meq|mmol|umol|µmol|ml|l|sec|mm|cells)$",
+    re.IGNORECASE,
+)
+_PAGE_NUMBER_RE = re.compile(_BOILERPLATE_PATTERNS[0], re.IGNORECASE)
+
+# Lines at the top / bottom of a page that may be running headers/footers.
+_EDGE_LINES = 3
+
+
+def _pages(text: str) -> List[List[str]]:
+    """Normalised non-empty lines per page.
+
+    Pages end at form feeds (``PAGE_BREAK``) and after "Page N of M"
+    lines, which OCR'd text without form feeds still carries.
+    """
+    pages: List[List[str]] = []
+    for block in text.split(PAGE_BREAK):
+        pages.append([])
+        for line in block.splitlines():
+            line = re.sub(r"[ \t]+", " ", line).strip()
+            if not line:
+                continue
+            pages[-1].append(line)
+            if _PAGE_NUMBER_RE.search(line):
+                pages.append([])
+    return [p for p in pages if p]
+
+
+def clean_ocr_text(text: str) -> Tuple[str, int]:
+    """Return (cleaned text, number of lines dropped).
+
+    Running headers/footers — lines found within ``_EDGE_LINES`` of the
+    top or bottom of more than one page — keep only their first
+    occurrence, so the hospital name etc. is still seen once.  Lines in
+    the body of a page are never deduped, nor are short result tokens
+    and units (``++``, ``Negative``, ``mg/dL``) wherever they sit.
+    """
+    pages = _pages(text)
+
+    edge_pages: Dict[str, set] = {}
+    for page_no, page in enumerate(pages):
+        for line in page[:_EDGE_LINES] + page[-_EDGE_LINES:]:
+            edge_pages.setdefault(line.lower(), set()).add(page_no)
+    running = {key for key, seen_on in edge_pages.items() if len(seen_on) > 1}
+
+    kept: List[str] = []
+    seen = set()
+    dropped = 0
+    for page in pages:
+        for i, line in enumerate(page):
+            key = line.lower()
+            at_edge = i < _EDGE_LINES or i >= len(page) - _EDGE_LINES
+            repeated_edge = (
+                at_edge and key in running and key in seen
+                and not _RESULT_TOKEN_RE.match(line)
+            )
+            if repeated_edge or _BOILERPLATE_RE.search(line):
+                dropped += 1
+                continue
+            seen.add(key)
+            kept.append(line)
+
+    return "\n".join(kept), dropped
+
+
+def _value_forms(value) -> List[str]:
+    """Textual forms a parsed numeric value may take in the document."""
+    if value is None:
+        return []
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return [str(value).lower()]
+    forms = {str(value).lower(), f"{number:g}"}
+    if number.is_integer():
+        forms.add(str(int(number)))
+        forms.add(f"{int(number):,}")
+    return [f for f in forms if f]
+
+
+def compact_structured(parsed_data: dict, text: str) -> Tuple[dict, int]:
+    """Return (compact structured payload, number of tests deduped).
+
+    Duplicate parser hits (same test id + value) are collapsed.  Tests
+    whose name and value already appear in ``text`` only contribute the
+    catalog reference range; others are sent in full.
+    """
+    lowered = text.lower()
+    tests: List[Dict] = []
+    seen = set()
+    in_text = 0
+
+    for t in parsed_data.get("tests", []) or []:
+        if not isinstance(t, dict):
+            continue
+        key = (t.get("id") or t.get("name"), t.get("value"))
+        if key in seen:
+            continue
+        seen.add(key)
+
+        name = t.get("name") or t.get("id") or ""
+        visible = name.lower() in lowered and any(
+            form in lowered for form in _value_forms(t.get("value"))
+        )
+        if visible:
+            in_text += 1
+            entry = {"name": name}
+            if t.get("normal_min") is not None or t.get("normal_max") is not None:
+                entry["range"] = [t.get("normal_min"), t.get("normal_max")]
+        else:
+            entry = {k: v for k, v in t.items() if k != "id" and v not in (None, "")}
+        tests.append(entry)
+
+    medicines = []
+    for m in parsed_data.get("medicines", []) or []:
+        if isinstance(m, dict):
+            medicines.append({k: v for k, v in m.items() if k != "id" and v})
+        else:
+            medicines.append({"name": str(m)})
+
+    compact: Dict = {}
+    if tests:
+        compact["tests"] = tests
+    if medicines:
+        compact["medicines"] = medicines
+    return compact, in_text
+
+
+def fit_chunks(chunks: List[str], allowance: int) -> Tuple[List[str], int]:
+    """Return (chunks that fit, tokens used).
+
+    ``chunks`` must be ordered most-relevant first (as returned by
+    retrieval); exact duplicates are skipped.
+    """
+    kept: List[str] = []
+    used = 0
+    seen = set()
+    for chunk in chunks:
+        if not chunk or chunk in seen:
+            continue
+        seen.add(chunk)
+        cost = estimate_tokens(chunk) + 2  # separator
+        if used + cost > allowance:
+            continue
+        kept.append(chunk)
+        used += cost
+    return kept, used
+
+
+def truncate_to_tokens(text: str, allowance: int) -> Tuple[str, bool]:
+    """Cut ``text`` on a line boundary to at most ``allowance`` tokens."""
+    if estimate_tokens(text) <= allowance:
+        return text, False
+    kept: List[str] = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > allowance:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + "\n…", True
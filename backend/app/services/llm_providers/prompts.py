@@ -2,19 +2,39 @@
 Shared prompt templates and JSON utilities used by all LLM providers.
 
 Keeps prompt engineering in one place — providers just call
-``build_messages()`` and ``parse_or_repair_json()``.
+``assemble_messages()`` / ``build_messages()`` and
+``parse_or_repair_json()``.  Prompts are fitted to a per-model token
+budget (see ``prompt_budget``).
+
+Messages are laid out for provider-side prompt caching: the system
+message holds every static part (rules, schema, input guide) so it is a
+byte-identical prefix across documents, and ``PROMPT_VERSION`` (a hash of
+it) tags requests and usage records so cache hit rates can be compared
+per prompt revision.
 """
 
+import hashlib
 import json
-import re
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
+from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.llm_providers.errors import LLMInvalidOutputError, LLMOutputTruncatedError
+from app.services.llm_providers.json_repair import scan_json
+from app.services.llm_providers.prompt_budget import (
+    clean_ocr_text,
+    compact_structured,
+    fit_chunks,
+    input_budget,
+    truncate_to_tokens,
+)
+from app.services.llm_providers.tokens import (  # noqa: F401 — re-exported
+    estimate_message_tokens,
+    estimate_tokens,
+)
 
 logger = get_logger("llm.prompt")
 
-MAX_RAW_CHARS = 8000  # truncate raw_text before sending to LLM
-
 _SCHEMA_OBJ = {
     "disclaimer": "string",
     "input_summary": {
@@ -116,92 +136,208 @@ Always follow this JSON schema exactly:
 {{SCHEMA}}
 """
 
+_INPUT_GUIDE = """
+The user message holds ONE medical document, in this order:
+  1. (optional) reference medical knowledge — use it as the authoritative
+     source when explaining test results, medicines and recommendations;
+  2. pre-extracted structured fields (tests/medicines);
+  3. raw_text — the OCR text of the document.
+
+Instructions:
+- Use raw_text as the PRIMARY source — extract every test, value, medicine,
+  hospital, doctor, and date from it.
+- Use the structured fields (tests/medicines) as hints, not the only source.
+  Tests already readable in raw_text only carry their reference range.
+- Return ONLY JSON. No explanations, no markdown.
+"""
+
+# Everything static lives in the system message so it forms one stable
+# prefix that providers with prompt caching (OpenAI, Groq) can reuse
+# across documents; the user message carries only per-document content,
+# most-shareable first.  PROMPT_VERSION changes whenever that prefix does.
 SYSTEM_PROMPT = SYSTEM_PROMPT_TEMPLATE.replace(
     "{{SCHEMA}}", json.dumps(_SCHEMA_OBJ, separators=(",", ":"))
-)
+) + _INPUT_GUIDE
 
-def build_messages(
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+_USER_TAIL = "Return ONLY the JSON object."
+
+_RAG_HEADER_TOKENS = 40  # "Reference medical knowledge …" wrapper
+
+
+def _user_prompt(raw_text: str, structured: dict, chunks: List[str]) -> str:
+    rag_block = ""
+    if chunks:
+        # Kept in relevance order (most relevant first, as fitted).
+        # Retrieval is deterministic, so the same document still yields
+        # the same prefix; sorting would share it across documents that
+        # retrieve the same set in a different order, at relevance's cost.
+        joined = "\n---\n".join(chunks)
+        rag_block = f"Reference medical knowledge:\n```\n{joined}\n```\n\n"
+
+    return (
+        f"{rag_block}"
+        "Pre-extracted structured fields:\n"
+        f"{json.dumps(structured, separators=(',', ':'), sort_keys=True)}\n\n"
+        f"raw_text (OCR):\n```\n{raw_text}\n```\n\n"
+        f"{_USER_TAIL}"
+    )
+
+
+def _naive_prompt_tokens(parsed_data: dict, retrieval_context: Optional[List[str]]) -> int:
+    """Tokens the unbudgeted prompt (full parser output + every chunk) would cost."""
+    payload = json.dumps({"parsed_data": parsed_data}, separators=(",", ":"), default=str)
+    rag = "\n---\n".join(retrieval_context or [])
+    return estimate_message_tokens([
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{rag}\n{payload}\n{_USER_TAIL}"},
+    ])
+
+
+def assemble_messages(
     parsed_data: dict,
     retrieval_context: Optional[List[str]] = None,
-) -> list:
-    """Return [system, user] message list for the LLM.
-    RAG chunks are injected into the user message when provided.
+    model: Optional[str] = None,
+    max_tokens: int = 2048,
+) -> Tuple[list, dict]:
+    """Return ([system, user] messages, prompt stats) within the input
+    token budget for ``model``.
+
+    Boilerplate OCR lines are dropped first.  Raw text has priority over
+    RAG chunks, but chunks keep at least ``LLM_RAG_MIN_TOKENS``; chunks
+    are fitted in relevance order and raw text is truncated (on a line
+    boundary).  Structured fields are deduped against the text that is
+    actually sent, so a test cut from the text keeps its value.
     """
-    safe_parsed = json.loads(json.dumps(parsed_data))
-    raw_text = safe_parsed.get("raw_text")
-    if isinstance(raw_text, str) and len(raw_text) > MAX_RAW_CHARS:
-        safe_parsed["raw_text"] = raw_text[:MAX_RAW_CHARS] + "…"
+    retrieval_context = retrieval_context or []
+    budget = input_budget(model, max_tokens)
 
-    enriched_payload = {"parsed_data": safe_parsed}
+    cleaned, lines_dropped = clean_ocr_text(str(parsed_data.get("raw_text") or ""))
+    structured, _ = compact_structured(parsed_data, cleaned)
 
-    # RAG context block
-    rag_block = ""
-    if retrieval_context:
-        chunks = "\n---\n".join(retrieval_context)
-        rag_block = (
-            "\n\nRelevant medical knowledge (use as authoritative reference "
-            "for explaining test results, medicines, and recommendations):\n"
-            f"```\n{chunks}\n```\n"
-        )
-
-    user_prompt = (
-        "Analyse the medical document below and return a JSON object "
-        "matching the required schema.\n\n"
-        f"Input data (includes raw OCR text AND pre-extracted structured fields):\n"
-        f"{json.dumps(enriched_payload, separators=(',', ':'))}\n"
-        f"{rag_block}\n"
-        "Instructions:\n"
-        "- Use raw_text as the PRIMARY source — extract every test, value, "
-        "medicine, hospital, doctor, and date from it.\n"
-        "- Use the structured fields (tests/medicines) as hints, not the only source.\n"
-        "- Return ONLY JSON. No explanations, no markdown.\n"
-    )
+    fixed = estimate_message_tokens([
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _user_prompt("", structured, [])},
+    ])
+    available = max(budget - fixed, 0)
 
-    return [
+    rag_wanted = sum(estimate_tokens(c) + 2 for c in retrieval_context) + _RAG_HEADER_TOKENS
+    rag_reserve = min(settings.LLM_RAG_MIN_TOKENS, rag_wanted) if retrieval_context else 0
+    raw_text, truncated = truncate_to_tokens(cleaned, max(available - rag_reserve, 0))
+    # Dedupe against the text actually sent: a test whose line was cut
+    # off goes back to a full entry, value included.
+    structured, tests_in_text = compact_structured(parsed_data, raw_text)
+    fixed = estimate_message_tokens([
         {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_prompt},
-    ]
+        {"role": "user", "content": _user_prompt(raw_text, structured, [])},
+    ])
+    chunks, _ = fit_chunks(retrieval_context, budget - fixed - _RAG_HEADER_TOKENS)
+
+    def _messages() -> list:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _user_prompt(raw_text, structured, chunks)},
+        ]
+
+    # Estimates are not additive; enforce the budget on the final prompt,
+    # dropping the least relevant chunk first, then more raw text.
+    messages = _messages()
+    prompt_tokens = estimate_message_tokens(messages)
+    while prompt_tokens > budget:
+        if chunks:
+            chunks = chunks[:-1]
+        elif raw_text:
+            shorter, _ = truncate_to_tokens(raw_text, estimate_tokens(raw_text) - (prompt_tokens - budget) - 1)
+            raw_text = shorter if len(shorter) < len(raw_text) else ""
+            truncated = True
+            structured, tests_in_text = compact_structured(parsed_data, raw_text)
+        else:
+            break
+        messages = _messages()
+        prompt_tokens = estimate_message_tokens(messages)
 
+    naive_tokens = _naive_prompt_tokens(parsed_data, retrieval_context)
+    stats = {
+        "budget_tokens": budget,
+        "prompt_tokens": prompt_tokens,
+        "naive_prompt_tokens": naive_tokens,
+        "tokens_saved": max(naive_tokens - prompt_tokens, 0),
+        "ocr_lines_dropped": lines_dropped,
+        "tests_in_raw_text": tests_in_text,
+        "rag_chunks_used": len(chunks),
+        "rag_chunks_dropped": len(retrieval_context) - len(chunks),
+        "raw_text_truncated": truncated,
+        "prompt_version": PROMPT_VERSION,
+        "static_prefix_tokens": estimate_message_tokens(messages[:1]),
+    }
+    return messages, stats
 
-def parse_or_repair_json(text: str) -> dict:
-    """Parse LLM output as JSON, with several repair heuristics.
 
-    Handles:
-      1. Clean JSON.
-      2. JSON wrapped in markdown fences (```json ... ```).
-      3. JSON buried inside prose — extract first { … last }.
-      4. Truncated output detection.
+def build_messages(
+    parsed_data: dict,
+    retrieval_context: Optional[List[str]] = None,
+    model: Optional[str] = None,
+    max_tokens: int = 2048,
+) -> list:
+    """Return [system, user] message list for the LLM.
+    RAG chunks are injected into the user message when provided.
+    """
+    messages, _ = assemble_messages(parsed_data, retrieval_context, model, max_tokens)
+    return messages
+
+
+def parse_or_repair_json(
+    text: str,
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+) -> dict:
+    """Parse LLM output as JSON.
+
+    Clean JSON goes straight through ``json.loads``.  Otherwise one pass
+    of ``json_repair.scan_json`` extracts the first object from markdown
+    fences / surrounding prose, or — if the output was cut off — salvages
+    everything complete.  Truncation raises ``LLMOutputTruncatedError``
+    carrying the ``max_tokens`` and ``model`` the call used and the
+    salvaged ``partial`` result.
     """
     text = text.strip()
 
-    # 1. Try direct parse
     try:
-        return json.loads(text)
-    except Exception:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data
+    except ValueError:
         pass
 
-    # 2. Strip markdown fences (```json … ```)
-    fence_match = re.search(r"```(?:json)?\s*\n?(.*?)```", text, re.DOTALL)
-    if fence_match:
-        try:
-            return json.loads(fence_match.group(1).strip())
-        except Exception:
-            pass
+    data, complete = scan_json(text)
+    if complete:
+        if data is None:
+            raise LLMInvalidOutputError("LLM returned invalid JSON after repair")
+        return data
 
-    # 3. Extract first { … last }
-    first = text.find("{")
-    last = text.rfind("}")
-    if first != -1 and last != -1 and last > first:
-        try:
-            return json.loads(text[first : last + 1])
-        except Exception:
-            pass
+    raise LLMOutputTruncatedError(
+        "LLM output truncated (likely token limit)",
+        max_tokens=max_tokens,
+        model=model,
+        partial=data,
+    )
 
-    # 4. Truncation detection
-    if not text.endswith("}"):
-        raise RuntimeError("LLM output truncated (likely token limit)")
 
-    raise RuntimeError("LLM returned invalid JSON after repair")
+def truncated_output(
+    text: str,
+    max_tokens: Optional[int],
+    model: Optional[str],
+) -> LLMOutputTruncatedError:
+    """Error for a completion that stopped at ``max_tokens``, carrying
+    whatever ``json_repair`` could salvage from it."""
+    partial, _ = scan_json(text)
+    return LLMOutputTruncatedError(
+        f"LLM output hit max_tokens={max_tokens}",
+        max_tokens=max_tokens,
+        model=model,
+        partial=partial,
+    )
 
 
 def validate_schema(data: dict):
@@ -219,7 +355,7 @@ def validate_schema(data: dict):
     ]
     for key in required_keys:
         if key not in data:
-            raise RuntimeError(f"LLM response missing key: {key}")
+            raise LLMInvalidOutputError(f"LLM response missing key: {key}")
 
     if not isinstance(data["confidence_score"], (int, float)):
-        raise RuntimeError("confidence_score must be a number")
+        raise LLMInvalidOutputError("confidence_score must be a number")
@@ -0,0 +1,229 @@
+"""
+Replay provider — recorded LLM responses for load tests and offline benchmarks.
+
+``LLM_PROVIDER=replay`` serves responses from fixture files in
+``LLM_REPLAY_DIR`` keyed by prompt hash (sha256 of the assembled
+messages), so the worker can be driven end to end without paying for or
+being rate limited by a real provider.
+
+  • ``LLM_REPLAY_MODE=record`` forwards each call to
+    ``LLM_REPLAY_RECORD_FROM`` (e.g. ``groq``) and writes the result and
+    its latency to ``<prompt hash>.json``;
+  • ``LLM_REPLAY_MODE=replay`` (default) looks the prompt up.  A miss is
+    served per ``LLM_REPLAY_ON_MISS``: ``synthetic`` (the rule-based
+    explanation), ``any`` (a recorded response picked round-robin) or
+    ``error``.
+
+Synthetic latency follows ``LLM_REPLAY_LATENCY_MODE`` — ``recorded``
+(the fixture's own latency), ``fixed``, ``uniform`` or ``lognormal``
+around ``LLM_REPLAY_LATENCY_MS``.  ``LLM_REPLAY_FAILURES`` injects
+failures by probability: ``rate_limit`` (429 with
+``LLM_REPLAY_RETRY_AFTER_SEC``), ``timeout`` and ``truncated`` (the JSON
+is cut part-way and goes through the normal salvage path).
+
+Token usage is estimated from the prompt and output so usage and cost
+accounting keep working offline.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import llm_usage
+from app.services.llm import generate_rule_based_explanation
+from app.services.llm_providers.base import LLMProvider
+from app.services.llm_providers.errors import LLMRateLimitError, LLMTransportError
+from app.services.llm_providers.limiter import llm_slot
+from app.services.llm_providers.prompts import (
+    PROMPT_VERSION,
+    assemble_messages,
+    truncated_output,
+)
+from app.services.llm_providers.tokens import estimate_tokens
+
+logger = get_logger("llm.replay")
+
+REPLAY_MODEL = "replay"
+
+FAILURE_RATE_LIMIT = "rate_limit"
+FAILURE_TIMEOUT = "timeout"
+FAILURE_TRUNCATED = "truncated"
+
+
+def prompt_hash(messages: list) -> str:
+    blob = json.dumps(messages, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _public(result: dict) -> dict:
+    return {k: v for k, v in result.items() if not k.startswith("_")}
+
+
+class ReplayProvider(LLMProvider):
+    """Serves (or records) LLM responses from fixture files."""
+
+    name = "replay"
+
+    def __init__(self):
+        self._dir = Path(settings.LLM_REPLAY_DIR)
+        self._fixtures: Dict[str, dict] = {}
+        self._keys: Optional[List[str]] = None
+        self._round_robin = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(settings.LLM_REPLAY_SEED)
+
+    def choose_model(self, parsed_data: dict) -> tuple:
+        return REPLAY_MODEL, settings.LLM_MAX_TOKENS_HEAVY
+
+    async def generate(
+        self,
+        parsed_data: dict,
+        retrieval_context: Optional[list] = None,
+        max_tokens: Optional[int] = None,
+    ) -> dict:
+        model, default_max_tokens = self.choose_model(parsed_data)
+        max_tokens = max_tokens or default_max_tokens
+        # Keyed on the canonical prompt, independent of the model that
+        # will eventually serve it.
+        messages, prompt_stats = assemble_messages(parsed_data, retrieval_context)
+        key = prompt_hash(messages)
+
+        if settings.LLM_REPLAY_MODE == "record":
+            return await self._record(key, parsed_data, retrieval_context, max_tokens)
+
+        fixture = self._lookup(key, parsed_data)
+        model = fixture.get("model") or model
+        result = dict(fixture["result"])
+
+        llm_usage.note_request(model, PROMPT_VERSION)
+        async with llm_slot(self.name, model, 0, rate_limited=False):
+            await asyncio.sleep(self._latency_sec(fixture))
+            self._inject_failure(result, model, max_tokens)
+
+        output_tokens = estimate_tokens(json.dumps(result, ensure_ascii=False))
+        llm_usage.note_usage(prompt_stats["prompt_tokens"], output_tokens)
+
+        result["_llm_model_used"] = model
+        result["_prompt_stats"] = prompt_stats
+        return result
+
+    # ── Fixtures ─────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._fixtures:
+                return self._fixtures[key]
+        path = self._path(key)
+        if not path.is_file():
+            return None
+        fixture = json.loads(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._fixtures[key] = fixture
+        return fixture
+
+    def _any_fixture(self) -> Optional[dict]:
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(p.stem for p in self._dir.glob("*.json")) if self._dir.is_dir() else []
+                self._round_robin = itertools.cycle(self._keys) if self._keys else None
+            key = next(self._round_robin) if self._round_robin else None
+        return self._load(key) if key else None
+
+    def _lookup(self, key: str, parsed_data: dict) -> dict:
+        fixture = self._load(key)
+        if fixture is not None:
+            return fixture
+
+        on_miss = settings.LLM_REPLAY_ON_MISS
+        if on_miss == "any":
+            fixture = self._any_fixture()
+            if fixture is not None:
+                return fixture
+        elif on_miss == "error":
+            raise RuntimeError(f"No recorded LLM response for prompt {key[:12]}")
+
+        logger.debug(f"Replay miss for prompt {key[:12]} — serving rule-based result")
+        return {"model": REPLAY_MODEL, "result": generate_rule_based_explanation(parsed_data)}
+
+    async def _record(
+        self,
+        key: str,
+        parsed_data: dict,
+        retrieval_context: Optional[list],
+        max_tokens: int,
+    ) -> dict:
+        from app.services.llm_providers.factory import get_provider
+
+        source = get_provider(settings.LLM_REPLAY_RECORD_FROM)
+        started = time.monotonic()
+        result = await source.generate(parsed_data, retrieval_context, max_tokens=max_tokens)
+        latency_ms = int((time.monotonic() - started) * 1000)
+
+        fixture = {
+            "key": key,
+            "provider": source.name,
+            "model": result.get("_llm_model_used"),
+            "prompt_version": PROMPT_VERSION,
+            "latency_ms": latency_ms,
+            "recorded_at": time.time(),
+            "result": _public(result),
+        }
+        self._dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(".tmp")
+        tmp.write_text(json.dumps(fixture, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self._path(key))
+        with self._lock:
+            self._fixtures[key] = fixture
+            self._keys = None
+        logger.info(f"Recorded {source.name} response for prompt {key[:12]} ({latency_ms} ms)")
+        return result
+
+    # ── Synthetic latency and failures ───────────────────────────────
+
+    def _latency_sec(self, fixture: dict) -> float:
+        mode = settings.LLM_REPLAY_LATENCY_MODE
+        mean_ms = settings.LLM_REPLAY_LATENCY_MS
+        jitter = settings.LLM_REPLAY_LATENCY_JITTER
+        with self._lock:
+            if mode == "recorded" and fixture.get("latency_ms") is not None:
+                ms = fixture["latency_ms"]
+            elif mode == "uniform":
+                ms = self._rng.uniform(mean_ms * (1 - jitter), mean_ms * (1 + jitter))
+            elif mode == "lognormal":
+                # Median at LLM_REPLAY_LATENCY_MS, long right tail like real APIs.
+                ms = self._rng.lognormvariate(math.log(max(mean_ms, 1.0)), jitter)
+            else:
+                ms = mean_ms
+        return max(ms, 0.0) / 1000
+
+    def _inject_failure(self, result: dict, model: str, max_tokens: int):
+        failures = settings.LLM_REPLAY_FAILURES
+        with self._lock:
+            roll = self._rng.random()
+            cut = self._rng.uniform(0.3, 0.9)
+
+        threshold = 0.0
+        for kind in (FAILURE_RATE_LIMIT, FAILURE_TIMEOUT, FAILURE_TRUNCATED):
+            threshold += failures.get(kind, 0.0)
+            if roll >= threshold:
+                continue
+            if kind == FAILURE_RATE_LIMIT:
+                raise LLMRateLimitError(
+                    "Replay: injected rate limit", retry_after=settings.LLM_REPLAY_RETRY_AFTER_SEC
+                )
+            if kind == FAILURE_TIMEOUT:
+                raise LLMTransportError("Replay: injected timeout")
+            text = json.dumps(result, ensure_ascii=False)
+            raise truncated_output(text[: int(len(text) * cut)], max_tokens, model)
@@ -0,0 +1,361 @@
+"""
+Adaptive model routing for the Groq / OpenAI providers.
+
+``choose_model`` used to send anything with a test or more than 500
+characters of text to the heavy model.  ``route(provider, parsed_data)``
+instead scores the document's complexity:
+
+    score = tests + 2 × abnormal tests + 3 × extra pages
+            + medicines + raw-text tokens / 500
+
+and walks the provider's models (``LLM_MODELS``) from cheapest to most
+capable, picking the first one expected to succeed:
+
+  • the light model only takes documents scoring at most
+    ``LLM_ROUTING_LIGHT_MAX_SCORE``;
+  • a model is skipped while its rolling window (``LLM_ROUTING_WINDOW``
+    calls, once ``LLM_ROUTING_MIN_SAMPLES`` are in) shows an error rate,
+    p95 latency or output quality outside the configured bounds.
+
+``LLM_ROUTING_OVERRIDES`` pins a model per document class
+(``prescription``, ``lab_report``, ``long_report``, ``other``), optionally
+per provider (``"groq:lab_report"``).
+
+Quality is the share of parsed tests the model's output accounts for
+(or its confidence score when there were none).  ``llm._call_provider``
+reports every outcome via ``record_outcome``; the decision, complexity
+and outcome are pushed to a capped Redis list for later analysis
+(``GET /admin/llm/routing``).  ``record_outcome`` runs on the event loop,
+so the push is handed to a background thread (one LPUSH + LTRIM
+pipeline per record); if Redis stalls, records beyond
+``LLM_ROUTING_LOG_SIZE`` waiting in the queue are dropped.  Stats live
+in-process, like the breakers.
+"""
+
+import json
+import math
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import metrics
+from app.services.catalog import TEST_CATALOG
+from app.services.llm_providers.tokens import estimate_tokens
+from app.services.ocr import PAGE_BREAK
+from app.services.redis_client import get_redis_client
+
+logger = get_logger("llm.routing")
+
+ROUTING_LOG_REDIS_KEY = "llm:routing:decisions"
+
+REASON_OVERRIDE = "override"
+REASON_ROUTED = "routed"
+REASON_FALLBACK = "fallback"
+REASON_DISABLED = "disabled"
+
+# The decision made by the current provider call (set by ``route``,
+# consumed by ``record_outcome`` in the same task).
+_current_decision: ContextVar[Optional[dict]] = ContextVar("llm_routing_decision", default=None)
+
+
+# ── Complexity ───────────────────────────────────────────────────────
+
+def _number(x) -> Optional[float]:
+    try:
+        return None if x is None else float(str(x).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def is_abnormal(t: dict) -> bool:
+    value, lo, hi = _number(t.get("value")), _number(t.get("normal_min")), _number(t.get("normal_max"))
+    if value is None:
+        return False
+    return (lo is not None and value < lo) or (hi is not None and value > hi)
+
+
+def document_class(tests: int, medicines: int, pages: int) -> str:
+    if pages > 1:
+        return "long_report"
+    if tests:
+        return "lab_report"
+    if medicines:
+        return "prescription"
+    return "other"
+
+
+def complexity(parsed_data: dict) -> Dict:
+    """Complexity features of a parsed document, including ``score``."""
+    tests = [t for t in parsed_data.get("tests", []) or [] if isinstance(t, dict)]
+    medicines = parsed_data.get("medicines", []) or []
+    raw_text = str(parsed_data.get("raw_text") or "")
+
+    abnormal = sum(1 for t in tests if is_abnormal(t))
+    pages = raw_text.count(PAGE_BREAK) + 1
+    text_tokens = estimate_tokens(raw_text)
+    score = len(tests) + 2 * abnormal + 3 * (pages - 1) + len(medicines) + text_tokens / 500
+
+    return {
+        "score": round(score, 2),
+        "doc_class": document_class(len(tests), len(medicines), pages),
+        "tests": len(tests),
+        "abnormal": abnormal,
+        "pages": pages,
+        "medicines": len(medicines),
+        "text_tokens": text_tokens,
+    }
+
+
+# ── Rolling per-model stats ──────────────────────────────────────────
+
+class ModelStats:
+    """Rolling window of (ok, latency, quality) for one provider/model."""
+
+    def __init__(self):
+        self._calls: deque = deque(maxlen=max(settings.LLM_ROUTING_WINDOW, 1))
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency_sec: float, quality: Optional[float]):
+        with self._lock:
+            self._calls.append((ok, latency_sec, quality))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = list(self._calls)
+        latencies = sorted(lat for ok, lat, _ in calls if ok)
+        qualities = [q for ok, _, q in calls if ok and q is not None]
+        p95 = None
+        if latencies:
+            p95 = round(latencies[min(int(round(0.95 * (len(latencies) - 1))), len(latencies) - 1)], 3)
+        return {
+            "calls": len(calls),
+            "error_rate": round(sum(1 for ok, _, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+            "p95_latency_sec": p95,
+            "quality": round(sum(qualities) / len(qualities), 3) if qualities else None,
+        }
+
+
+_stats: Dict[Tuple[str, str], ModelStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_stats(provider: str, model: str) -> ModelStats:
+    with _stats_lock:
+        key = (provider, model)
+        if key not in _stats:
+            _stats[key] = ModelStats()
+        return _stats[key]
+
+
+def reset_stats():
+    """Forget every model's stats (tests)."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _unhealthy_reason(snapshot: dict) -> Optional[str]:
+    if snapshot["calls"] < settings.LLM_ROUTING_MIN_SAMPLES:
+        return None
+    if snapshot["error_rate"] > settings.LLM_ROUTING_MAX_ERROR_RATE:
+        return "error_rate"
+    if snapshot["p95_latency_sec"] is not None and snapshot["p95_latency_sec"] > settings.LLM_ROUTING_MAX_P95_SEC:
+        return "latency"
+    if snapshot["quality"] is not None and snapshot["quality"] < settings.LLM_ROUTING_MIN_QUALITY:
+        return "quality"
+    return None
+
+
+# ── Routing ──────────────────────────────────────────────────────────
+
+def models_for(provider: str) -> Tuple[str, str]:
+    """(heavy, light) model ids for a provider.
+
+    ``LLM_MODELS`` lists them per provider; providers without an entry
+    use ``LLM_MODEL_HEAVY`` / ``LLM_MODEL_LIGHT`` (Groq's model ids).
+    """
+    pair = settings.LLM_MODELS.get(provider) or {}
+    return pair.get("heavy", settings.LLM_MODEL_HEAVY), pair.get("light", settings.LLM_MODEL_LIGHT)
+
+
+def _tiers(provider: str) -> List[Tuple[str, int, float]]:
+    """(model, max_tokens, max complexity score), cheapest first."""
+    heavy, light = models_for(provider)
+    return [
+        (light, settings.LLM_MAX_TOKENS_LIGHT, settings.LLM_ROUTING_LIGHT_MAX_SCORE),
+        (heavy, settings.LLM_MAX_TOKENS_HEAVY, math.inf),
+    ]
+
+
+def _max_tokens_for(provider: str, model: str) -> int:
+    if model == models_for(provider)[1]:
+        return settings.LLM_MAX_TOKENS_LIGHT
+    return settings.LLM_MAX_TOKENS_HEAVY
+
+
+def _legacy_choice(provider: str, parsed_data: dict) -> str:
+    """The original rule: heavy for anything with tests or long text."""
+    heavy, light = models_for(provider)
+    if parsed_data.get("tests") or len(parsed_data.get("raw_text") or "") > 500:
+        return heavy
+    return light if parsed_data.get("medicines") else heavy
+
+
+def route(provider: str, parsed_data: dict) -> Tuple[str, int]:
+    """Pick ``(model, max_tokens)`` for a provider call and remember why."""
+    cx = complexity(parsed_data)
+    skipped: Dict[str, str] = {}
+    overrides = settings.LLM_ROUTING_OVERRIDES
+    override = overrides.get(f"{provider}:{cx['doc_class']}") or overrides.get(cx["doc_class"])
+
+    if override:
+        model, reason = override, REASON_OVERRIDE
+    elif not settings.LLM_ROUTING_ENABLED:
+        model, reason = _legacy_choice(provider, parsed_data), REASON_DISABLED
+    else:
+        model, reason = None, REASON_ROUTED
+        for candidate, _, max_score in _tiers(provider):
+            if cx["score"] > max_score:
+                skipped[candidate] = "too_complex"
+                continue
+            unhealthy = _unhealthy_reason(get_stats(provider, candidate).snapshot())
+            if unhealthy:
+                skipped[candidate] = unhealthy
+                continue
+            model = candidate
+            break
+        if model is None:
+            model, reason = models_for(provider)[0], REASON_FALLBACK
+
+    max_tokens = _max_tokens_for(provider, model)
+    _current_decision.set({
+        "provider": provider,
+        "model": model,
+        "max_tokens": max_tokens,
+        "reason": reason,
+        "skipped": skipped,
+        "complexity": cx,
+    })
+    logger.info(
+        f"Routing {provider}: {cx['doc_class']} score={cx['score']} → {model} "
+        f"({reason}{', skipped ' + str(skipped) if skipped else ''})"
+    )
+    return model, max_tokens
+
+
+# ── Outcomes ─────────────────────────────────────────────────────────
+
+def _test_names(test: dict) -> List[str]:
+    meta = TEST_CATALOG.get(test.get("id")) or {}
+    names = {str(test.get("name") or "").lower(), (meta.get("display_name") or "").lower()}
+    if test.get("id"):
+        names.add(str(test["id"]).replace("_", " ").lower())
+    names.update(a.lower() for a in meta.get("aliases", []))
+    return [n for n in names if n]
+
+
+def result_quality(parsed_data: dict, result: dict) -> float:
+    """Share of parsed tests the output mentions (confidence if no tests)."""
+    tests = {t.get("id") or t.get("name"): t for t in parsed_data.get("tests", []) or [] if isinstance(t, dict)}
+    if not tests:
+        return float(_number(result.get("confidence_score")) or 0.0)
+
+    output_names = " | ".join(
+        str(v.get("test_name") or "").lower()
+        for key in ("abnormal_values", "normal_values")
+        for v in result.get(key, []) or []
+        if isinstance(v, dict)
+    )
+    found = sum(
+        1 for t in tests.values()
+        if any(re.search(rf"(?<![a-z]){re.escape(n)}(?![a-z])", output_names) for n in _test_names(t))
+    )
+    return round(found / len(tests), 3)
+
+
+def begin_call():
+    """Clear the previous decision before a new provider call."""
+    _current_decision.set(None)
+
+
+def record_outcome(
+    ok: bool,
+    latency_sec: float,
+    parsed_data: Optional[dict] = None,
+    result: Optional[dict] = None,
+):
+    """Feed a call's outcome into the routed model's stats and log the decision.
+
+    No-op for providers that don't route (e.g. the single-model Llama).
+    """
+    decision = _current_decision.get()
+    if decision is None:
+        return
+    _current_decision.set(None)
+
+    quality = result_quality(parsed_data or {}, result) if ok and result is not None else None
+    stats = get_stats(decision["provider"], decision["model"])
+    stats.record(ok, latency_sec, quality)
+
+    metrics.incr("llm_routing", f"{decision['model']}:{decision['reason']}")
+    _log_decision({
+        **decision,
+        "ok": ok,
+        "latency_sec": round(latency_sec, 3),
+        "quality": quality,
+        "model_stats": stats.snapshot(),
+        "ts": time.time(),
+    })
+
+
+_log_queue: "queue.Queue[str]" = queue.Queue(maxsize=max(settings.LLM_ROUTING_LOG_SIZE, 1))
+_log_writer_pid: Optional[int] = None
+_log_writer_lock = threading.Lock()
+
+
+def _log_decision(record: dict):
+    """Queue a best-effort append to the capped routing log; never blocks."""
+    _ensure_log_writer()
+    try:
+        _log_queue.put_nowait(json.dumps(record))
+    except queue.Full:
+        logger.debug("Routing log queue full — decision dropped")
+
+
+def _write_decision(payload: str):
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.lpush(ROUTING_LOG_REDIS_KEY, payload)
+        pipe.ltrim(ROUTING_LOG_REDIS_KEY, 0, max(settings.LLM_ROUTING_LOG_SIZE, 1) - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Routing log write failed: {e}")
+
+
+def _log_writer():
+    while True:
+        _write_decision(_log_queue.get())
+
+
+def _ensure_log_writer():
+    global _log_writer_pid
+    # A forked worker inherits the flag but not the thread.
+    if _log_writer_pid == os.getpid():
+        return
+    with _log_writer_lock:
+        if _log_writer_pid == os.getpid():
+            return
+        threading.Thread(target=_log_writer, name="routing-log", daemon=True).start()
+        _log_writer_pid = os.getpid()
+
+
+def recent_decisions(limit: int = 100) -> List[dict]:
+    """Most recent routing decisions with their outcomes, newest first."""
+    raw = get_redis_client().lrange(ROUTING_LOG_REDIS_KEY, 0, max(limit, 1) - 1) or []
+    return [json.loads(item) for item in raw]
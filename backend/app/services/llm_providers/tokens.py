@@ -0,0 +1,33 @@
+"""
+Local token estimation — no tokenizer download, no network.
+
+Approximates BPE tokenizers (Llama 3 / GPT-4 family) closely enough for
+budgeting and rate limiting: short words are one token, long words are
+split every ~5 characters, digit runs every 3 digits, and each
+punctuation mark counts as one token.  It slightly *over*-estimates
+dense JSON, which is the safe direction for budgets.
+"""
+
+import re
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in ``text``."""
+    if not text:
+        return 0
+    total = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece.isdigit():
+            total += (len(piece) + 2) // 3
+        elif piece.isalpha():
+            total += 1 if len(piece) <= 6 else (len(piece) + 4) // 5
+        else:
+            total += 1
+    return total
+
+
+def estimate_message_tokens(messages: list) -> int:
+    """Estimate prompt tokens for a chat message list (incl. role overhead)."""
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
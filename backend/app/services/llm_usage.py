@@ -0,0 +1,340 @@
+"""
+Token usage, cost and latency accounting for LLM calls.
+
+Every provider call is recorded:
+
+  • ``llm._call_provider`` opens a per-call record (``begin_call``) and
+    closes it with the outcome and latency (``finish_call``);
+  • providers fill in the model and the token usage the API reported
+    (``note_request`` / ``note_usage``);
+  • the worker wraps a job's LLM work in ``collect()``, and
+    ``persist_calls`` writes the collected calls to the ``llm_calls``
+    table along with the document type.
+
+Records travel through ContextVars, so concurrent map-reduce parts and
+hedged requests each land in their own call record but in the same job's
+list.  Cost uses ``LLM_PRICING`` (USD per 1M tokens); cached prompt
+tokens are billed at ``cached_input`` when the model has that price.
+``usage_report`` aggregates totals and percentiles for
+``GET /admin/llm/usage``, including the prompt-cache hit rate and
+latency split by cache hit / miss (a hit is a call with cached prompt
+tokens).
+"""
+
+import math
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, case, distinct, func, literal_column, not_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.models.llm_call import LLMCall
+from app.services import metrics
+
+logger = get_logger("llm.usage")
+
+GROUP_BY = ("model", "provider", "doc_type", "prompt_version", "day")
+
+_job_calls: ContextVar[Optional[List[dict]]] = ContextVar("llm_job_calls", default=None)
+_current_call: ContextVar[Optional[dict]] = ContextVar("llm_current_call", default=None)
+
+
+# ── Recording ────────────────────────────────────────────────────────
+
+@contextmanager
+def collect() -> Iterator[List[dict]]:
+    """Collect every LLM call made inside the block (including child tasks)."""
+    calls: List[dict] = []
+    token = _job_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _job_calls.reset(token)
+
+
+def begin_call():
+    _current_call.set({})
+
+
+def note_request(model: str, prompt_version: Optional[str] = None):
+    """Provider: the model and prompt revision this call is about to use."""
+    call = _current_call.get()
+    if call is not None:
+        call.update(model=model, prompt_version=prompt_version)
+
+
+def note_usage(
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    cached_tokens: Optional[int] = None,
+):
+    """Provider: token usage reported by the API."""
+    if prompt_tokens:
+        metrics.incr("llm_prompt", "usage_reported")
+        metrics.incr("llm_prompt", "cached_tokens", cached_tokens or 0)
+        if cached_tokens:
+            metrics.incr("llm_prompt", "cache_hits")
+    call = _current_call.get()
+    if call is not None:
+        call.update(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+
+def cached_tokens_of(usage) -> Optional[int]:
+    """Cached prompt tokens from an OpenAI-SDK ``usage`` object, if reported."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None:
+        return None
+    if isinstance(details, dict):
+        return details.get("cached_tokens")
+    return getattr(details, "cached_tokens", None)
+
+
+def note_openai_usage(usage) -> None:
+    """``note_usage`` from an OpenAI-SDK ``usage`` object (Groq / OpenAI)."""
+    if usage is None:
+        return
+    note_usage(
+        getattr(usage, "prompt_tokens", None),
+        getattr(usage, "completion_tokens", None),
+        cached_tokens_of(usage),
+    )
+
+
+def finish_call(provider: str, ok: bool, latency_sec: float, error_kind: Optional[str] = None):
+    """Close the current call record and add it to the job's list."""
+    call = _current_call.get()
+    _current_call.set(None)
+    calls = _job_calls.get()
+    if call is None or calls is None:
+        return
+    call.update(
+        provider=provider,
+        success=ok,
+        error_kind=error_kind,
+        latency_ms=int(latency_sec * 1000),
+    )
+    call["cost_usd"] = cost_usd(
+        call.get("model"),
+        call.get("prompt_tokens") or 0,
+        call.get("completion_tokens") or 0,
+        call.get("cached_tokens") or 0,
+    )
+    calls.append(call)
+
+
+def cost_usd(model: Optional[str], prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    prices = settings.LLM_PRICING.get(model or "")
+    if not prices:
+        return 0.0
+    cached = min(cached_tokens, prompt_tokens)
+    cost = (
+        (prompt_tokens - cached) * prices.get("input", 0.0)
+        + cached * prices.get("cached_input", prices.get("input", 0.0))
+        + completion_tokens * prices.get("output", 0.0)
+    ) / 1_000_000
+    return round(cost, 6)
+
+
+def summarize(calls: List[dict]) -> Dict:
+    """Per-job totals for result metadata."""
+    return {
+        "calls": len(calls),
+        "failed_calls": sum(1 for c in calls if not c.get("success")),
+        "prompt_tokens": sum(c.get("prompt_tokens") or 0 for c in calls),
+        "completion_tokens": sum(c.get("completion_tokens") or 0 for c in calls),
+        "cached_tokens": sum(c.get("cached_tokens") or 0 for c in calls),
+        "llm_latency_ms": sum(c.get("latency_ms") or 0 for c in calls),
+        "cost_usd": round(sum(c.get("cost_usd") or 0.0 for c in calls), 6),
+    }
+
+
+def persist_calls(db: Session, job_id: str, calls: List[dict], doc_type: Optional[str] = None):
+    """Add the job's calls to the session (committed with the result)."""
+    for call in calls:
+        db.add(LLMCall(
+            job_id=job_id,
+            provider=call.get("provider") or "unknown",
+            model=call.get("model"),
+            doc_type=doc_type,
+            prompt_version=call.get("prompt_version"),
+            success=bool(call.get("success")),
+            error_kind=call.get("error_kind"),
+            prompt_tokens=call.get("prompt_tokens"),
+            completion_tokens=call.get("completion_tokens"),
+            cached_tokens=call.get("cached_tokens"),
+            latency_ms=call.get("latency_ms") or 0,
+            cost_usd=call.get("cost_usd") or 0.0,
+        ))
+
+
+# ── Reporting ────────────────────────────────────────────────────────
+
+_PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+# A call "reported" usage if it succeeded with prompt tokens; a cache hit
+# is a reported call with cached prompt tokens.
+_REPORTED = and_(LLMCall.success, func.coalesce(LLMCall.prompt_tokens, 0) > 0)
+_CACHE_HIT = and_(_REPORTED, func.coalesce(LLMCall.cached_tokens, 0) > 0)
+_CACHE_MISS = and_(_REPORTED, func.coalesce(LLMCall.cached_tokens, 0) == 0)
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum(column, condition=None):
+    value = column if condition is None else case((condition, column), else_=0)
+    return func.coalesce(func.sum(value), 0)
+
+
+_SUMS = (
+    func.count(LLMCall.id).label("calls"),
+    _count(not_(LLMCall.success)).label("failed_calls"),
+    _sum(LLMCall.prompt_tokens).label("prompt_tokens"),
+    _sum(LLMCall.completion_tokens).label("completion_tokens"),
+    _sum(LLMCall.cached_tokens).label("cached_tokens"),
+    _sum(LLMCall.cost_usd).label("cost_usd"),
+    func.count(distinct(LLMCall.job_id)).label("jobs"),
+    _count(_REPORTED).label("reported_calls"),
+    _count(_CACHE_HIT).label("cache_hits"),
+    _sum(LLMCall.prompt_tokens, _REPORTED).label("reported_prompt_tokens"),
+    _sum(LLMCall.cached_tokens, _CACHE_HIT).label("hit_cached_tokens"),
+)
+
+# Percentile inputs: the column where the call belongs to the
+# distribution, NULL (ignored) otherwise.
+_DISTRIBUTIONS = {
+    "latency_ms": case((LLMCall.success, LLMCall.latency_ms)),
+    "latency_ms_cache_hit": case((_CACHE_HIT, LLMCall.latency_ms)),
+    "latency_ms_cache_miss": case((_CACHE_MISS, LLMCall.latency_ms)),
+    "prompt_tokens_per_call": LLMCall.prompt_tokens,
+    "completion_tokens_per_call": LLMCall.completion_tokens,
+}
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles (what PostgreSQL's percentile_disc returns)."""
+    ordered = sorted(values)
+    return {
+        name: ordered[max(math.ceil(pct * len(ordered)) - 1, 0)] if ordered else None
+        for name, pct in _PERCENTILES
+    }
+
+
+def _group_column(group_by: str):
+    if group_by == "day":
+        return func.date(LLMCall.created_at)
+    return getattr(LLMCall, group_by)
+
+
+def _group_name(key) -> str:
+    return str(key) if key else "unknown"
+
+
+def _grouped(db: Session, since: datetime, key, *columns):
+    """Query ``columns`` per value of ``key``; ``key=None`` → one "all" row."""
+    if key is None:
+        return db.query(literal_column("'all'"), *columns).filter(LLMCall.created_at >= since)
+    return db.query(key, *columns).filter(LLMCall.created_at >= since).group_by(key)
+
+
+def _sql_percentiles(db: Session, since: datetime, key) -> Dict[str, Dict]:
+    """Per-group percentiles computed by PostgreSQL (percentile_disc)."""
+    columns = [
+        func.percentile_disc(pct).within_group(expr).label(f"{dist}:{name}")
+        for dist, expr in _DISTRIBUTIONS.items()
+        for name, pct in _PERCENTILES
+    ]
+    out: Dict[str, Dict] = {}
+    for row in _grouped(db, since, key, *columns).all():
+        values = row._mapping
+        out[_group_name(row[0])] = {
+            dist: {name: values[f"{dist}:{name}"] for name, _ in _PERCENTILES}
+            for dist in _DISTRIBUTIONS
+        }
+    return out
+
+
+def _fetched_percentiles(db: Session, since: datetime, key) -> Dict[str, Dict]:
+    """Per-group percentiles for databases without percentile_disc (SQLite).
+
+    Fetches only the distribution columns, not whole rows.
+    """
+    columns = [expr.label(dist) for dist, expr in _DISTRIBUTIONS.items()]
+    values: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    query = db.query(key if key is not None else literal_column("'all'"), *columns)
+    for row in query.filter(LLMCall.created_at >= since):
+        group = values[_group_name(row[0])]
+        for dist in _DISTRIBUTIONS:
+            if row._mapping[dist] is not None:
+                group[dist].append(row._mapping[dist])
+    return {
+        group: {dist: _percentiles(dists[dist]) for dist in _DISTRIBUTIONS}
+        for group, dists in values.items()
+    }
+
+
+def _aggregate(db: Session, since: datetime, key) -> Dict[str, Dict]:
+    """Aggregates per value of ``key`` (a SQL expression), in the database."""
+    query = _grouped(db, since, key, *_SUMS)
+    if db.get_bind().dialect.name == "postgresql":
+        percentiles = _sql_percentiles(db, since, key)
+    else:
+        percentiles = _fetched_percentiles(db, since, key)
+    empty = {dist: _percentiles([]) for dist in _DISTRIBUTIONS}
+
+    out: Dict[str, Dict] = {}
+    for row in query.all():
+        group = _group_name(row[0])
+        pct = percentiles.get(group, empty)
+        out[group] = {
+            "calls": row.calls,
+            "failed_calls": int(row.failed_calls),
+            "prompt_tokens": int(row.prompt_tokens),
+            "completion_tokens": int(row.completion_tokens),
+            "cached_tokens": int(row.cached_tokens),
+            "cost_usd": round(float(row.cost_usd), 6),
+            "jobs": row.jobs,
+            "latency_ms": pct["latency_ms"],
+            "cache_hit_rate": (
+                round(row.cache_hits / row.reported_calls, 3) if row.reported_calls else None
+            ),
+            "cached_token_share": (
+                round(row.hit_cached_tokens / row.reported_prompt_tokens, 3)
+                if row.reported_prompt_tokens else None
+            ),
+            "latency_ms_cache_hit": pct["latency_ms_cache_hit"],
+            "latency_ms_cache_miss": pct["latency_ms_cache_miss"],
+            "prompt_tokens_per_call": pct["prompt_tokens_per_call"],
+            "completion_tokens_per_call": pct["completion_tokens_per_call"],
+        }
+    return out
+
+
+def usage_report(db: Session, days: int = 7, group_by: str = "model") -> Dict:
+    """Totals and per-group aggregates over the last ``days`` days.
+
+    Sums and counts are a GROUP BY in the database; percentiles use
+    ``percentile_disc`` on PostgreSQL.
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    groups = _aggregate(db, since, _group_column(group_by))
+
+    return {
+        "window_days": days,
+        "group_by": group_by,
+        "totals": _aggregate(db, since, None)["all"],
+        "groups": dict(sorted(groups.items())),
+    }
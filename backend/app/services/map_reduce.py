@@ -0,0 +1,262 @@
+"""
+Map-reduce helpers for long, multi-page reports.
+
+  • ``should_map_reduce(parsed_data)`` — True when the cleaned OCR text
+    is too long to analyse well in a single LLM call.
+  • ``split_parsed(parsed_data)``       — split the document into page- or
+    section-sized parts (each with its own parser output) for the map step.
+  • ``merge_results(parts)``            — deterministic reduce: dedupe
+    tests/medicines, take the highest urgency, rebuild the summary; parts
+    that fell back to the rule-based explanation mark the result partial.
+  • ``remainder_parsed(parsed, partial)`` — what a salvaged, truncated
+    result still lacks, for a follow-up call.
+
+OCR joins pages with ``PAGE_BREAK`` (form feed); text without page breaks
+is split on blank-line sections, then on lines.  The orchestration lives
+in ``llm.generate_explanation_async``.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.coverage import catalog_medicine_names, catalog_test_names, mentions
+from app.services.llm_providers.prompt_budget import clean_ocr_text
+from app.services.llm_providers.tokens import estimate_tokens
+from app.services.ocr import PAGE_BREAK
+from app.services.parser import parse_medical_text
+
+_URGENCY_RANK = {"routine": 0, "soon": 1, "urgent": 2, "emergency": 3}
+
+_SUMMED_PROMPT_STATS = (
+    "prompt_tokens",
+    "naive_prompt_tokens",
+    "tokens_saved",
+    "ocr_lines_dropped",
+    "tests_in_raw_text",
+    "rag_chunks_used",
+    "rag_chunks_dropped",
+)
+
+
+# ── Map: split ────────────────────────────────────────────────────────
+
+def should_map_reduce(parsed_data: dict) -> bool:
+    if not settings.LLM_MAP_REDUCE_ENABLED:
+        return False
+    cleaned, _ = clean_ocr_text(str(parsed_data.get("raw_text") or ""))
+    return estimate_tokens(cleaned) > settings.LLM_MAP_REDUCE_THRESHOLD_TOKENS
+
+
+def _sections(raw_text: str) -> List[str]:
+    """Natural units of the document: pages, else blank-line sections."""
+    pages = [p for p in raw_text.split(PAGE_BREAK) if p.strip()]
+    if len(pages) > 1:
+        return pages
+    return [s for s in re.split(r"\n\s*\n", raw_text) if s.strip()]
+
+
+def _split_oversized(section: str, limit: int) -> List[str]:
+    """Split a single section that exceeds ``limit`` tokens on lines."""
+    pieces: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in section.splitlines():
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > limit:
+            pieces.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_text(raw_text: str, parts: Optional[int] = None) -> List[str]:
+    """Pack pages/sections into parts of at most ``LLM_MAP_CHUNK_TOKENS``.
+
+    The chunk size grows when needed so there are never more than
+    ``LLM_MAP_MAX_PARTS`` parts.  With ``parts`` the text is instead cut
+    into (about) that many equal parts regardless of its length.
+    """
+    units = _sections(raw_text)
+    total = sum(estimate_tokens(u) for u in units)
+    if parts:
+        limit = max(-(-total // parts), 1)
+    else:
+        limit = max(settings.LLM_MAP_CHUNK_TOKENS, -(-total // max(settings.LLM_MAP_MAX_PARTS, 1)))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    for unit in units:
+        cost = estimate_tokens(unit)
+        pieces = _split_oversized(unit, limit) if cost > limit else [unit]
+        for piece in pieces:
+            cost = estimate_tokens(piece)
+            if current and used + cost > limit:
+                chunks.append("\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def split_parsed(parsed_data: dict, parts: Optional[int] = None) -> List[dict]:
+    """Return one parser payload per part (raw_text + its own tests/medicines)."""
+    payloads = []
+    for text in split_text(str(parsed_data.get("raw_text") or ""), parts):
+        part = parse_medical_text(text)
+        part["raw_text"] = text
+        payloads.append(part)
+    return payloads
+
+
+def remainder_parsed(parsed_data: dict, partial: dict) -> Optional[dict]:
+    """Parser payload for what a salvaged partial result doesn't explain yet.
+
+    Keeps only the parsed tests / medicines missing from ``partial`` and
+    the raw-text lines that mention them.  Returns None when nothing is
+    missing.
+    """
+    explained = " | ".join(
+        str(entry.get("test_name") or entry.get("name") or "").lower()
+        for key in ("abnormal_values", "normal_values", "medicines")
+        for entry in partial.get(key) or []
+        if isinstance(entry, dict)
+    )
+
+    def names(entity: dict, lookup) -> set:
+        return (lookup(str(entity.get("id") or "").lower()) | {str(entity.get("name") or "").lower()}) - {""}
+
+    tests = [t for t in parsed_data.get("tests", []) or []
+             if isinstance(t, dict) and not mentions(explained, names(t, catalog_test_names))]
+    medicines = [m for m in parsed_data.get("medicines", []) or []
+                 if isinstance(m, dict) and not mentions(explained, names(m, catalog_medicine_names))]
+    if not tests and not medicines:
+        return None
+
+    wanted = set()
+    for t in tests:
+        wanted |= names(t, catalog_test_names)
+    for m in medicines:
+        wanted |= names(m, catalog_medicine_names)
+    lines = [line for line in str(parsed_data.get("raw_text") or "").splitlines()
+             if mentions(line.lower(), wanted)]
+    return {**parsed_data, "tests": tests, "medicines": medicines, "raw_text": "\n".join(lines)}
+
+
+# ── Reduce: merge ─────────────────────────────────────────────────────
+
+def _key(value) -> str:
+    return re.sub(r"\s+", " ", str(value or "")).strip().lower()
+
+
+def _union(lists: List[list], limit: int) -> list:
+    merged: Dict[str, object] = {}
+    for items in lists:
+        for item in items or []:
+            merged.setdefault(_key(item), item)
+    return list(merged.values())[:limit]
+
+
+def _merge_input_summary(parts: List[dict]) -> dict:
+    summaries = [p.get("input_summary") or {} for p in parts]
+    merged = {}
+    for field in ("detected_language", "detected_hospital", "date_of_report"):
+        merged[field] = next((s.get(field) for s in summaries if s.get(field)), None)
+    doc_types = Counter(s.get("document_type") for s in summaries if s.get("document_type"))
+    merged["document_type"] = doc_types.most_common(1)[0][0] if doc_types else "medical_report"
+    return merged
+
+
+def _summary(abnormal: List[dict], normal: List[dict], medicines: List[dict]) -> str:
+    total = len(abnormal) + len(normal)
+    if abnormal:
+        names = ", ".join(a.get("test_name", "") for a in abnormal[:6])
+        more = f" and {len(abnormal) - 6} more" if len(abnormal) > 6 else ""
+        text = (
+            f"{len(abnormal)} of {total} test value(s) are outside the normal "
+            f"range: {names}{more}."
+        )
+    elif total:
+        text = f"All {total} detected test values are within normal ranges."
+    else:
+        text = "No lab test values were detected."
+    if medicines:
+        text += f" {len(medicines)} medicine(s) are explained below."
+    return text
+
+
+def _merge_prompt_stats(parts: List[dict]) -> dict:
+    stats = [p.get("_prompt_stats") for p in parts if p.get("_prompt_stats")]
+    merged = {k: sum(s.get(k, 0) for s in stats) for k in _SUMMED_PROMPT_STATS}
+    merged["raw_text_truncated"] = any(s.get("raw_text_truncated") for s in stats)
+    merged["map_parts"] = len(parts)
+    return merged
+
+
+def merge_results(parts: List[dict]) -> dict:
+    """Combine per-part explanations into one result (no LLM call).
+
+    A test reported by several parts is kept once; if parts disagree on
+    whether it is abnormal, the abnormal entry wins.  The merged result
+    names the LLM model/provider only when every part came from the LLM;
+    otherwise it counts its rule-based parts in ``_fallback_parts`` and
+    takes the lowest part confidence.
+    """
+    seen = set()
+    abnormal: List[dict] = []
+    normal: List[dict] = []
+    for bucket, target in (("abnormal_values", abnormal), ("normal_values", normal)):
+        for part in parts:
+            for entry in part.get(bucket) or []:
+                key = (_key(entry.get("test_name")), _key(entry.get("value")))
+                if key in seen:
+                    continue
+                seen.add(key)
+                target.append(entry)
+
+    medicines: Dict[str, dict] = {}
+    for part in parts:
+        for med in part.get("medicines") or []:
+            medicines.setdefault(_key(med.get("name")), med)
+    medicine_list = list(medicines.values())
+
+    urgency = max(
+        (p.get("urgency_level") for p in parts if p.get("urgency_level") in _URGENCY_RANK),
+        key=_URGENCY_RANK.get,
+        default="routine",
+    )
+    confidences = [p.get("confidence_score") for p in parts
+                   if isinstance(p.get("confidence_score"), (int, float))]
+
+    merged = {
+        "disclaimer": next((p["disclaimer"] for p in parts if p.get("disclaimer")), ""),
+        "input_summary": _merge_input_summary(parts),
+        "abnormal_values": abnormal,
+        "urgency_level": urgency,
+        "red_flags": _union([p.get("red_flags") for p in parts], 10),
+        "normal_values": normal,
+        "medicines": medicine_list,
+        "overall_summary": _summary(abnormal, normal, medicine_list),
+        "questions_to_ask_doctor": _union([p.get("questions_to_ask_doctor") for p in parts], 10),
+        "next_steps": _union([p.get("next_steps") for p in parts], 8),
+        "confidence_score": round(sum(confidences) / len(confidences), 3) if confidences else 0.0,
+        "_prompt_stats": _merge_prompt_stats(parts),
+    }
+
+    fallback_parts = sum(1 for p in parts if not p.get("_llm_provider_used"))
+    if fallback_parts:
+        merged["_fallback_parts"] = fallback_parts
+        merged["confidence_score"] = min(confidences, default=0.0)
+    else:
+        for internal in ("_llm_model_used", "_llm_provider_used"):
+            value = next((p[internal] for p in parts if p.get(internal)), None)
+            if value:
+                merged[internal] = value
+    return merged
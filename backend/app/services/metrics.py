@@ -0,0 +1,95 @@
+"""
+Lightweight operational counters shared across processes via Redis.
+
+Each metric group is a Redis hash (``metrics:<group>``) of integer
+counters, e.g. ``incr("llm_hedge", "launched")``.  ``incr`` only adds to
+an in-process buffer — it is called from coroutines on the worker's
+event loop and must never wait on Redis.  A daemon thread writes the
+buffer every ``METRICS_FLUSH_INTERVAL_SEC`` as one pipeline of HINCRBYs
+(and once more at exit).  Writes are best-effort: a Redis outage must
+never fail a job because of metrics; counts that fail to flush are
+dropped.  Read them back with ``get_counters`` or ``GET /admin/metrics``.
+"""
+
+import atexit
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.redis_client import get_redis_client
+
+logger = get_logger("metrics")
+
+_PREFIX = "metrics:"
+
+_pending: Dict[Tuple[str, str], int] = {}
+_pending_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_flusher_pid: Optional[int] = None
+
+
+def incr(group: str, field: str, amount: int = 1):
+    """Increment a counter in a metric group (buffered; never blocks on Redis)."""
+    key = (group, field)
+    with _pending_lock:
+        _pending[key] = _pending.get(key, 0) + amount
+    _ensure_flusher()
+
+
+def flush():
+    """Write the buffered counts to Redis in one pipeline."""
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for (group, field), amount in pending.items():
+            pipe.hincrby(f"{_PREFIX}{group}", field, amount)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Metric flush failed ({len(pending)} counters dropped): {e}")
+
+
+def _flush_loop():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_INTERVAL_SEC)
+        flush()
+
+
+def _ensure_flusher():
+    global _flusher, _flusher_pid
+    # A forked worker inherits the flag but not the thread.
+    if _flusher_pid == os.getpid():
+        return
+    with _pending_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+        _flusher.start()
+        _flusher_pid = os.getpid()
+
+
+atexit.register(flush)
+
+
+def get_counters(group: str) -> Dict[str, int]:
+    """Return every counter in a metric group."""
+    flush()
+    raw = get_redis_client().hgetall(f"{_PREFIX}{group}") or {}
+    return {k: int(float(v)) for k, v in raw.items()}
+
+
+def all_counters() -> Dict[str, Dict[str, int]]:
+    """Return every metric group."""
+    flush()
+    r = get_redis_client()
+    groups = {}
+    for key in r.scan_iter(match=f"{_PREFIX}*"):
+        group = key[len(_PREFIX):]
+        groups[group] = get_counters(group)
+    return groups
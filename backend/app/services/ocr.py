@@ -4,6 +4,10 @@ import pdfplumber
 import os
 from pdf2image import convert_from_path
 
+# Pages of a multi-page PDF are joined with a form feed so later stages
+# (map-reduce LLM processing) can split the document back into pages.
+PAGE_BREAK = "\f"
+
 
 def extract_text(file_path: str) -> str:
     """Extract text from a PDF or image file."""
@@ -49,5 +53,5 @@ def _extract_from_pdf(file_path: str) -> str:
             if text.strip():
                 text_chunks.append(text)
 
-    return "\n".join(text_chunks).strip()
+    return f"\n{PAGE_BREAK}\n".join(text_chunks).strip()
 
@@ -15,6 +15,7 @@ from app.core.logging import get_logger
 logger = get_logger("redis")
 
 _redis_client: Optional[redis.Redis] = None
+_redis_binary_client: Optional[redis.Redis] = None
 
 
 def get_redis_client() -> redis.Redis:
@@ -27,3 +28,12 @@ def get_redis_client() -> redis.Redis:
         )
         logger.info("Shared Redis client initialised")
     return _redis_client
+
+
+def get_redis_binary_client() -> redis.Redis:
+    """Shared client returning raw bytes (for packed binary values)."""
+    global _redis_binary_client
+    if _redis_binary_client is None:
+        _redis_binary_client = redis.Redis.from_url(settings.REDIS_URL)
+        logger.info("Shared binary Redis client initialised")
+    return _redis_binary_client
@@ -72,6 +72,13 @@ def sanitize_result(data: Dict[str, Any]) -> Dict[str, Any]:
     metadata["llm_provider"] = _ensure_str(metadata.get("llm_provider"), "unknown")
     metadata["model"] = _ensure_str(metadata.get("model"), "unknown")
     metadata["cached"] = bool(metadata.get("cached", False))
+    metadata["provisional"] = bool(metadata.get("provisional", False))
+    data["provisional"] = bool(data.get("provisional") or metadata["provisional"])
+    if metadata.get("version") is not None:
+        try:
+            metadata["version"] = int(metadata["version"])
+        except Exception:
+            metadata.pop("version")
     data["metadata"] = metadata
 
     input_summary = data.get("input_summary") or {}
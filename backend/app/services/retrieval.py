@@ -1,73 +1,275 @@
-"""RAG retrieval service — pgvector + Jina AI embeddings.
+"""RAG retrieval service — pgvector + text embeddings (Jina or local).
 
-Embeds parsed data via Jina API and queries PostgreSQL with pgvector
-for cosine similarity search. Returns [] when RAG_ENABLED=false or
+By default (``RAG_RETRIEVAL_MODE=vector``) the top-k chunks come from
+embedding parsed data (``EMBEDDING_PROVIDER``) and
+querying PostgreSQL with pgvector for cosine similarity search
+(or the in-process ``vector_index`` with ``RAG_VECTOR_BACKEND=memory``). Returns [] when RAG_ENABLED=false or
 the embedding service is unavailable.
+
+With ``RAG_RETRIEVAL_MODE=entity`` the chunks of the catalog entities
+the parser already resolved are fetched by ``entity_id`` first and
+vector search only fills the rest of the budget.
+``RAG_RETRIEVAL_MODE=multi`` instead searches one query per parsed
+entity; all of them are embedded in one call and looked up in one SQL
+statement (``_search_many``).
+
+Query embeddings are cached (see ``embedding_cache``); the worker uses
+``retrieve_context_async``, whose cache misses are micro-batched with
+other in-flight jobs (see ``embeddings``).
 """
 
+import asyncio
 import hashlib
 from typing import Dict, List, Optional
 
-import httpx
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.db.pg_copy import copy_buffer
 from app.db.session import SessionLocal
+from app.services import metrics, vector_index
+from app.services.embedding_providers import get_embedding_provider
+from app.services.embeddings import embed_queries, embed_queries_async, embed_sync
+from app.services.llm_providers.routing import is_abnormal
+from app.services.llm_providers.tokens import estimate_tokens
 
 logger = get_logger("retrieval")
 
-# Jina API endpoint
-JINA_EMBED_URL = "https://api.jina.ai/v1/embeddings"
-
 # Similarity threshold — cosine distance (1 - similarity); lower = more similar
 SIMILARITY_THRESHOLD = 0.6
 
 
-# ── Embedding via Jina AI ────────────────────────────────────────────
+# ── Entity-keyed lookup ──────────────────────────────────────────────
 
+# Chunk order within one entity (catalog tests have a factual and a
+# clinical chunk; medicines have one untyped chunk).
+_CHUNK_PRIORITY = {"factual": 0, "clinical": 1}
 
-def _embed(texts: List[str]) -> List[List[float]]:
-    """Embed texts using the Jina AI embeddings API."""
-    if not settings.JINA_API_KEY:
-        raise RuntimeError("JINA_API_KEY is not configured")
 
-    headers = {
-        "Authorization": f"Bearer {settings.JINA_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": settings.JINA_EMBEDDING_MODEL,
-        "input": texts,
-        "task": "text-matching",
-        "dimensions": settings.JINA_DIMENSIONS,
-        "late_chunking": False,
-        "truncate": True,
-    }
+def _entity_ids(parsed_data: Dict) -> List[str]:
+    """Catalog ids the parser resolved: abnormal tests, other tests, medicines."""
+    tests = [t for t in parsed_data.get("tests", []) or [] if isinstance(t, dict) and t.get("id")]
+    ordered = [t["id"] for t in tests if is_abnormal(t)] + [t["id"] for t in tests]
+    ordered += [m["id"] for m in parsed_data.get("medicines", []) or [] if isinstance(m, dict) and m.get("id")]
+    return list(dict.fromkeys(str(i) for i in ordered))
+
+
+def _fetch_entities(entity_ids: List[str], top_k: int) -> List[tuple]:
+    """Up to ``top_k`` (id, content) chunks for the entities, in one query.
+
+    Every entity gets its first chunk before any gets a second, so a
+    report with many tests still covers as many of them as possible.
+    """
+    if not entity_ids or top_k <= 0:
+        return []
+
+    if settings.RAG_VECTOR_BACKEND == "memory":
+        rows = vector_index.get_index().fetch_entities(entity_ids)
+    else:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                text("""
+                    SELECT id, entity_id, chunk_type, content
+                    FROM medical_knowledge
+                    WHERE entity_id IN :entity_ids
+                """).bindparams(bindparam("entity_ids", expanding=True)),
+                {"entity_ids": entity_ids},
+            ).fetchall()
+        finally:
+            db.close()
+
+    priority = {eid: i for i, eid in enumerate(entity_ids)}
+    per_entity: Dict[str, list] = {}
+    for row in sorted(rows, key=lambda r: (_CHUNK_PRIORITY.get(r[2], 2), r[0])):
+        per_entity.setdefault(row[1], []).append(row)
+    ranked = sorted(
+        (rank, priority[eid], row)
+        for eid, entity_rows in per_entity.items()
+        for rank, row in enumerate(entity_rows)
+    )
+    return [(row[0], row[3]) for _, _, row in ranked[:top_k]]
+
+
+# ── Vector search ────────────────────────────────────────────────────
+
+
+_ITERATIVE_SCAN_MODES = ("relaxed_order", "strict_order")
+
+
+def apply_ann_settings(db, top_k: int):
+    """Set the ANN query tunables for the current transaction."""
+    ef_search = max(int(settings.RAG_HNSW_EF_SEARCH), top_k)
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    db.execute(text(f"SET LOCAL ivfflat.probes = {max(int(settings.RAG_IVFFLAT_PROBES), 1)}"))
+    if settings.RAG_HNSW_ITERATIVE_SCAN in _ITERATIVE_SCAN_MODES:
+        db.execute(text(f"SET LOCAL hnsw.iterative_scan = {settings.RAG_HNSW_ITERATIVE_SCAN}"))
+
+
+def _search(query_embedding: List[float], top_k: int, exclude_ids: Optional[List[int]] = None) -> list:
+    if settings.RAG_VECTOR_BACKEND == "memory":
+        return vector_index.get_index().search(query_embedding, top_k, exclude_ids)
 
-    response = httpx.post(
-        JINA_EMBED_URL,
-        json=payload,
-        headers=headers,
-        timeout=30.0,
+    db = SessionLocal()
+    try:
+        apply_ann_settings(db, top_k)
+        # pgvector cosine distance operator: <=>
+        # Returns distance (0 = identical, 2 = opposite)
+        if exclude_ids:
+            statement = text("""
+                SELECT content, (embedding <=> CAST(:qvec AS vector)) AS distance
+                FROM medical_knowledge
+                WHERE id NOT IN :exclude_ids
+                ORDER BY embedding <=> CAST(:qvec AS vector)
+                LIMIT :top_k
+            """).bindparams(bindparam("exclude_ids", expanding=True))
+        else:
+            statement = text("""
+                SELECT content, (embedding <=> CAST(:qvec AS vector)) AS distance
+                FROM medical_knowledge
+                ORDER BY embedding <=> CAST(:qvec AS vector)
+                LIMIT :top_k
+            """)
+        result = db.execute(
+            statement,
+            {"qvec": str(query_embedding), "top_k": top_k, "exclude_ids": exclude_ids or []},
+        )
+        return result.fetchall()
+    finally:
+        db.close()
+
+
+def _filter(rows: list, query: str) -> List[str]:
+    # Filter by similarity threshold
+    filtered = [row[0] for row in rows if row[1] < SIMILARITY_THRESHOLD]
+
+    logger.info(
+        "RAG retrieved %d/%d chunks (query=%s...)",
+        len(filtered),
+        len(rows),
+        query[:60],
     )
-    response.raise_for_status()
+    return filtered
+
 
-    data = response.json()
-    # Sort by index to ensure order matches input
-    embeddings = sorted(data["data"], key=lambda x: x["index"])
-    return [item["embedding"] for item in embeddings]
+# ── Multi-query search ───────────────────────────────────────────────
+
+
+def _entity_queries(parsed_data: Dict) -> List[str]:
+    """Per-entity queries (abnormal tests first), capped at RAG_MULTI_QUERY_MAX."""
+    tests = [t for t in parsed_data.get("tests", []) or [] if isinstance(t, dict)]
+    ordered = {"tests": [t for t in tests if is_abnormal(t)] + [t for t in tests if not is_abnormal(t)]}
+    ordered["medicines"] = parsed_data.get("medicines", []) or []
+    queries = [q for q in _query_parts(ordered) if q]
+    return list(dict.fromkeys(queries))[:max(settings.RAG_MULTI_QUERY_MAX, 1)]
+
+
+def _search_many(query_embeddings: List[List[float]], per_query: int) -> List[List[tuple]]:
+    """Nearest (id, content, distance) rows per query, in one round trip.
+
+    pgvector: a VALUES list of query vectors LATERAL-joined to an ordered,
+    limited scan, so each query still uses the ANN index.
+    """
+    if not query_embeddings:
+        return []
+
+    if settings.RAG_VECTOR_BACKEND == "memory":
+        index = vector_index.get_index()
+        return [
+            [(index.rows[i]["id"], index.rows[i]["content"], d) for i, d in index.nearest(q, per_query)]
+            for q in query_embeddings
+        ]
+
+    values = ", ".join(f"({i}, CAST(:q{i} AS vector))" for i in range(len(query_embeddings)))
+    params = {f"q{i}": str(q) for i, q in enumerate(query_embeddings)}
+    params["per_query"] = per_query
+
+    db = SessionLocal()
+    try:
+        apply_ann_settings(db, per_query)
+        rows = db.execute(
+            text(f"""
+                SELECT q.idx, k.id, k.content, k.distance
+                FROM (VALUES {values}) AS q(idx, qvec)
+                CROSS JOIN LATERAL (
+                    SELECT id, content, (embedding <=> q.qvec) AS distance
+                    FROM medical_knowledge
+                    ORDER BY embedding <=> q.qvec
+                    LIMIT :per_query
+                ) AS k
+                ORDER BY q.idx, k.distance
+            """),
+            params,
+        ).fetchall()
+    finally:
+        db.close()
+
+    results: List[List[tuple]] = [[] for _ in query_embeddings]
+    for idx, chunk_id, content, distance in rows:
+        results[idx].append((chunk_id, content, distance))
+    return results
+
+
+def _merge(results: List[List[tuple]], budget_tokens: int) -> List[str]:
+    """Round-robin by rank across queries, deduplicated, within the token budget.
+
+    Every entity's best match is taken before anyone's second best.
+    """
+    seen = set()
+    chunks: List[str] = []
+    used = 0
+    depth = max((len(r) for r in results), default=0)
+    for rank in range(depth):
+        for rows in results:
+            if rank >= len(rows):
+                continue
+            chunk_id, content, distance = rows[rank]
+            if chunk_id in seen or distance >= SIMILARITY_THRESHOLD:
+                continue
+            cost = estimate_tokens(content)
+            if used + cost > budget_tokens:
+                continue
+            seen.add(chunk_id)
+            chunks.append(content)
+            used += cost
+    return chunks
+
+
+def _multi_query_retrieve(queries: List[str], query_embeddings: List[List[float]]) -> List[str]:
+    results = _search_many(query_embeddings, max(settings.RAG_MULTI_PER_QUERY, 1))
+    chunks = _merge(results, settings.RAG_MULTI_TOKEN_BUDGET)
+    metrics.incr("retrieval", "multi_queries", len(queries))
+    logger.info("RAG multi-query: %d chunks from %d entity queries", len(chunks), len(queries))
+    return chunks
 
 
 # ── Public API ────────────────────────────────────────────────────────
 
 
+def _entity_chunks(parsed_data: Dict, top_k: int) -> List[tuple]:
+    if settings.RAG_RETRIEVAL_MODE != "entity":
+        return []
+    chunks = _fetch_entities(_entity_ids(parsed_data), top_k)
+    metrics.incr("retrieval", "entity_chunks", len(chunks))
+    if len(chunks) >= top_k:
+        metrics.incr("retrieval", "embedding_skipped")
+    return chunks
+
+
 def retrieve_context(
     parsed_data: Dict,
     top_k: Optional[int] = None,
 ) -> List[str]:
     """Return the top-k knowledge chunks most relevant to parsed_data.
     Returns [] when RAG is disabled or the service is unavailable.
+
+    With ``RAG_RETRIEVAL_MODE=entity`` the chunks of the catalog entities
+    the parser resolved are fetched directly by ``entity_id``; vector
+    search only fills what is left of ``top_k``.  ``multi`` embeds one
+    query per entity in a single batch and searches them all in one SQL
+    statement; results are merged under ``RAG_MULTI_TOKEN_BUDGET``
+    (``top_k`` does not apply).
     """
     if not settings.RAG_ENABLED:
         return []
@@ -75,47 +277,67 @@ def retrieve_context(
     top_k = top_k or settings.RAG_TOP_K
 
     try:
+        if settings.RAG_RETRIEVAL_MODE == "multi":
+            queries = _entity_queries(parsed_data)
+            return _multi_query_retrieve(queries, embed_queries(queries)) if queries else []
+
+        found = _entity_chunks(parsed_data, top_k)
+        chunks = [content for _, content in found]
         query = _build_query(parsed_data)
-        if not query:
-            return []
+        if len(chunks) >= top_k or not query:
+            return chunks
 
-        query_embedding = _embed([query])[0]
+        query_embedding = embed_queries([query])[0]
+        rows = _search(query_embedding, top_k - len(chunks), [chunk_id for chunk_id, _ in found])
+        return chunks + _filter(rows, query)
 
-        db = SessionLocal()
-        try:
-            # pgvector cosine distance operator: <=>
-            # Returns distance (0 = identical, 2 = opposite)
-            result = db.execute(
-                text("""
-                    SELECT content, (embedding <=> CAST(:qvec AS vector)) AS distance
-                    FROM medical_knowledge
-                    ORDER BY embedding <=> CAST(:qvec AS vector)
-                    LIMIT :top_k
-                """),
-                {"qvec": str(query_embedding), "top_k": top_k},
-            )
-            rows = result.fetchall()
-        finally:
-            db.close()
+    except Exception as e:
+        logger.warning("RAG retrieval failed (graceful degrade): %s", e)
+        return []
 
-        # Filter by similarity threshold
-        filtered = [row[0] for row in rows if row[1] < SIMILARITY_THRESHOLD]
 
-        logger.info(
-            "RAG retrieved %d/%d chunks (query=%s...)",
-            len(filtered),
-            len(rows),
-            query[:60],
+async def retrieve_context_async(
+    parsed_data: Dict,
+    top_k: Optional[int] = None,
+    executor=None,
+) -> List[str]:
+    """``retrieve_context`` with a micro-batched async query embedding.
+
+    Database queries still run on ``executor`` (default thread pool).
+    """
+    if not settings.RAG_ENABLED:
+        return []
+
+    top_k = top_k or settings.RAG_TOP_K
+
+    try:
+        loop = asyncio.get_running_loop()
+        if settings.RAG_RETRIEVAL_MODE == "multi":
+            queries = _entity_queries(parsed_data)
+            if not queries:
+                return []
+            query_embeddings = await embed_queries_async(queries)
+            return await loop.run_in_executor(executor, _multi_query_retrieve, queries, query_embeddings)
+
+        found = await loop.run_in_executor(executor, _entity_chunks, parsed_data, top_k)
+        chunks = [content for _, content in found]
+        query = _build_query(parsed_data)
+        if len(chunks) >= top_k or not query:
+            return chunks
+
+        query_embedding = (await embed_queries_async([query]))[0]
+        rows = await loop.run_in_executor(
+            executor, _search, query_embedding, top_k - len(chunks), [chunk_id for chunk_id, _ in found]
         )
-        return filtered
+        return chunks + _filter(rows, query)
 
     except Exception as e:
         logger.warning("RAG retrieval failed (graceful degrade): %s", e)
         return []
 
 
-def _build_query(parsed_data: Dict) -> str:
-    """Construct a semantic search query from parsed data."""
+def _query_parts(parsed_data: Dict) -> List[str]:
+    """One query string per parsed test / medicine."""
     parts = []
 
     for test in parsed_data.get("tests", []):
@@ -128,70 +350,185 @@ def _build_query(parsed_data: Dict) -> str:
         name = med.get("name", "") if isinstance(med, dict) else str(med)
         parts.append(name)
 
-    return " ".join(parts)
+    return parts
+
+
+def _build_query(parsed_data: Dict) -> str:
+    """Construct a semantic search query from parsed data."""
+    return " ".join(_query_parts(parsed_data))
 
 
 # ── Indexing (used by ingestion scripts) ─────────────────────────────
 
 
-def index_documents(
-    documents: List[str],
-    metadatas: Optional[List[Dict]] = None,
-    ids: Optional[List[str]] = None,
-) -> int:
-    """Embed documents via Jina and upsert into PostgreSQL. Returns count indexed."""
-    if not documents:
-        return 0
+_STAGE_COLUMNS = ("content", "embedding", "source", "entity_id", "chunk_type", "metadata", "content_hash")
+_STAGE_TYPES = ["text", "vector", "text", "text", "text", "jsonb", "text"]
+
 
+def content_hash(content: str) -> str:
+    """Change-detection hash; covers the embedding model so switching it re-embeds."""
+    blob = f"{get_embedding_provider().model_id}:{settings.JINA_DIMENSIONS}\n{content}"
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _chunks_by_key(
+    documents: List[str],
+    metadatas: Optional[List[Dict]],
+    ids: Optional[List[str]],
+) -> Dict[tuple, str]:
+    """Content per (source, entity_id, chunk_type); a later duplicate wins."""
     if ids is None:
         ids = [hashlib.md5(doc.encode()).hexdigest() for doc in documents]
 
     if metadatas is None:
         metadatas = [{}] * len(documents)
 
-    # Embed in batches of 64 (Jina API batch limit)
-    batch_size = 64
-    all_embeddings: List[List[float]] = []
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i: i + batch_size]
-        all_embeddings.extend(_embed(batch))
+    chunks: Dict[tuple, str] = {}
+    for doc, meta, doc_id in zip(documents, metadatas, ids):
+        source = meta.get("source", "unknown")
+        entity_id = meta.get("test_id") or meta.get("med_id") or doc_id
+        chunks[(source, entity_id, meta.get("chunk_type"))] = doc
+    return chunks
+
+
+def _embed_all(documents: List[str]) -> List[List[float]]:
+    # The provider splits this into batches it accepts (64 for Jina).
+    return embed_sync(documents) if documents else []
+
+
+def _index_rows(chunks: Dict[tuple, str]) -> List[tuple]:
+    """Embed chunks into COPY rows (``_STAGE_COLUMNS`` order)."""
+    keys = list(chunks)
+    embeddings = _embed_all([chunks[k] for k in keys])
+    return [
+        (chunks[key], emb, *key, "{}", content_hash(chunks[key]))
+        for key, emb in zip(keys, embeddings)
+    ]
+
+
+def _bulk_upsert(db, rows: List[tuple]):
+    """Binary COPY into a temp table, then one set-based upsert.
 
+    Relies on the (source, entity_id, chunk_type) unique index (migration 0007).
+    """
+    if not rows:
+        return
+    db.execute(text(
+        "CREATE TEMP TABLE mk_stage (LIKE medical_knowledge INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY mk_stage ({', '.join(_STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+            copy_buffer(rows, _STAGE_TYPES),
+        )
+    finally:
+        cursor.close()
+    db.execute(text("""
+        INSERT INTO medical_knowledge (content, embedding, source, entity_id, chunk_type, metadata, content_hash, created_at)
+        SELECT content, embedding, source, entity_id, chunk_type, metadata, content_hash, now()
+        FROM mk_stage
+        ON CONFLICT (source, entity_id, chunk_type) DO UPDATE
+        SET content = EXCLUDED.content,
+            embedding = EXCLUDED.embedding,
+            metadata = EXCLUDED.metadata,
+            content_hash = EXCLUDED.content_hash,
+            created_at = EXCLUDED.created_at
+    """))
+
+
+def _write(rows: List[tuple], delete_ids: Optional[List[int]] = None):
     db = SessionLocal()
     try:
-        # Upsert: delete matching rows then insert fresh
-        for i, (doc, emb, meta) in enumerate(zip(documents, all_embeddings, metadatas)):
-            source = meta.get("source", "unknown")
-            entity_id = meta.get("test_id") or meta.get("med_id") or ids[i]
-            chunk_type = meta.get("chunk_type")
-
+        _bulk_upsert(db, rows)
+        if delete_ids:
             db.execute(
-                text("DELETE FROM medical_knowledge WHERE entity_id = :eid AND chunk_type IS NOT DISTINCT FROM :ct AND source = :src"),
-                {"eid": entity_id, "ct": chunk_type, "src": source},
+                text("DELETE FROM medical_knowledge WHERE id IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": delete_ids},
             )
-            db.execute(
-                text("""
-                    INSERT INTO medical_knowledge (content, embedding, source, entity_id, chunk_type, metadata)
-                    VALUES (:content, CAST(:embedding AS vector), :source, :entity_id, :chunk_type, CAST(:metadata AS jsonb))
-                """),
-                {
-                    "content": doc,
-                    "embedding": str(emb),
-                    "source": source,
-                    "entity_id": entity_id,
-                    "chunk_type": chunk_type,
-                    "metadata": "{}",
-                },
-            )
-
         db.commit()
-        logger.info("Indexed %d documents into medical_knowledge table", len(documents))
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
 
-    return len(documents)
+
+def index_documents(
+    documents: List[str],
+    metadatas: Optional[List[Dict]] = None,
+    ids: Optional[List[str]] = None,
+) -> int:
+    """Embed documents and upsert into PostgreSQL. Returns count indexed.
+
+    Rows are loaded with one binary COPY and one ``INSERT … ON CONFLICT``
+    instead of a DELETE + INSERT round trip per chunk.
+    """
+    if not documents:
+        return 0
+
+    rows = _index_rows(_chunks_by_key(documents, metadatas, ids))
+    _write(rows)
+    logger.info("Indexed %d documents into medical_knowledge table", len(rows))
+    return len(rows)
+
+
+def _stored_hashes(sources: List[str]) -> Dict[tuple, tuple]:
+    """(source, entity_id, chunk_type) → (id, content_hash) for ``sources``."""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+                SELECT id, source, entity_id, chunk_type, content_hash
+                FROM medical_knowledge
+                WHERE source IN :sources
+            """).bindparams(bindparam("sources", expanding=True)),
+            {"sources": sources},
+        ).fetchall()
+    finally:
+        db.close()
+    return {(r[1], r[2], r[3]): (r[0], r[4]) for r in rows}
+
+
+def sync_documents(
+    documents: List[str],
+    metadatas: Optional[List[Dict]] = None,
+    ids: Optional[List[str]] = None,
+    sources: Optional[List[str]] = None,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """Incrementally index: embed only new or changed chunks, delete orphans.
+
+    Chunks are compared with the stored ``content_hash``; stored chunks of
+    ``sources`` (default: the sources present in ``metadatas``) that are no
+    longer produced are deleted.  Rows indexed before hashes existed count
+    as changed once.  Returns the change summary.
+    """
+    chunks = _chunks_by_key(documents, metadatas, ids)
+    sources = sorted(set(sources or []) | {key[0] for key in chunks})
+    stored = _stored_hashes(sources) if sources else {}
+
+    added = [k for k in chunks if k not in stored]
+    changed = [k for k in chunks if k in stored and stored[k][1] != content_hash(chunks[k])]
+    orphans = [row_id for key, (row_id, _) in stored.items() if key not in chunks]
+    summary = {
+        "added": len(added),
+        "changed": len(changed),
+        "unchanged": len(chunks) - len(added) - len(changed),
+        "deleted": len(orphans),
+    }
+
+    if not dry_run and (added or changed or orphans):
+        rows = _index_rows({k: chunks[k] for k in added + changed})
+        _write(rows, orphans)
+    logger.info(
+        "Catalog sync%s: %d added, %d changed, %d unchanged, %d deleted",
+        " (dry run)" if dry_run else "",
+        summary["added"], summary["changed"], summary["unchanged"], summary["deleted"],
+    )
+    return summary
 
 
 def reset_for_testing():
@@ -0,0 +1,173 @@
+"""
+Cross-process single-flight for expensive pipeline steps.
+
+When the same document is submitted twice within seconds, both jobs
+would otherwise run OCR and the LLM side by side — content caches don't
+help because neither has finished yet.  ``single_flight`` makes the
+first caller for a key the *leader*; everyone else becomes a *follower*
+and waits for the leader's result instead of duplicating the work::
+
+    text = await single_flight("ocr", content_hash, run_ocr)
+
+Redis keys (``sf:<namespace>:<key>:…``):
+
+  • ``lock``   — SET NX with a random token and a lease; the leader
+                 renews it while it works.  If the leader dies the lease
+                 expires and the next follower to notice takes over.
+  • ``result`` — the leader's JSON-encoded result, kept for
+                 ``SINGLE_FLIGHT_RESULT_TTL_SEC`` for followers to pick up.
+
+A failed leader releases the lock without a result, so a follower takes
+over; so does a leader whose result ``publish`` rejects (e.g. a
+rule-based fallback that should not be handed to later callers).
+
+Every Redis call runs in the loop's default executor, so a slow Redis
+delays only the caller waiting on it, not the whole worker.  Counters
+live in the ``single_flight`` metric group.  Redis failures fail open —
+the caller just computes the result itself.
+"""
+
+import asyncio
+import functools
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services import metrics
+from app.services.redis_client import get_redis_client
+
+logger = get_logger("single_flight")
+
+# KEYS[1] lock key; ARGV[1] token, ARGV[2] lease (ms)
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1] lock key; ARGV[1] token
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_POLL_MIN_SEC = 0.1
+_POLL_MAX_SEC = 1.0
+
+
+def _keys(namespace: str, key: str):
+    base = f"sf:{namespace}:{key}"
+    return f"{base}:lock", f"{base}:result"
+
+
+async def _off_loop(fn, *args, **kwargs):
+    """Run a blocking Redis call in the default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+
+def _read_or_acquire(r, lock_key: str, result_key: str, token: str, lease_ms: int) -> Tuple[Optional[Any], bool]:
+    """The published result if there is one, else try to take the lock."""
+    raw = r.get(result_key)
+    if raw is not None:
+        return json.loads(raw), False
+    return None, bool(r.set(lock_key, token, nx=True, px=lease_ms))
+
+
+async def _renew_lease(r, lock_key: str, token: str, lease_ms: int):
+    """Keep the leader's lock alive while it works."""
+    while True:
+        await asyncio.sleep(lease_ms / 3000)
+        try:
+            if not await _off_loop(r.eval, _RENEW_LUA, 1, lock_key, token, lease_ms):
+                logger.warning(f"Single-flight lease lost: {lock_key}")
+                return
+        except Exception as e:
+            logger.debug(f"Single-flight renew failed ({lock_key}): {e}")
+
+
+async def _lead(r, lock_key: str, result_key: str, token: str, compute, publish):
+    lease_ms = int(settings.SINGLE_FLIGHT_LEASE_SEC * 1000)
+    renewer = asyncio.create_task(_renew_lease(r, lock_key, token, lease_ms))
+    try:
+        value = await compute()
+        if publish is not None and not publish(value):
+            logger.info(f"Single-flight result not shared: {result_key}")
+            return value
+        try:
+            await _off_loop(r.setex, result_key, settings.SINGLE_FLIGHT_RESULT_TTL_SEC, json.dumps(value))
+        except Exception as e:
+            logger.debug(f"Single-flight publish failed ({result_key}): {e}")
+        return value
+    finally:
+        renewer.cancel()
+        try:
+            await _off_loop(r.eval, _RELEASE_LUA, 1, lock_key, token)
+        except Exception as e:
+            logger.debug(f"Single-flight release failed ({lock_key}): {e}")
+
+
+async def single_flight(
+    namespace: str,
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    publish: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """Run ``compute`` once per ``(namespace, key)`` across all processes.
+
+    ``compute``'s result must be JSON-serialisable (and not None);
+    followers receive a decoded copy.  When ``publish`` returns False for
+    a result, the leader keeps it to itself and a follower computes its
+    own.  A follower that waits longer than
+    ``SINGLE_FLIGHT_WAIT_TIMEOUT_SEC`` computes the result itself.
+    """
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await compute()
+
+    lock_key, result_key = _keys(namespace, key)
+    token = uuid.uuid4().hex
+    lease_ms = int(settings.SINGLE_FLIGHT_LEASE_SEC * 1000)
+
+    try:
+        r = get_redis_client()
+        cached, acquired = await _off_loop(_read_or_acquire, r, lock_key, result_key, token, lease_ms)
+    except Exception as e:
+        logger.debug(f"Single-flight unavailable ({namespace}): {e}")
+        return await compute()
+
+    if cached is not None:
+        metrics.incr("single_flight", f"{namespace}:result_reused")
+        return cached
+
+    if acquired:
+        metrics.incr("single_flight", f"{namespace}:leader")
+        return await _lead(r, lock_key, result_key, token, compute, publish)
+
+    # Follower: wait for the leader's result, or take over its lease.
+    logger.info(f"Single-flight {namespace}:{key[:12]} in progress elsewhere — waiting")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SINGLE_FLIGHT_WAIT_TIMEOUT_SEC
+    delay = _POLL_MIN_SEC
+    while loop.time() < deadline:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _POLL_MAX_SEC)
+        try:
+            cached, took_over = await _off_loop(_read_or_acquire, r, lock_key, result_key, token, lease_ms)
+        except Exception as e:
+            logger.debug(f"Single-flight poll failed ({namespace}): {e}")
+            return await compute()
+
+        if cached is not None:
+            metrics.incr("single_flight", f"{namespace}:follower_hit")
+            return cached
+        if took_over:
+            logger.info(f"Single-flight {namespace}:{key[:12]}: leader gone, taking over")
+            metrics.incr("single_flight", f"{namespace}:takeover")
+            return await _lead(r, lock_key, result_key, token, compute, publish)
+
+    metrics.incr("single_flight", f"{namespace}:wait_timeout")
+    return await compute()
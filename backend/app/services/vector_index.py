@@ -0,0 +1,206 @@
+"""
+In-process vector index for RAG (``RAG_VECTOR_BACKEND=memory``).
+
+The knowledge base is small (hundreds to low thousands of 512-dim
+vectors), so it fits in one float32 matrix.  Rows are L2-normalised at
+load time; a search is one matrix–vector product plus ``argpartition``
+for the top k, with no database round trip and no pgvector — retrieval
+also works on SQLite / single-node deployments.
+
+The index loads from ``RAG_MEMORY_SNAPSHOT`` when set (``<path>.npy``
+matrix + ``<path>.json`` row metadata, written by ``save_snapshot`` /
+``scripts/index_catalogs.py --export-snapshot``), otherwise from the
+``medical_knowledge`` table.  ``RAG_MEMORY_REFRESH`` picks when it is
+reloaded:
+
+  • ``never`` — loaded once per process;
+  • ``interval`` — reloaded every ``RAG_MEMORY_REFRESH_SEC``;
+  • ``on_change`` — every ``RAG_MEMORY_REFRESH_SEC`` a cheap fingerprint
+    (row count, max id, latest ``created_at``, or the snapshot mtimes) is
+    checked and the index is reloaded only if the catalog changed.  The
+    indexer's upsert keeps a re-embedded row's id but stamps
+    ``created_at = now()``, so edits show up in the fingerprint too.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+
+logger = get_logger("vector_index")
+
+# Row metadata columns kept alongside the matrix.
+_ROW_FIELDS = ("id", "source", "entity_id", "chunk_type", "content")
+
+
+def parse_vector(value) -> List[float]:
+    # pgvector without a registered adapter returns the text form "[0.1,…]".
+    if isinstance(value, str):
+        return [float(x) for x in value.strip("[]").split(",") if x]
+    return list(value)
+
+
+class MemoryVectorIndex:
+    """Normalised float32 matrix + row metadata, searched by cosine distance."""
+
+    def __init__(self, rows: List[Dict], vectors: np.ndarray):
+        self.rows = rows
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(rows), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1.0, norms)
+        self._by_entity: Dict[str, List[int]] = {}
+        for i, row in enumerate(rows):
+            if row.get("entity_id") is not None:
+                self._by_entity.setdefault(row["entity_id"], []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def nearest(
+        self,
+        query: List[float],
+        top_k: int,
+        exclude_ids: Optional[List[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """(row index, cosine distance) of the ``top_k`` nearest rows."""
+        if not self.rows or top_k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        scores = self.matrix @ q
+
+        exclude = set(exclude_ids or [])
+        k = min(top_k + len(exclude), len(self.rows))
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < len(self.rows) else np.arange(len(self.rows))
+        ordered = candidates[np.argsort(-scores[candidates])]
+
+        hits = [(int(i), float(1.0 - scores[i])) for i in ordered if self.rows[i]["id"] not in exclude]
+        return hits[:top_k]
+
+    def search(
+        self,
+        query: List[float],
+        top_k: int,
+        exclude_ids: Optional[List[int]] = None,
+    ) -> List[Tuple[str, float]]:
+        """(content, cosine distance) rows, like the pgvector query."""
+        return [(self.rows[i]["content"], distance) for i, distance in self.nearest(query, top_k, exclude_ids)]
+
+    def fetch_entities(self, entity_ids: List[str]) -> List[tuple]:
+        """(id, entity_id, chunk_type, content) rows for ``entity_ids``."""
+        return [
+            tuple(self.rows[i][f] for f in ("id", "entity_id", "chunk_type", "content"))
+            for eid in entity_ids
+            for i in self._by_entity.get(eid, [])
+        ]
+
+
+# ── Loading / snapshots ──────────────────────────────────────────────
+
+def load_from_db() -> MemoryVectorIndex:
+    db = SessionLocal()
+    try:
+        result = db.execute(text(
+            "SELECT id, source, entity_id, chunk_type, content, embedding FROM medical_knowledge ORDER BY id"
+        )).fetchall()
+    finally:
+        db.close()
+    rows = [dict(zip(_ROW_FIELDS, r[:5])) for r in result]
+    vectors = np.array([parse_vector(r[5]) for r in result], dtype=np.float32)
+    return MemoryVectorIndex(rows, vectors.reshape(len(rows), -1) if rows else np.zeros((0, 0), np.float32))
+
+
+def _snapshot_paths(path: str) -> Tuple[Path, Path]:
+    base = Path(path)
+    if base.suffix == ".npy":
+        base = base.with_suffix("")
+    return base.with_suffix(".npy"), base.with_suffix(".json")
+
+
+def load_snapshot(path: str) -> MemoryVectorIndex:
+    matrix_path, rows_path = _snapshot_paths(path)
+    rows = json.loads(rows_path.read_text(encoding="utf-8"))
+    return MemoryVectorIndex(rows, np.load(matrix_path))
+
+
+def save_snapshot(index: MemoryVectorIndex, path: str):
+    """Write the normalised matrix to ``<path>.npy`` and row metadata to ``<path>.json``."""
+    matrix_path, rows_path = _snapshot_paths(path)
+    matrix_path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(matrix_path, index.matrix)
+    rows_path.write_text(json.dumps(index.rows, ensure_ascii=False), encoding="utf-8")
+
+
+def _fingerprint() -> tuple:
+    if settings.RAG_MEMORY_SNAPSHOT:
+        matrix_path, rows_path = _snapshot_paths(settings.RAG_MEMORY_SNAPSHOT)
+        return tuple(p.stat().st_mtime if p.exists() else None for p in (matrix_path, rows_path))
+    db = SessionLocal()
+    try:
+        return tuple(db.execute(text("SELECT count(*), max(id), max(created_at) FROM medical_knowledge")).one())
+    finally:
+        db.close()
+
+
+def _load() -> MemoryVectorIndex:
+    started = time.monotonic()
+    if settings.RAG_MEMORY_SNAPSHOT:
+        index = load_snapshot(settings.RAG_MEMORY_SNAPSHOT)
+    else:
+        index = load_from_db()
+    logger.info(f"Loaded {len(index)} knowledge vectors in {(time.monotonic() - started) * 1000:.0f} ms")
+    return index
+
+
+# ── Process-wide index ───────────────────────────────────────────────
+
+_index: Optional[MemoryVectorIndex] = None
+_loaded_at = 0.0
+_loaded_fingerprint: Optional[tuple] = None
+_lock = threading.Lock()
+
+
+def _stale(now: float) -> bool:
+    mode = settings.RAG_MEMORY_REFRESH
+    if mode == "never" or now - _loaded_at < settings.RAG_MEMORY_REFRESH_SEC:
+        return False
+    if mode == "interval":
+        return True
+    if mode == "on_change":
+        try:
+            return _fingerprint() != _loaded_fingerprint
+        except Exception as e:
+            logger.debug(f"Knowledge fingerprint check failed: {e}")
+    return False
+
+
+def get_index() -> MemoryVectorIndex:
+    """The loaded index, (re)loading it per ``RAG_MEMORY_REFRESH``."""
+    global _index, _loaded_at, _loaded_fingerprint
+    with _lock:
+        now = time.monotonic()
+        if _index is None or _stale(now):
+            fingerprint = _fingerprint() if settings.RAG_MEMORY_REFRESH == "on_change" else None
+            _index = _load()
+            _loaded_fingerprint = fingerprint
+        # Checked (or reloaded) — wait another interval either way.
+        if now - _loaded_at >= settings.RAG_MEMORY_REFRESH_SEC:
+            _loaded_at = now
+        return _index
+
+
+def reset_index():
+    """Drop the loaded index (tests, or to force a reload)."""
+    global _index, _loaded_at, _loaded_fingerprint
+    with _lock:
+        _index, _loaded_at, _loaded_fingerprint = None, 0.0, None
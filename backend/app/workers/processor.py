@@ -7,12 +7,14 @@ Up to WORKER_CONCURRENCY jobs run concurrently via asyncio.Semaphore.
 """
 
 import asyncio
+import hashlib
 import time
 import traceback
 import tempfile
 import os
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 
 from sqlalchemy.orm import Session
 
@@ -32,28 +34,55 @@ from app.core.constants import (
     STAGE_DONE,
     STAGE_FAILED,
     DEFAULT_PROGRESS_BY_STAGE,
+    RESULT_VERSION_PROVISIONAL,
+    RESULT_VERSION_FINAL,
+    RESULT_VERSION_UPGRADED,
 )
 from app.services.ocr import extract_text
 from app.services.parser import parse_medical_text
-from app.services.llm import generate_explanation_async
-from app.services.retrieval import retrieve_context
+from app.services.coverage import score_coverage
+from app.services.llm import (
+    generate_explanation_async,
+    generate_rule_based_explanation,
+    is_llm_result,
+    llm_request_key,
+)
+from app.services.retrieval import retrieve_context_async
 from app.services.result_sanitizer import sanitize_result
 from app.core.config import settings
 from app.services.queue import pop_job, push_job
 from app.services.redis_client import get_redis_client
 from app.services.cache import set_cached_result
+from app.services.single_flight import single_flight
 from app.services.storage import download_file
+from app.services import http_clients, llm_usage, metrics
 from app.core.logging import get_logger, setup_logging
 
 logger = get_logger("processor")
 
 _executor = ThreadPoolExecutor(max_workers=settings.WORKER_CONCURRENCY)
 
+# Provider/model recorded for rule-based results (fast path, provisional).
+FAST_PATH_PROVIDER = "rules"
+FAST_PATH_MODEL = "catalog"
+
+# Fire-and-forget tasks (LLM upgrades) — referenced so they aren't GC'd.
+_background_tasks: set = set()
+
 
 # ---------------------------------------------------------------------------
 #  Helpers
 # ---------------------------------------------------------------------------
 
+def _file_sha256(path: str) -> str:
+    """Content hash of a downloaded upload (single-flight key for OCR)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def update_job(db: Session, job: Job, status: str, stage: str, progress: int, error_message: str = None):
     """Update job status and progress with database commit and error handling."""
     job.status = status
@@ -146,11 +175,163 @@ def poll_orphaned_queued_jobs() -> list[str]:
 #  #20 – Async job pipeline
 # ---------------------------------------------------------------------------
 
-async def process_job(job_id: str):
+async def _llm_explanation(job_id: str, parsed_data: dict) -> dict:
+    """RAG retrieval + LLM explanation (with failover and fallback)."""
+    # RAG: retrieve relevant knowledge chunks (skipped when RAG_ENABLED=false).
+    # The query embedding is batched with other in-flight jobs.
+    retrieval_context = await retrieve_context_async(parsed_data, executor=_executor)
+    if retrieval_context:
+        logger.info(
+            f"Job {job_id}: RAG retrieved {len(retrieval_context)} chunks"
+        )
+
+    # Identical concurrent requests (same document submitted twice) share
+    # one LLM call; only the job that made the calls is charged for them.
+    # A rule-based fallback is not shared — the next job retries the LLM.
+    with llm_usage.collect() as calls:
+        explanation = await single_flight(
+            "llm",
+            llm_request_key(parsed_data, retrieval_context),
+            lambda: generate_explanation_async(
+                parsed_data, retrieval_context=retrieval_context
+            ),
+            publish=is_llm_result,
+        )
+    explanation["_llm_calls"] = calls
+    return explanation
+
+
+def _store_result(
+    db: Session,
+    job_id: str,
+    explanation: dict,
+    processing_time: int,
+    version: int = RESULT_VERSION_FINAL,
+    provisional: bool = False,
+    extra_metadata: Optional[dict] = None,
+) -> dict:
+    """Sanitize, cache and persist a job's result.
+
+    The stored result is replaced only by an equal or higher ``version``
+    (conditional UPDATE in the DB, compare-and-set in the cache), so a
+    late provisional write can never clobber the final result.
+    """
+    # Pop internal keys so they don't reach the frontend
+    model_used = explanation.pop("_llm_model_used", settings.LLM_MODEL_HEAVY)
+    provider_used = explanation.pop("_llm_provider_used", settings.LLM_PROVIDER)
+    prompt_stats = explanation.pop("_prompt_stats", None)
+    llm_calls = explanation.pop("_llm_calls", None)
+    fallback_parts = explanation.pop("_fallback_parts", 0)
+    if prompt_stats:
+        logger.info(
+            f"Job {job_id} prompt: {prompt_stats['prompt_tokens']} tokens "
+            f"(saved {prompt_stats['tokens_saved']}, "
+            f"RAG {prompt_stats['rag_chunks_used']} used / "
+            f"{prompt_stats['rag_chunks_dropped']} dropped)"
+        )
+        metrics.incr("llm_prompt", "tokens_saved", prompt_stats["tokens_saved"])
+        metrics.incr("llm_prompt", "prompt_tokens", prompt_stats["prompt_tokens"])
+
+    # A provisional result is served while the job is still processing;
+    # pollers must keep going until the final one replaces it.  The
+    # explanation goes first so its own status/provisional keys can't win.
+    result_payload = {
+        **explanation,
+        "job_id": job_id,
+        "status": JOB_STATUS_PROCESSING if provisional else JOB_STATUS_COMPLETED,
+        "provisional": provisional,
+        "metadata": {
+            "processing_time_sec": processing_time,
+            "ocr_engine": settings.OCR_ENGINE,
+            "llm_provider": provider_used,
+            "model": model_used,
+            "cached": False,
+            "provisional": provisional,
+            "version": version,
+            "prompt": prompt_stats,
+            "llm_usage": llm_usage.summarize(llm_calls) if llm_calls else None,
+            "fallback_parts": fallback_parts,
+            **(extra_metadata or {}),
+        }
+    }
+
+    try:
+        safe_result = sanitize_result(result_payload)
+    except Exception:
+        safe_result = sanitize_result({})
+
+    set_cached_result(job_id, safe_result, ttl_sec=3600)
+
+    values = {
+        "result_json": safe_result,
+        "confidence": safe_result.get("confidence_score", 0.0),
+        "processing_time": processing_time,
+        "llm_provider": provider_used,
+        "model": model_used,
+        "cached": False,
+        "version": version,
+        "provisional": provisional,
+    }
+    updated = (
+        db.query(Result)
+        .filter(Result.job_id == job_id, Result.version <= version)
+        .update(values, synchronize_session=False)
+    )
+    if not updated:
+        if db.query(Result.id).filter(Result.job_id == job_id).first() is None:
+            db.add(Result(job_id=job_id, **values))
+        else:
+            logger.info(f"Job {job_id}: kept newer stored result (offered v{version})")
+
+    if llm_calls:
+        doc_type = (safe_result.get("input_summary") or {}).get("document_type")
+        llm_usage.persist_calls(db, job_id, llm_calls, doc_type)
+    return safe_result
+
+
+async def _upgrade_with_llm(job_id: str, parsed_data: dict, start_time: float):
+    """Replace a fast-path result with the LLM's once it is available.
+
+    A failed LLM run (rule-based fallback) leaves the fast-path result.
+    """
+    db = SessionLocal()
+    try:
+        explanation = await _llm_explanation(job_id, parsed_data)
+        if not is_llm_result(explanation):
+            logger.info(f"Job {job_id}: LLM upgrade fell back, keeping fast-path result")
+            llm_usage.persist_calls(db, job_id, explanation.pop("_llm_calls", None) or [])
+            db.commit()
+            return
+        _store_result(db, job_id, explanation, int(time.time() - start_time),
+                      version=RESULT_VERSION_UPGRADED,
+                      extra_metadata={"fast_path": False, "upgraded": True})
+        db.commit()
+        metrics.incr("fast_path", "upgraded")
+        logger.info(f"Job {job_id}: fast-path result upgraded by LLM")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Job {job_id}: LLM upgrade failed: {e}")
+    finally:
+        db.close()
+
+
+async def _guarded_upgrade(
+    sem: Optional[asyncio.Semaphore], job_id: str, parsed_data: dict, start_time: float
+):
+    """Run ``_upgrade_with_llm`` in a worker slot, like any other job."""
+    if sem is None:
+        await _upgrade_with_llm(job_id, parsed_data, start_time)
+        return
+    async with sem:
+        await _upgrade_with_llm(job_id, parsed_data, start_time)
+
+
+async def process_job(job_id: str, sem: Optional[asyncio.Semaphore] = None):
     """Async job processing pipeline: Download → OCR → Parse → LLM → Store.
 
     CPU-bound steps (OCR, parsing) are offloaded to a thread-pool.
-    The LLM call uses the async Groq client.
+    The LLM call uses the async Groq client.  ``sem`` is the worker's
+    concurrency semaphore; a fast-path LLM upgrade waits for a slot in it.
     """
     loop = asyncio.get_running_loop()
     db = SessionLocal()
@@ -173,7 +354,12 @@ async def process_job(job_id: str):
 
         try:
             await loop.run_in_executor(_executor, download_file, job.file_path, local_path)
-            raw_text = await loop.run_in_executor(_executor, extract_text, local_path)
+            file_hash = await loop.run_in_executor(_executor, _file_sha256, local_path)
+            raw_text = await single_flight(
+                "ocr",
+                file_hash,
+                lambda: loop.run_in_executor(_executor, extract_text, local_path),
+            )
         finally:
             if os.path.exists(local_path):
                 os.remove(local_path)
@@ -194,66 +380,58 @@ async def process_job(job_id: str):
             f"{len(raw_text)} OCR chars"
         )
 
-        # Stage 3: Generate explanation via async LLM call
+        # Stage 3: Generate explanation — rule-based fast path when the
+        # parser fully covers the document, otherwise RAG + async LLM call
         update_job(db, job, JOB_STATUS_PROCESSING, STAGE_GENERATING_EXPLANATION,
                    DEFAULT_PROGRESS_BY_STAGE[STAGE_GENERATING_EXPLANATION])
 
-        # RAG: retrieve relevant knowledge chunks (skipped when RAG_ENABLED=false)
-        retrieval_context = await loop.run_in_executor(
-            _executor, retrieve_context, parsed_data
-        )
-        if retrieval_context:
-            logger.info(
-                f"Job {job_id}: RAG retrieved {len(retrieval_context)} chunks"
-            )
-
-        explanation = await generate_explanation_async(
-            parsed_data, retrieval_context=retrieval_context
+        coverage = score_coverage(parsed_data)
+        fast_path = (
+            settings.LLM_FAST_PATH_ENABLED
+            and coverage["score"] >= settings.LLM_FAST_PATH_THRESHOLD
         )
-
-        # Pop internal key so it doesn't reach the frontend
-        model_used = explanation.pop("_llm_model_used", settings.LLM_MODEL_HEAVY)
+        if fast_path:
+            logger.info(f"Job {job_id}: fast path (coverage={coverage['score']})")
+            metrics.incr("fast_path", "served")
+            explanation = generate_rule_based_explanation(parsed_data)
+            explanation["_llm_provider_used"] = FAST_PATH_PROVIDER
+            explanation["_llm_model_used"] = FAST_PATH_MODEL
+        else:
+            metrics.incr("fast_path", "llm")
+            if settings.PROVISIONAL_RESULTS_ENABLED:
+                # Serve a rule-based result right away; the LLM result
+                # replaces it (higher version) when ready.
+                provisional = generate_rule_based_explanation(parsed_data)
+                provisional["_llm_provider_used"] = FAST_PATH_PROVIDER
+                provisional["_llm_model_used"] = FAST_PATH_MODEL
+                # Best-effort: the job goes on to the LLM result either way.
+                try:
+                    _store_result(
+                        db, job.id, provisional, int(time.time() - start_time),
+                        version=RESULT_VERSION_PROVISIONAL, provisional=True,
+                    )
+                    db.commit()
+                    logger.info(f"Job {job_id}: provisional result stored")
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Job {job_id}: provisional result not stored: {e}")
+            explanation = await _llm_explanation(job_id, parsed_data)
 
         # Stage 4: Finalize and store results
         update_job(db, job, JOB_STATUS_PROCESSING, STAGE_FINALIZING,
                    DEFAULT_PROGRESS_BY_STAGE[STAGE_FINALIZING])
 
-        processing_time = int(time.time() - start_time)
-
-        result_payload = {
-            "job_id": job.id,
-            "status": JOB_STATUS_COMPLETED,
-            **explanation,
-            "metadata": {
-                "processing_time_sec": processing_time,
-                "ocr_engine": settings.OCR_ENGINE,
-                "llm_provider": settings.LLM_PROVIDER,
-                "model": model_used,
-                "cached": False
-            }
-        }
-
-        try:
-            safe_result = sanitize_result(result_payload)
-        except Exception:
-            safe_result = sanitize_result({})
-
-        set_cached_result(job.id, safe_result, ttl_sec=3600)
-
-        result_row = Result(
-            job_id=job.id,
-            result_json=safe_result,
-            confidence=safe_result.get("confidence_score", 0.0),
-            processing_time=processing_time,
-            llm_provider=settings.LLM_PROVIDER,
-            model=model_used,
-            cached=False,
-        )
-        db.add(result_row)
+        _store_result(db, job.id, explanation, int(time.time() - start_time),
+                      extra_metadata={"fast_path": fast_path, "coverage": coverage["score"]})
 
         update_job(db, job, JOB_STATUS_COMPLETED, STAGE_DONE,
                    DEFAULT_PROGRESS_BY_STAGE[STAGE_DONE])
 
+        if fast_path and settings.LLM_FAST_PATH_UPGRADE:
+            task = asyncio.create_task(_guarded_upgrade(sem, job_id, parsed_data, start_time))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
     except Exception as e:
         job = db.query(Job).filter(Job.id == job_id).first()
         if job:
@@ -308,7 +486,7 @@ async def _guarded_process(sem: asyncio.Semaphore, job_id: str):
     """Run process_job and release the semaphore when done."""
     try:
         logger.info(f"Processing job {job_id}")
-        await process_job(job_id)
+        await process_job(job_id, sem)
     finally:
         sem.release()
 
@@ -325,10 +503,14 @@ async def run_worker_async():
         f"db_poll_interval={settings.QUEUED_POLL_INTERVAL_SEC}s)"
     )
 
-    await asyncio.gather(
-        _redis_consumer(sem),
-        _db_poller(sem),
-    )
+    try:
+        await asyncio.gather(
+            _redis_consumer(sem),
+            _db_poller(sem),
+        )
+    finally:
+        await http_clients.aclose_all()
+        http_clients.close_all()
 
 
 def run_worker():
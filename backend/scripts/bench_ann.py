@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark ANN search on medical_knowledge against exact search.
+
+Samples stored chunk embeddings as queries (no Jina calls), runs each
+query once as an exact scan (index scans disabled) and once per
+``--ef-search`` value through the HNSW index, and reports recall@k and
+latency percentiles — use it to pick RAG_HNSW_EF_SEARCH.  ``--memory``
+adds the in-process NumPy index (RAG_VECTOR_BACKEND=memory) to the
+comparison, including its load time.
+
+Usage:
+    python scripts/bench_ann.py                          # 200 queries, k=5
+    python scripts/bench_ann.py --queries 500 --k 10
+    python scripts/bench_ann.py --ef-search 20 40 80 160
+    python scripts/bench_ann.py --memory
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+# Add backend to path so we can import app modules
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import text  # noqa: E402
+
+_QUERY = """
+    SELECT id FROM medical_knowledge
+    WHERE id <> :qid
+    ORDER BY embedding <=> CAST(:qvec AS vector)
+    LIMIT :k
+"""
+
+
+def _sample_queries(db, n: int) -> List[Tuple[int, str]]:
+    rows = db.execute(
+        text("SELECT id, embedding::text FROM medical_knowledge ORDER BY random() LIMIT :n"),
+        {"n": n},
+    ).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+def _run(db, qid: int, qvec: str, k: int, ef_search: int = 0) -> Tuple[List[int], float]:
+    """One search in its own transaction; ef_search=0 → exact scan."""
+    try:
+        if ef_search:
+            db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        else:
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+        started = time.perf_counter()
+        ids = [row[0] for row in db.execute(text(_QUERY), {"qid": qid, "qvec": qvec, "k": k})]
+        return ids, (time.perf_counter() - started) * 1000
+    finally:
+        db.rollback()
+
+
+def _pct(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(round(pct * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def _bench_memory(queries: List[Tuple[int, str]], exact: Dict[int, List[int]], k: int) -> Dict:
+    from app.services.vector_index import load_from_db, parse_vector
+
+    started = time.perf_counter()
+    index = load_from_db()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    recalls, latencies = [], []
+    for qid, qvec in queries:
+        vector = parse_vector(qvec)
+        started = time.perf_counter()
+        hits = index.nearest(vector, k, exclude_ids=[qid])
+        latencies.append((time.perf_counter() - started) * 1000)
+        truth = set(exact[qid])
+        found = {index.rows[i]["id"] for i, _ in hits}
+        recalls.append(len(truth & found) / len(truth) if truth else 1.0)
+    log.info("Memory index: %d vectors loaded in %.0f ms", len(index), load_ms)
+    return {"recall": statistics.mean(recalls), "p50_ms": _pct(latencies, 0.5), "p95_ms": _pct(latencies, 0.95)}
+
+
+def benchmark(n_queries: int, k: int, ef_values: List[int], memory: bool = False) -> Dict:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        total = db.execute(text("SELECT count(*) FROM medical_knowledge")).scalar()
+        queries = _sample_queries(db, n_queries)
+        if not queries:
+            raise SystemExit("medical_knowledge is empty — run scripts/index_catalogs.py first")
+        log.info("Benchmarking %d queries, k=%d over %d chunks", len(queries), k, total)
+
+        exact: Dict[int, List[int]] = {}
+        exact_ms: List[float] = []
+        for qid, qvec in queries:
+            ids, ms = _run(db, qid, qvec, k)
+            exact[qid] = ids
+            exact_ms.append(ms)
+
+        report = {"exact": {"recall": 1.0, "p50_ms": _pct(exact_ms, 0.5), "p95_ms": _pct(exact_ms, 0.95)}}
+        for ef in ef_values:
+            recalls, latencies = [], []
+            for qid, qvec in queries:
+                ids, ms = _run(db, qid, qvec, k, ef_search=ef)
+                truth = set(exact[qid])
+                recalls.append(len(truth & set(ids)) / len(truth) if truth else 1.0)
+                latencies.append(ms)
+            report[f"hnsw ef_search={ef}"] = {
+                "recall": statistics.mean(recalls),
+                "p50_ms": _pct(latencies, 0.5),
+                "p95_ms": _pct(latencies, 0.95),
+            }
+        if memory:
+            report["memory (numpy)"] = _bench_memory(queries, exact, k)
+        return report
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of HNSW vs exact search")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled queries")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query (RAG_TOP_K)")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 80, 160])
+    parser.add_argument("--memory", action="store_true", help="Also benchmark the in-process NumPy index")
+    args = parser.parse_args()
+
+    report = benchmark(args.queries, args.k, args.ef_search, memory=args.memory)
+    log.info("%-22s %8s %9s %9s", "search", f"recall@{args.k}", "p50 ms", "p95 ms")
+    for name, row in report.items():
+        log.info("%-22s %8.3f %9.2f %9.2f", name, row["recall"], row["p50_ms"], row["p95_ms"])
+
+
+if __name__ == "__main__":
+    main()
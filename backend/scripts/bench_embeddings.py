@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding provider throughput.
+
+Embeds the catalog knowledge chunks (long texts, as indexed) and the
+matching short RAG queries with each provider, batch size and — for
+``onnx`` — thread count, and reports texts/sec plus per-batch latency.
+Use it to size EMBEDDING_BATCH_SIZE / EMBEDDING_THREADS for the worker
+node, or to compare a local model against the Jina API.
+
+Usage:
+    python scripts/bench_embeddings.py                         # hashing provider
+    python scripts/bench_embeddings.py --providers hashing onnx --batch-sizes 1 16 64
+    python scripts/bench_embeddings.py --providers onnx --threads 1 2 4
+    python scripts/bench_embeddings.py --providers jina --texts 256
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import patch
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+
+# Add backend to path so we can import app modules
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from index_catalogs import _load_json, build_medicine_chunks, build_test_chunks  # noqa: E402
+
+
+def _corpora(limit: int) -> Dict[str, List[str]]:
+    tests = _load_json("tests.json")
+    chunks = build_test_chunks(tests) + build_medicine_chunks(_load_json("medicines.json"))
+    queries = [
+        f"{meta.get('display_name', key)} {meta.get('normal_max', '')} {meta.get('unit', '')}".strip()
+        for key, meta in tests.items()
+        if not key.startswith("_") and isinstance(meta, dict)
+    ]
+    return {"chunks": [doc for doc, _ in chunks][:limit], "queries": queries[:limit]}
+
+
+def _pct(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(round(pct * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def bench_provider(provider, texts: List[str], batch_size: int) -> Dict:
+    provider.embed(texts[:batch_size])  # warm-up (model load, first-call allocation)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        batch_started = time.perf_counter()
+        provider.embed(texts[i: i + batch_size])
+        latencies.append((time.perf_counter() - batch_started) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "texts_per_sec": len(texts) / elapsed if elapsed else 0.0,
+        "batch_p50_ms": _pct(latencies, 0.5),
+        "batch_p95_ms": _pct(latencies, 0.95),
+        "per_text_ms": statistics.mean(latencies) / batch_size,
+    }
+
+
+def benchmark(providers: List[str], batch_sizes: List[int], threads: List[int], limit: int) -> Dict[str, Dict]:
+    from app.core.config import settings
+    from app.services.embedding_providers.factory import get_embedding_provider, reset_embedding_provider
+
+    corpora = _corpora(limit)
+    report = {}
+    for name in providers:
+        for n_threads in threads if name == "onnx" else [None]:
+            thread_setting = settings.EMBEDDING_THREADS if n_threads is None else n_threads
+            with patch.object(settings, "EMBEDDING_THREADS", thread_setting):
+                reset_embedding_provider()
+                provider = get_embedding_provider(name)
+                for batch_size in batch_sizes:
+                    batch_size = min(batch_size, provider.max_batch)
+                    for corpus, texts in corpora.items():
+                        label = f"{name}{f' t={n_threads}' if n_threads is not None else ''} b={batch_size} {corpus}"
+                        report[label] = bench_provider(provider, texts, batch_size)
+    reset_embedding_provider()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of embedding providers")
+    parser.add_argument("--providers", nargs="+", choices=("hashing", "onnx", "jina"), default=["hashing"])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="onnx intra-op threads")
+    parser.add_argument("--texts", type=int, default=1000, help="Texts per corpus")
+    args = parser.parse_args()
+
+    report = benchmark(args.providers, args.batch_sizes, args.threads, args.texts)
+    log.info("%-32s %10s %12s %12s %12s", "run", "texts/s", "batch p50", "batch p95", "ms/text")
+    for name, row in report.items():
+        log.info(
+            "%-32s %10.0f %12.2f %12.2f %12.3f",
+            name, row["texts_per_sec"], row["batch_p50_ms"], row["batch_p95_ms"], row["per_text_ms"],
+        )
+
+
+if __name__ == "__main__":
+    main()
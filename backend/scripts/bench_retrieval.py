@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAG retrieval strategies end to end.
+
+Builds a labelled set of parsed reports from the catalogs — each report
+is a handful of tests (named by display name or an alias, with a value
+in or out of range) and medicines, labelled with the catalog
+``entity_id``s it mentions.  A share of entities (``--drop-ids``) loses
+its ``id``, as when the parser could not resolve a name, so vector
+search has to find them.
+
+Every report goes through ``retrieve_context`` for each retrieval
+strategy (``RAG_RETRIEVAL_MODE``) and index configuration, reporting:
+
+  • end-to-end latency (p50 / p95);
+  • embedding time and search (SQL or in-process) time per report;
+  • recall@k — share of the labelled entities with a retrieved chunk;
+  • retrieved chunks and chunk tokens per report.
+
+``--embedder`` picks the embedding provider; the default ``hashing``
+provider is deterministic and local, and the ``memory`` index is built
+in-process from the catalog chunks, so the default run is fully offline.
+The ``pgvector`` configurations search the medical_knowledge table and
+need the provider it was indexed with (``--embedder jina`` for a Jina
+index).
+
+Usage:
+    python scripts/bench_retrieval.py                        # offline, memory index
+    python scripts/bench_retrieval.py --reports 500 --k 8
+    python scripts/bench_retrieval.py --strategies entity multi
+    python scripts/bench_retrieval.py --embedder jina --index memory pgvector --ef-search 40 100
+    python scripts/bench_retrieval.py --write-labels data/rag_labels.json
+    python scripts/bench_retrieval.py --labels data/rag_labels.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+log = logging.getLogger(__name__)
+# Per-call retrieval logs would swamp the report.
+logging.getLogger("retrieval").setLevel(logging.WARNING)
+
+# Add backend to path so we can import app modules
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from index_catalogs import _load_json, build_medicine_chunks, build_test_chunks  # noqa: E402
+
+STRATEGIES = ("entity", "vector", "multi")
+
+
+# ── Labelled reports ─────────────────────────────────────────────────
+
+def _test_entry(key: str, meta: Dict, rng: random.Random, drop_ids: float) -> Dict:
+    name = rng.choice([meta.get("display_name", key)] + list(meta.get("aliases", [])[:3]))
+    nmin, nmax = meta.get("normal_min"), meta.get("normal_max")
+    if nmin is not None and nmax is not None:
+        # ~20% low, ~20% high, the rest in range
+        roll = rng.random()
+        low, high = (nmin * 0.5, nmin) if roll < 0.2 else (nmax, nmax * 1.5) if roll < 0.4 else (nmin, nmax)
+        value = round(rng.uniform(low, high), 1)
+    else:
+        value = round(rng.uniform(0.5, 100.0), 1)
+    entry = {"name": name, "value": value, "unit": meta.get("unit", ""), "normal_min": nmin, "normal_max": nmax}
+    if rng.random() >= drop_ids:
+        entry["id"] = key
+    return entry
+
+
+def build_labelled_reports(n: int, seed: int = 0, drop_ids: float = 0.3) -> List[Dict]:
+    """``n`` synthetic parsed reports, each with its ``expected`` entity ids."""
+    rng = random.Random(seed)
+    tests = {k: v for k, v in _load_json("tests.json").items() if not k.startswith("_") and isinstance(v, dict)}
+    medicines = {k: v for k, v in _load_json("medicines.json").items() if isinstance(v, dict)}
+    test_keys, med_keys = sorted(tests), sorted(medicines)
+
+    reports = []
+    for _ in range(n):
+        picked_tests = rng.sample(test_keys, min(rng.randint(3, 8), len(test_keys)))
+        picked_meds = rng.sample(med_keys, min(rng.randint(0, 3), len(med_keys)))
+        parsed = {
+            "tests": [_test_entry(k, tests[k], rng, drop_ids) for k in picked_tests],
+            "medicines": [
+                {"name": medicines[k].get("display_name", k), **({"id": k} if rng.random() >= drop_ids else {})}
+                for k in picked_meds
+            ],
+        }
+        reports.append({"parsed": parsed, "expected": picked_tests + picked_meds})
+    return reports
+
+
+def _embedder(name: str) -> Callable[[List[str]], List[List[float]]]:
+    from app.services.embedding_providers import get_embedding_provider
+
+    return get_embedding_provider(name).embed_all
+
+
+# ── Indexes ──────────────────────────────────────────────────────────
+
+def _catalog_chunks() -> List[Tuple[str, str, str]]:
+    """(entity_id, chunk_type, content) for every catalog chunk."""
+    chunks = build_test_chunks(_load_json("tests.json")) + build_medicine_chunks(_load_json("medicines.json"))
+    return [(m.get("test_id") or m.get("med_id"), m.get("chunk_type"), doc) for doc, m in chunks]
+
+
+def build_memory_index(embed: Callable):
+    import numpy as np
+
+    from app.services.vector_index import MemoryVectorIndex
+
+    chunks = _catalog_chunks()
+    started = time.perf_counter()
+    vectors = embed([content for _, _, content in chunks])
+    log.info("Embedded %d catalog chunks in %.0f ms", len(chunks), (time.perf_counter() - started) * 1000)
+    rows = [
+        {"id": i + 1, "source": "catalog", "entity_id": eid, "chunk_type": ct, "content": content}
+        for i, (eid, ct, content) in enumerate(chunks)
+    ]
+    return MemoryVectorIndex(rows, np.array(vectors, dtype=np.float32))
+
+
+def _content_entities() -> Dict[str, str]:
+    return {content: eid for eid, _, content in _catalog_chunks()}
+
+
+# ── Measurement ──────────────────────────────────────────────────────
+
+class _Timer:
+    """Accumulates time spent in wrapped calls into ``bucket``."""
+
+    def __init__(self):
+        self.spent: Dict[str, float] = {}
+
+    def wrap(self, bucket: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.spent[bucket] = self.spent.get(bucket, 0.0) + (time.perf_counter() - started) * 1000
+        return timed
+
+
+def _pct(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(round(pct * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def run_config(reports: List[Dict], strategy: str, k: int, embed: Callable, overrides: Dict, index=None) -> Dict:
+    """Run every report through ``retrieve_context`` with one strategy / index setup."""
+    from app.core.config import settings
+    from app.services import retrieval
+    from app.services.llm_providers.tokens import estimate_tokens
+
+    entities_of = _content_entities()
+    timer = _Timer()
+    latencies, embed_ms, search_ms, recalls, n_chunks, tokens = [], [], [], [], [], []
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(settings, "RAG_ENABLED", True))
+        stack.enter_context(patch.object(settings, "RAG_RETRIEVAL_MODE", strategy))
+        for name, value in overrides.items():
+            stack.enter_context(patch.object(settings, name, value))
+        if index is not None:
+            stack.enter_context(patch("app.services.vector_index.get_index", return_value=index))
+        # Counters go to Redis; keep them (and their connection attempts) out of the timings.
+        stack.enter_context(patch.object(retrieval, "metrics"))
+        stack.enter_context(patch.object(retrieval, "embed_queries", timer.wrap("embed", embed)))
+        for fn in ("_search", "_search_many", "_fetch_entities"):
+            stack.enter_context(patch.object(retrieval, fn, timer.wrap("search", getattr(retrieval, fn))))
+
+        for report in reports:
+            timer.spent.clear()
+            started = time.perf_counter()
+            chunks = retrieval.retrieve_context(report["parsed"], top_k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            embed_ms.append(timer.spent.get("embed", 0.0))
+            search_ms.append(timer.spent.get("search", 0.0))
+
+            expected = set(report["expected"])
+            found = {entities_of.get(c) for c in chunks}
+            recalls.append(len(expected & found) / len(expected) if expected else 1.0)
+            n_chunks.append(len(chunks))
+            tokens.append(sum(estimate_tokens(c) for c in chunks))
+
+    return {
+        "p50_ms": _pct(latencies, 0.5),
+        "p95_ms": _pct(latencies, 0.95),
+        "embed_ms": statistics.mean(embed_ms),
+        "search_ms": statistics.mean(search_ms),
+        "recall": statistics.mean(recalls),
+        "chunks": statistics.mean(n_chunks),
+        "tokens": statistics.mean(tokens),
+    }
+
+
+def benchmark(
+    reports: List[Dict],
+    strategies: List[str],
+    indexes: List[str],
+    k: int,
+    embedder: str = "hashing",
+    ef_values: List[int] = (),
+) -> Dict[str, Dict]:
+    embed = _embedder(embedder)
+    configs = []
+    if "memory" in indexes:
+        configs.append(("memory", {"RAG_VECTOR_BACKEND": "memory"}, build_memory_index(embed)))
+    if "pgvector" in indexes:
+        for ef in ef_values or [None]:
+            overrides = {"RAG_VECTOR_BACKEND": "pgvector"}
+            if ef:
+                overrides["RAG_HNSW_EF_SEARCH"] = ef
+            configs.append((f"pgvector ef={ef}" if ef else "pgvector", overrides, None))
+
+    report = {}
+    for label, overrides, index in configs:
+        for strategy in strategies:
+            name = f"{label} / {strategy}"
+            report[name] = run_config(reports, strategy, k, embed, overrides, index)
+            log.info("Finished %s", name)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, recall@k and token volume of RAG retrieval strategies")
+    parser.add_argument("--reports", type=int, default=200, help="Number of generated reports")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drop-ids", type=float, default=0.3, help="Share of entities left without an id")
+    parser.add_argument("--labels", help="Load labelled reports from this JSON file instead of generating")
+    parser.add_argument("--write-labels", metavar="PATH", help="Save the generated labelled reports")
+    parser.add_argument("--k", type=int, default=5, help="RAG_TOP_K")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--index", nargs="+", choices=("memory", "pgvector"), default=["memory"])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[], help="HNSW ef_search values (pgvector)")
+    parser.add_argument("--embedder", choices=("hashing", "jina", "onnx"), default="hashing")
+    args = parser.parse_args()
+
+    if args.labels:
+        reports = json.loads(Path(args.labels).read_text(encoding="utf-8"))
+    else:
+        reports = build_labelled_reports(args.reports, args.seed, args.drop_ids)
+    if args.write_labels:
+        Path(args.write_labels).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.write_labels).write_text(json.dumps(reports, indent=1), encoding="utf-8")
+        log.info("Labelled reports written to %s", args.write_labels)
+
+    log.info("Benchmarking %d reports, k=%d, embedder=%s", len(reports), args.k, args.embedder)
+    report = benchmark(reports, args.strategies, args.index, args.k, args.embedder, args.ef_search)
+
+    log.info(
+        "%-24s %9s %9s %9s %9s %9s %7s %7s",
+        "config", f"recall@{args.k}", "p50 ms", "p95 ms", "embed ms", "search ms", "chunks", "tokens",
+    )
+    for name, row in report.items():
+        log.info(
+            "%-24s %9.3f %9.2f %9.2f %9.2f %9.2f %7.1f %7.0f",
+            name, row["recall"], row["p50_ms"], row["p95_ms"],
+            row["embed_ms"], row["search_ms"], row["chunks"], row["tokens"],
+        )
+
+
+if __name__ == "__main__":
+    main()
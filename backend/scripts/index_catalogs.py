@@ -5,11 +5,17 @@ Index medical catalog data into PostgreSQL (pgvector) for RAG retrieval.
 Converts tests.json + medicines.json into embeddable knowledge chunks,
 embeds them via Jina AI, and upserts into the medical_knowledge table.
 
+Runs incrementally: only chunks whose content hash changed (or that are
+new) are embedded, and stored chunks no longer produced are deleted.
+
 Usage:
-    python scripts/index_catalogs.py              # index everything
+    python scripts/index_catalogs.py              # sync everything
     python scripts/index_catalogs.py --tests-only  # only tests
     python scripts/index_catalogs.py --meds-only   # only medicines
+    python scripts/index_catalogs.py --full        # re-embed every chunk
     python scripts/index_catalogs.py --dry-run     # preview chunks
+    python scripts/index_catalogs.py --export-snapshot data/knowledge
+        # also write data/knowledge.npy + .json for RAG_VECTOR_BACKEND=memory
 """
 
 import argparse
@@ -18,7 +24,7 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 logging.basicConfig(
     level=logging.INFO,
@@ -143,8 +149,13 @@ def build_medicine_chunks(medicines: Dict) -> List[Tuple[str, Dict]]:
 def index_chunks(
     chunks: List[Tuple[str, Dict]],
     dry_run: bool = False,
+    full: bool = False,
+    sources: Optional[List[str]] = None,
 ) -> int:
-    """Index chunks into PostgreSQL via retrieval service."""
+    """Index chunks into PostgreSQL via retrieval service.
+
+    Incremental by default; ``full`` re-embeds and rewrites every chunk.
+    """
     if not chunks:
         log.info("No chunks to index.")
         return 0
@@ -158,8 +169,17 @@ def index_chunks(
             log.info("  [%s] %s", meta.get("chunk_type", meta.get("category")), doc[:100])
         return len(chunks)
 
-    from app.services.retrieval import index_documents
-    return index_documents(documents, metadatas)
+    if full:
+        from app.services.retrieval import index_documents
+        return index_documents(documents, metadatas)
+
+    from app.services.retrieval import sync_documents
+    summary = sync_documents(documents, metadatas, sources=sources)
+    log.info(
+        "Changes: %d added, %d changed, %d unchanged, %d deleted",
+        summary["added"], summary["changed"], summary["unchanged"], summary["deleted"],
+    )
+    return summary["added"] + summary["changed"]
 
 
 def main():
@@ -167,25 +187,36 @@ def main():
     parser.add_argument("--tests-only", action="store_true", help="Only index tests")
     parser.add_argument("--meds-only", action="store_true", help="Only index medicines")
     parser.add_argument("--dry-run", action="store_true", help="Preview chunks only")
+    parser.add_argument("--full", action="store_true", help="Re-embed every chunk, not just changed ones")
+    parser.add_argument("--export-snapshot", metavar="PATH", help="Write the indexed vectors to PATH.npy/.json")
     args = parser.parse_args()
 
     all_chunks = []
+    sources = []
 
     if not args.meds_only:
         tests = _load_json("tests.json")
         test_chunks = build_test_chunks(tests)
         log.info("Built %d test knowledge chunks", len(test_chunks))
         all_chunks.extend(test_chunks)
+        sources.append("catalog_tests")
 
     if not args.tests_only:
         medicines = _load_json("medicines.json")
         med_chunks = build_medicine_chunks(medicines)
         log.info("Built %d medicine knowledge chunks", len(med_chunks))
         all_chunks.extend(med_chunks)
+        sources.append("catalog_medicines")
 
     log.info("Total chunks: %d", len(all_chunks))
-    indexed = index_chunks(all_chunks, dry_run=args.dry_run)
-    log.info("Indexed: %d", indexed)
+    indexed = index_chunks(all_chunks, dry_run=args.dry_run, full=args.full, sources=sources)
+    log.info("Embedded: %d", indexed)
+
+    if args.export_snapshot and not args.dry_run:
+        from app.services.vector_index import load_from_db, save_snapshot
+        index = load_from_db()
+        save_snapshot(index, args.export_snapshot)
+        log.info("Snapshot of %d vectors written to %s", len(index), args.export_snapshot)
 
 
 if __name__ == "__main__":
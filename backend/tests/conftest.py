@@ -63,3 +63,13 @@ def sample_job_data():
         "stage": "uploading",
         "progress": 5,
     }
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_metrics_flusher():
+    """Keep the background metrics flush thread from racing tests that
+    inspect the buffer; tests call ``metrics.flush()`` explicitly."""
+    from app.services import metrics
+
+    metrics._flusher_pid = os.getpid()
+    yield
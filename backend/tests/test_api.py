@@ -249,6 +249,94 @@ def test_result_from_db(mock_set_cache, mock_get_cache, client, db_session):
     mock_set_cache.assert_called_once()
 
 
+def _result_json(job_id: str, summary: str, version: int, provisional: bool) -> dict:
+    return {
+        "job_id": job_id,
+        "status": "processing" if provisional else "completed",
+        "provisional": provisional,
+        "disclaimer": "test",
+        "input_summary": {"document_type": "blood_report"},
+        "abnormal_values": [],
+        "normal_values": [],
+        "medicines": [],
+        "overall_summary": summary,
+        "questions_to_ask_doctor": [],
+        "next_steps": [],
+        "confidence_score": 0.25,
+        "metadata": {
+            "processing_time_sec": 2,
+            "ocr_engine": "tesseract",
+            "llm_provider": "rules",
+            "model": "catalog",
+            "cached": False,
+            "provisional": provisional,
+            "version": version,
+        },
+    }
+
+
+@patch("app.api.routes.result_routes.get_cached_result", return_value=None)
+def test_result_provisional_while_processing(mock_get_cache, client, db_session):
+    job = Job(
+        id="provisional_job",
+        file_path="uploads/test.pdf",
+        status="processing",
+        stage="generating_explanation",
+        progress=70,
+    )
+    db_session.add(job)
+    db_session.flush()
+    db_session.add(Result(
+        job_id="provisional_job",
+        result_json=_result_json("provisional_job", "Rule-based", 1, True),
+        version=1,
+        provisional=True,
+    ))
+    db_session.commit()
+
+    status_resp = client.get("/status/provisional_job")
+    assert status_resp.json()["result_available"] is True
+
+    resp = client.get("/result/provisional_job")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "no-store"
+    data = resp.json()
+    assert data["overall_summary"] == "Rule-based"
+    assert data["status"] == "processing" and data["provisional"] is True
+    assert data["metadata"]["provisional"] is True
+    assert data["metadata"]["version"] == 1
+
+
+@patch("app.api.routes.result_routes.set_cached_result")
+@patch("app.api.routes.result_routes.get_cached_result")
+def test_result_completed_skips_provisional_cache(mock_get_cache, mock_set_cache, client, db_session):
+    mock_get_cache.return_value = _result_json("final_job", "Stale provisional", 1, True)
+    job = Job(
+        id="final_job",
+        file_path="uploads/test.pdf",
+        status="completed",
+        stage="done",
+        progress=100,
+    )
+    db_session.add(job)
+    db_session.flush()
+    db_session.add(Result(
+        job_id="final_job",
+        result_json=_result_json("final_job", "LLM result", 2, False),
+        version=2,
+        provisional=False,
+    ))
+    db_session.commit()
+
+    resp = client.get("/result/final_job")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["overall_summary"] == "LLM result"
+    assert data["status"] == "completed" and data["provisional"] is False
+    assert data["metadata"]["provisional"] is False
+    assert "cache-control" not in resp.headers
+
+
 # ---- upload ----
 
 @patch("app.api.routes.upload.push_job", return_value=True)
@@ -273,3 +361,46 @@ def test_upload_invalid_mime(mock_rate, client):
         files={"file": ("report.csv", io.BytesIO(b"a,b,c"), "text/csv")},
     )
     assert resp.status_code == 400
+
+
+# ---- admin ----
+
+@pytest.fixture
+def admin_client():
+    from app.api.routes.admin import router as admin_router
+
+    app = FastAPI()
+    app.include_router(admin_router)
+    return TestClient(app)
+
+
+@patch("app.api.routes.admin.published_breaker_states", return_value=[])
+def test_admin_requires_its_own_token(mock_states, admin_client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "REQUIRE_API_KEY", False)
+    monkeypatch.setattr(settings, "API_KEY", "public-frontend-key")
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert admin_client.get("/admin/llm/breakers").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert admin_client.get("/admin/llm/breakers").status_code == 401
+    assert admin_client.get(
+        "/admin/llm/breakers", headers={"X-Admin-Token": "public-frontend-key"}
+    ).status_code == 401
+    resp = admin_client.get("/admin/llm/breakers", headers={"X-Admin-Token": "s3cret"})
+    assert resp.status_code == 200 and resp.json() == {"breakers": []}
+
+
+@patch("app.api.routes.admin.connection_stats", return_value={"api.jina.ai": {"requests": 3, "reused": 2}})
+@patch("app.api.routes.admin.all_counters", return_value={"fast_path": {"served": 1}})
+def test_admin_metrics_include_connection_reuse(mock_counters, mock_stats, admin_client, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    resp = admin_client.get("/admin/metrics", headers={"X-Admin-Token": "s3cret"})
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "metrics": {"fast_path": {"served": 1}},
+        "http_connections": {"api.jina.ai": {"requests": 3, "reused": 2}},
+    }
@@ -19,6 +19,21 @@ def test_set_cached_result(mock_redis):
     assert args[1] == 3600
 
 
+@patch('app.services.cache.get_redis_client')
+def test_set_cached_result_versioned_uses_compare_and_set(mock_redis):
+    mock_client = Mock()
+    mock_client.eval.return_value = 0
+    mock_redis.return_value = mock_client
+
+    test_data = {"job_id": "test_123", "metadata": {"version": 1, "provisional": True}}
+
+    assert set_cached_result("test_123", test_data, ttl_sec=3600) is False
+    mock_client.setex.assert_not_called()
+    args = mock_client.eval.call_args[0]
+    assert args[1:3] == (1, "result:test_123")
+    assert args[4:] == (1, 3600)
+
+
 @patch('app.services.cache.get_redis_client')
 def test_get_cached_result_exists(mock_redis):
     mock_client = Mock()
@@ -0,0 +1,158 @@
+import json
+import queue
+import threading
+
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+
+from app.core.config import settings
+from app.services.llm import generate_explanation_async
+from app.services.llm_providers.groq_provider import GroqProvider
+from app.services.llm_providers.openai_provider import OpenAIProvider
+from app.services.llm_providers.circuit_breaker import (
+    CircuitBreaker,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    get_breaker,
+    reset_breakers,
+)
+from tests.test_llm import GOOD_RESPONSE
+
+
+@pytest.fixture(autouse=True)
+def _isolate(monkeypatch):
+    reset_breakers()
+    monkeypatch.setattr(settings, "LLM_BREAKER_MIN_CALLS", 3)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_RATE", 0.5)
+    with patch("app.services.llm_providers.circuit_breaker.get_redis_client"):
+        yield
+    reset_breakers()
+
+
+def test_opens_after_failure_rate_reached():
+    b = CircuitBreaker("groq")
+    b.record_success(1.0)
+    b.record_failure(1.0)
+    assert b.state == STATE_CLOSED  # below min calls
+    b.record_failure(1.0)
+    assert b.state == STATE_OPEN
+    assert b.allow_request() is False
+
+
+def test_slow_calls_count_as_bad(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_SLOW_CALL_SEC", 5.0)
+    b = CircuitBreaker("groq")
+    for _ in range(3):
+        b.record_success(10.0)
+    assert b.state == STATE_OPEN
+
+
+def test_half_open_probe_closes_on_success(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SEC", 0)
+    b = CircuitBreaker("groq")
+    for _ in range(3):
+        b.record_failure(1.0)
+    assert b.state == STATE_OPEN
+
+    assert b.allow_request() is True
+    assert b.state == STATE_HALF_OPEN
+    assert b.allow_request() is False  # only one probe in flight
+    b.record_success(1.0)
+    assert b.state == STATE_CLOSED
+
+
+def test_half_open_probe_reopens_on_failure(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SEC", 0)
+    b = CircuitBreaker("groq")
+    for _ in range(3):
+        b.record_failure(1.0)
+    assert b.allow_request() is True
+    b.record_failure(1.0)
+    assert b.state == STATE_OPEN
+
+
+def test_snapshot_reports_rates():
+    b = CircuitBreaker("openai")
+    b.record_success(2.0)
+    b.record_failure(1.0)
+    snap = b.snapshot()
+    assert snap["provider"] == "openai"
+    assert snap["error_rate"] == 0.5
+    assert snap["p50_latency_sec"] == 2.0
+
+
+def test_state_change_is_published_off_thread_after_the_lock_is_released():
+    b = CircuitBreaker("groq")
+    redis, published = Mock(), queue.Queue()
+    pipe = redis.pipeline.return_value
+    pipe.execute.side_effect = lambda: published.put((threading.get_ident(), b._lock.locked()))
+
+    with patch("app.services.llm_providers.circuit_breaker.get_redis_client", return_value=redis):
+        for _ in range(3):
+            b.record_failure(1.0)
+        thread, lock_held = published.get(timeout=2)
+
+    assert b.state == STATE_OPEN
+    assert thread != threading.get_ident() and not lock_held
+    key, payload = pipe.hset.call_args[0][1:]
+    assert key.startswith("groq@") and json.loads(payload)["state"] == STATE_OPEN
+
+
+@pytest.mark.asyncio
+async def test_failover_skips_open_circuit(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDER_CHAIN", ["groq", "openai"])
+    primary, secondary = AsyncMock(), AsyncMock()
+    secondary.generate.return_value = dict(GOOD_RESPONSE)
+
+    for _ in range(3):
+        get_breaker("groq").record_failure(1.0)
+
+    with patch("app.services.llm.get_provider", side_effect=lambda n: {"groq": primary, "openai": secondary}[n]):
+        result = await generate_explanation_async({"tests": []})
+
+    primary.generate.assert_not_called()
+    assert result["_llm_provider_used"] == "openai"
+
+
+@pytest.mark.asyncio
+async def test_failover_moves_to_next_provider_without_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDER_CHAIN", ["groq", "openai"])
+    primary, secondary = AsyncMock(), AsyncMock()
+    primary.generate.side_effect = Exception("groq 503")
+    secondary.generate.return_value = dict(GOOD_RESPONSE)
+
+    with patch("app.services.llm.get_provider", side_effect=lambda n: {"groq": primary, "openai": secondary}[n]), \
+            patch("app.services.llm.asyncio.sleep") as mock_sleep:
+        result = await generate_explanation_async({"tests": []})
+
+    mock_sleep.assert_not_called()
+    assert result["overall_summary"] == "Test summary"
+    assert get_breaker("groq").snapshot()["error_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_failover_sends_the_second_provider_its_own_model(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDER_CHAIN", ["groq", "openai"])
+    monkeypatch.setattr(settings, "LLM_RETRY_COUNT", 1)
+    monkeypatch.setattr(settings, "LLM_MODELS", {"openai": {"heavy": "gpt-4o", "light": "gpt-4o-mini"}})
+
+    groq_client, openai_client = Mock(), Mock()
+    groq_client.chat.completions.create = AsyncMock(side_effect=Exception("groq 503"))
+    message = Mock(content=json.dumps(GOOD_RESPONSE))
+    openai_client.chat.completions.create = AsyncMock(
+        return_value=Mock(choices=[Mock(message=message, finish_reason="stop")], usage=None)
+    )
+    providers = {"groq": GroqProvider(), "openai": OpenAIProvider()}
+
+    with patch("app.services.llm.get_provider", side_effect=providers.__getitem__), \
+            patch("app.services.llm_providers.groq_provider._get_client", return_value=groq_client), \
+            patch("app.services.llm_providers.openai_provider._get_client", return_value=openai_client), \
+            patch("app.services.llm_providers.limiter.reserve", return_value=0.0), \
+            patch("app.services.llm_providers.routing._log_decision"):
+        result = await generate_explanation_async({"tests": [{"name": "Hb", "value": "9"}]})
+
+    assert groq_client.chat.completions.create.call_args.kwargs["model"] == settings.LLM_MODEL_LIGHT
+    assert openai_client.chat.completions.create.call_args.kwargs["model"] == "gpt-4o-mini"
+    assert result["_llm_provider_used"] == "openai"
+    assert result["_llm_model_used"] == "gpt-4o-mini"
@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.constants import RESULT_VERSION_PROVISIONAL
+from app.services.coverage import fast_path_stats, score_coverage
+from app.services.llm import generate_rule_based_explanation
+from app.services.parser import parse_medical_text
+from app.workers.processor import _guarded_upgrade, _store_result
+
+
+LAB_REPORT = """CITY LAB
+Patient: Ravi Kumar Age: 45 Date: 12/03/2024
+Hemoglobin 10.2 g/dL 13.0 - 17.0
+Fasting Blood Sugar 130 mg/dL 70 - 100
+Platelet Count 2.5 lakh/cumm 1.5 - 4.5
+"""
+
+
+def _parsed(text: str) -> dict:
+    parsed = parse_medical_text(text)
+    parsed["raw_text"] = text
+    return parsed
+
+
+def test_fully_covered_lab_report_scores_one():
+    coverage = score_coverage(_parsed(LAB_REPORT))
+    assert coverage["score"] == 1.0
+    assert coverage["tests"] == coverage["tests_complete"] == 3
+    assert coverage["result_lines"] == coverage["result_lines_covered"] == 3
+
+
+def test_unrecognised_result_lines_lower_the_score():
+    text = LAB_REPORT + "Serum Zorbitase 41 U/L 10 - 40\n"
+    coverage = score_coverage(_parsed(text))
+    assert coverage["result_lines"] == 4
+    assert coverage["score"] == 0.75
+
+
+def test_incomplete_test_fields_lower_the_score():
+    parsed = _parsed(LAB_REPORT)
+    parsed["tests"][0]["normal_min"] = None
+    assert score_coverage(parsed)["score"] < 1.0
+
+
+def test_nothing_parsed_scores_zero():
+    assert score_coverage({"raw_text": "Some free text", "tests": [], "medicines": []})["score"] == 0.0
+
+
+def test_medicines_without_catalog_details_are_not_covered():
+    parsed = {
+        "raw_text": "Tab Metformin 500 mg twice daily",
+        "tests": [],
+        "medicines": [{"id": "metformin", "name": "Metformin"}],
+    }
+    assert score_coverage(parsed)["score"] == 0.0
+
+
+def test_rule_based_explanation_sets_urgency_and_summary():
+    result = generate_rule_based_explanation(_parsed(LAB_REPORT))
+
+    abnormal = {a["test_name"] for a in result["abnormal_values"]}
+    assert abnormal == {"Hemoglobin", "Fasting Blood Glucose"}
+    assert result["input_summary"]["document_type"] == "lab_report"
+    assert result["urgency_level"] == "soon"
+    assert "Hemoglobin" in result["overall_summary"]
+    assert result["confidence_score"] == 0.25
+
+
+@patch("app.services.coverage.metrics.get_counters")
+def test_fast_path_stats_fraction(mock_counters):
+    mock_counters.return_value = {"served": 3, "llm": 9}
+    assert fast_path_stats() == {"served": 3, "llm": 9, "upgraded": 0, "fraction": 0.25}
+
+
+@pytest.mark.asyncio
+async def test_fast_path_upgrade_waits_for_a_worker_slot():
+    sem = asyncio.Semaphore(1)
+    held = []
+
+    async def upgrade(*args):
+        held.append(sem.locked())
+
+    await sem.acquire()
+    with patch("app.workers.processor._upgrade_with_llm", side_effect=upgrade):
+        task = asyncio.create_task(_guarded_upgrade(sem, "job", {}, 0.0))
+        await asyncio.sleep(0)
+        assert held == []
+        sem.release()
+        await task
+
+    assert held == [True]
+    assert not sem.locked()
+
+
+@patch("app.workers.processor.set_cached_result")
+def test_provisional_flag_is_not_overridden_by_the_explanation(mock_cache, test_session):
+    explanation = generate_rule_based_explanation(_parsed(LAB_REPORT))
+    explanation.update({"status": "completed", "provisional": False})
+
+    stored = _store_result(
+        test_session, "prov_job", explanation, 1,
+        version=RESULT_VERSION_PROVISIONAL, provisional=True,
+    )
+
+    assert stored["status"] == "processing" and stored["provisional"] is True
+    assert stored["metadata"]["provisional"] is True
@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.services import embedding_cache
+from app.services.embeddings import embed_queries
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    store = {}
+    client = MagicMock()
+    client.mget.side_effect = lambda keys: [store.get(k) for k in keys]
+    client.pipeline.return_value.setex.side_effect = lambda k, ttl, v: store.__setitem__(k, v)
+    embedding_cache.clear_local()
+    with patch("app.services.embedding_cache.get_redis_binary_client", return_value=client), \
+         patch("app.services.embedding_cache.metrics"):
+        yield store
+    embedding_cache.clear_local()
+
+
+def test_vectors_pack_to_compact_bytes():
+    vector = [0.5, -0.25, 0.125] * 4
+    blob = embedding_cache.pack(vector, "float16")
+    assert len(blob) == 2 * len(vector)
+    assert embedding_cache.unpack(blob, "float16") == vector
+    assert embedding_cache.unpack(embedding_cache.pack(vector, "float32"), "float32") == vector
+
+
+def test_key_covers_model_dims_and_normalized_text():
+    key = embedding_cache.cache_key(embedding_cache.normalize_query("  Hemoglobin   10.2 g/dL "))
+    assert key == embedding_cache.cache_key("hemoglobin 10.2 g/dl")
+    assert key.startswith(f"emb:{settings.JINA_EMBEDDING_MODEL}:{settings.JINA_DIMENSIONS}:float16:")
+    with patch.object(settings, "JINA_DIMENSIONS", 1024):
+        assert embedding_cache.cache_key("hemoglobin 10.2 g/dl") != key
+
+
+@patch("app.services.embeddings.embed_sync")
+def test_repeated_queries_skip_the_network(mock_embed, fake_redis):
+    mock_embed.side_effect = lambda texts: [[0.5, 0.25] for _ in texts]
+
+    first = embed_queries(["TSH 2.1", "Metformin"])
+    again = embed_queries(["tsh  2.1"])
+
+    assert mock_embed.call_count == 1
+    assert mock_embed.call_args[0][0] == ["tsh 2.1", "metformin"]
+    assert again[0] == first[0]
+    assert len(fake_redis) == 2
+
+    # A fresh process finds the vectors in Redis.
+    embedding_cache.clear_local()
+    assert embed_queries(["Metformin"]) == [[0.5, 0.25]]
+    assert mock_embed.call_count == 1
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services import embedding_cache, retrieval
+from app.services.embedding_providers import get_embedding_provider
+from app.services.embedding_providers.base import fit_to_index
+from app.services.embedding_providers.onnx_provider import mean_pool
+from app.services.embeddings import embed_sync
+
+
+def _cosine(a, b):
+    return float(np.dot(a, b))
+
+
+def test_hashing_vectors_are_deterministic_unit_length_and_index_width():
+    provider = get_embedding_provider("hashing")
+    first, again = provider.embed(["Hemoglobin 9.0 g/dL"]), provider.embed(["Hemoglobin 9.0 g/dL"])
+
+    assert first == again
+    assert len(first[0]) == settings.JINA_DIMENSIONS
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_hashing_matches_shared_spelling_over_unrelated_text():
+    query, near, far = get_embedding_provider("hashing").embed(
+        ["haemoglobin low", "Hemoglobin carries oxygen in your blood", "Metformin is a diabetes medication"]
+    )
+    assert _cosine(query, near) > _cosine(query, far)
+
+
+def test_local_vectors_are_padded_to_the_index_width():
+    padded = fit_to_index(np.array([[3.0, 4.0]]))[0]
+    assert padded[:2] == pytest.approx([0.6, 0.8]) and len(padded) == settings.JINA_DIMENSIONS
+
+    with pytest.raises(ValueError):
+        fit_to_index(np.ones((1, settings.JINA_DIMENSIONS + 1)))
+
+
+def test_mean_pool_ignores_padding_tokens():
+    tokens = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+    assert mean_pool(tokens, np.array([[1, 1, 0]])).tolist() == [[2.0, 2.0]]
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        get_embedding_provider("word2vec")
+
+
+def test_switching_provider_changes_cache_keys_and_content_hashes():
+    with patch.object(settings, "EMBEDDING_PROVIDER", "jina"):
+        jina_key, jina_hash = embedding_cache.cache_key("tsh"), retrieval.content_hash("tsh")
+    with patch.object(settings, "EMBEDDING_PROVIDER", "hashing"):
+        local_key, local_hash = embedding_cache.cache_key("tsh"), retrieval.content_hash("tsh")
+
+    assert jina_key.startswith(f"emb:{settings.JINA_EMBEDDING_MODEL}:")
+    assert local_key != jina_key and local_hash != jina_hash
+
+
+def test_embed_sync_batches_through_the_provider():
+    provider = get_embedding_provider("hashing")
+    with patch.object(settings, "EMBEDDING_PROVIDER", "hashing"), \
+         patch.object(provider, "max_batch", 2), \
+         patch.object(provider, "embed", wraps=provider.embed) as embed:
+        vectors = embed_sync(["a", "b", "c"])
+
+    assert len(vectors) == 3
+    assert [len(c.args[0]) for c in embed.call_args_list] == [2, 1]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.embeddings import EmbeddingBatcher
+
+
+def _recorder(fail=False):
+    batches = []
+
+    async def embed_batch(texts):
+        batches.append(list(texts))
+        await asyncio.sleep(0)
+        if fail:
+            raise RuntimeError("jina down")
+        return [[float(len(t))] for t in texts]
+
+    return embed_batch, batches
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_request():
+    embed_batch, batches = _recorder()
+    batcher = EmbeddingBatcher(embed_batch)
+
+    results = await asyncio.gather(*(batcher.embed([f"query {i}"]) for i in range(20)))
+
+    assert len(batches) == 1 and len(batches[0]) == 20
+    assert results[3] == [[7.0]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting():
+    embed_batch, batches = _recorder()
+    with patch.object(settings, "EMBED_BATCH_SIZE", 4), patch.object(settings, "EMBED_BATCH_WAIT_MS", 10_000):
+        batcher = EmbeddingBatcher(embed_batch)
+        results = await asyncio.wait_for(batcher.embed([f"t{i}" for i in range(8)]), timeout=1)
+
+    assert [len(b) for b in batches] == [4, 4]
+    assert len(results) == 8
+
+
+@pytest.mark.asyncio
+async def test_duplicate_texts_are_embedded_once():
+    embed_batch, batches = _recorder()
+    batcher = EmbeddingBatcher(embed_batch)
+
+    a, b = await asyncio.gather(batcher.embed(["hemoglobin"]), batcher.embed(["hemoglobin"]))
+
+    assert batches == [["hemoglobin"]]
+    assert a == b
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    embed_batch, _ = _recorder(fail=True)
+    batcher = EmbeddingBatcher(embed_batch)
+
+    results = await asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
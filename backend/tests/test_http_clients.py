@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.services import http_clients
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    http_clients.close_all()
+    http_clients._async_clients.clear()
+    yield
+    http_clients.close_all()
+    http_clients._async_clients.clear()
+
+
+def test_sync_client_is_shared():
+    a = http_clients.get_sync_client("jina")
+    b = http_clients.get_sync_client("jina")
+    assert a is b
+    assert http_clients.get_sync_client("other") is not a
+
+
+def test_sync_client_recreated_after_close():
+    a = http_clients.get_sync_client("jina")
+    http_clients.close_all()
+    assert http_clients.get_sync_client("jina") is not a
+
+
+@pytest.mark.asyncio
+async def test_async_client_is_shared_per_loop():
+    a = http_clients.get_async_client("llama")
+    assert http_clients.get_async_client("llama") is a
+    await http_clients.aclose_all()
+    assert a.is_closed
+
+
+def test_async_client_not_reused_across_loops():
+    async def grab():
+        return http_clients.get_async_client("llama")
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
+
+
+@patch("app.services.http_clients.metrics")
+def test_request_hook_counts_requests_and_new_connections(mock_metrics):
+    import httpx
+
+    request = httpx.Request("GET", "https://api.jina.ai/v1/embeddings")
+    http_clients._sync_request_hook(request)
+    trace = request.extensions["trace"]
+    trace("connection.connect_tcp.complete", {})
+    trace("connection.start_tls.complete", {})
+    trace("http11.send_request_headers.started", {})
+
+    fields = [c.args[1] for c in mock_metrics.incr.call_args_list]
+    assert fields == [
+        "api.jina.ai:requests",
+        "api.jina.ai:new_connections",
+        "api.jina.ai:tls_handshakes",
+    ]
+
+
+def test_async_hooks_only_buffer_counts():
+    import httpx
+    from app.services import metrics
+
+    async def run():
+        request = httpx.Request("GET", "https://api.groq.com/openai/v1/chat/completions")
+        await http_clients._async_request_hook(request)
+        await request.extensions["trace"]("connection.connect_tcp.complete", {})
+
+    metrics._pending.clear()
+    with patch("app.services.metrics.get_redis_client", side_effect=AssertionError("no Redis")):
+        asyncio.run(run())
+    assert metrics._pending == {
+        ("http_connections", "api.groq.com:requests"): 1,
+        ("http_connections", "api.groq.com:new_connections"): 1,
+    }
+    metrics._pending.clear()
+
+
+@patch("app.services.http_clients.metrics")
+def test_connection_stats_computes_reuse(mock_metrics):
+    mock_metrics.get_counters.return_value = {
+        "api.jina.ai:requests": 10,
+        "api.jina.ai:new_connections": 2,
+    }
+    stats = http_clients.connection_stats()
+    assert stats["api.jina.ai"]["reused"] == 8
+
+
+def test_sdk_client_follows_the_pooled_http_client():
+    from app.services.llm_providers import groq_provider
+
+    async def grab():
+        return groq_provider._get_client(), groq_provider._get_client()
+
+    first, again = asyncio.run(grab())
+    assert first is again
+    # A new loop gets a new pooled client, so the SDK client is rebuilt.
+    second, _ = asyncio.run(grab())
+    assert second is not first
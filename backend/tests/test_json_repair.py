@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from app.services.llm_providers.errors import LLMInvalidOutputError, LLMOutputTruncatedError
+from app.services.llm_providers.json_repair import scan_json
+from app.services.llm_providers.prompts import parse_or_repair_json, truncated_output
+
+FULL = {
+    "disclaimer": "Not a diagnosis.",
+    "abnormal_values": [
+        {"test_name": "Hemoglobin", "value": "10.2 g/dL", "common_causes": ["Iron deficiency"]},
+        {"test_name": "TSH", "value": "6.1 mIU/L", "common_causes": ["Hypothyroidism"]},
+    ],
+    "overall_summary": "Two values are outside the normal range.",
+    "confidence_score": 0.9,
+}
+TEXT = json.dumps(FULL)
+
+
+def test_complete_object_is_parsed_from_prose_and_fences():
+    assert scan_json(f"Here you go:\n```json\n{TEXT}\n```") == (FULL, True)
+
+
+def test_every_truncation_point_yields_a_consistent_prefix():
+    for cut in range(1, len(TEXT)):
+        data, complete = scan_json(TEXT[:cut])
+        assert not complete
+        if data is None:
+            continue
+        # Only fully generated array elements survive; a cut-off string
+        # field is kept as a prefix.
+        for entry in data.get("abnormal_values", []):
+            assert entry in FULL["abnormal_values"]
+        for key, value in data.items():
+            if isinstance(value, str):
+                assert FULL[key].startswith(value)
+            elif key != "abnormal_values":
+                assert value == FULL[key]
+
+
+def test_truncated_array_keeps_complete_elements():
+    cut = TEXT.index('{"test_name": "TSH"') + 20
+    data, complete = scan_json(TEXT[:cut])
+    assert not complete
+    assert [a["test_name"] for a in data["abnormal_values"]] == ["Hemoglobin"]
+
+
+def test_truncated_field_string_is_closed():
+    cut = TEXT.index("outside the normal")
+    data, _ = scan_json(TEXT[:cut])
+    assert data["overall_summary"] == "Two values are "
+
+
+def test_parse_or_repair_json_raises_with_partial():
+    cut = TEXT.index('"overall_summary"')
+    with pytest.raises(LLMOutputTruncatedError) as exc:
+        parse_or_repair_json(TEXT[:cut], max_tokens=1024, model="m")
+    assert len(exc.value.partial["abnormal_values"]) == 2
+    assert exc.value.max_tokens == 1024
+
+
+def test_malformed_complete_json_is_invalid():
+    with pytest.raises(LLMInvalidOutputError):
+        parse_or_repair_json("{'single': 'quotes'}")
+
+
+def test_truncated_output_salvages_even_without_parse_failure():
+    error = truncated_output(TEXT, 2048, "m")
+    assert error.partial == FULL
@@ -1,6 +1,15 @@
 import pytest
 from unittest.mock import patch, AsyncMock
 from app.services.llm import generate_explanation, generate_explanation_async
+from app.services.llm_providers.circuit_breaker import reset_breakers
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    """Breakers are process-global; don't let failures leak between tests."""
+    reset_breakers()
+    yield
+    reset_breakers()
 
 
 GOOD_RESPONSE = {
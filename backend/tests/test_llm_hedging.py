@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.llm import generate_explanation_async
+from app.services.llm_providers.circuit_breaker import get_breaker, reset_breakers
+from tests.test_llm import GOOD_RESPONSE
+
+
+class _SlowThenFast:
+    """Provider whose first call hangs and later calls answer quickly."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = False
+
+    async def generate(self, parsed_data, retrieval_context=None):
+        self.calls += 1
+        if self.calls == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return dict(GOOD_RESPONSE)
+
+
+@pytest.fixture(autouse=True)
+def _hedging(monkeypatch):
+    reset_breakers()
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_SEC", 0.01)
+    with patch("app.services.llm_providers.circuit_breaker.get_redis_client"):
+        yield
+    reset_breakers()
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_and_primary_is_cancelled():
+    for _ in range(3):
+        get_breaker("groq").record_success(0.02)
+    provider = _SlowThenFast()
+
+    with patch("app.services.llm.get_provider", return_value=provider), \
+            patch("app.services.llm.metrics") as mock_metrics:
+        result = await asyncio.wait_for(generate_explanation_async({"tests": []}), 2)
+        await asyncio.sleep(0)
+
+    assert result["overall_summary"] == "Test summary"
+    assert provider.calls == 2
+    assert provider.cancelled is True
+    mock_metrics.incr.assert_any_call("llm_hedge", "launched")
+    mock_metrics.incr.assert_any_call("llm_hedge", "hedge_won")
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_latency_history():
+    provider = _SlowThenFast()
+    provider.calls = 1  # skip the slow path
+
+    with patch("app.services.llm.get_provider", return_value=provider), \
+            patch("app.services.llm.metrics") as mock_metrics:
+        await generate_explanation_async({"tests": []})
+
+    assert provider.calls == 2
+    mock_metrics.incr.assert_not_called()
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.core.config import settings
+from app.services.llm import _retry_delay
+from app.services.llm_providers.errors import LLMRateLimitError
+from app.services.llm_providers.limiter import (
+    block_for,
+    get_limits,
+    llm_slot,
+    parse_retry_after,
+    reserve,
+)
+
+
+@patch("app.services.llm_providers.limiter.get_redis_client")
+def test_reserve_returns_wait(mock_redis):
+    mock_client = Mock()
+    mock_client.eval.return_value = "1.5"
+    mock_redis.return_value = mock_client
+
+    assert reserve("groq", "m", 500) == 1.5
+    args = mock_client.eval.call_args[0]
+    assert args[1] == 3
+    assert args[2] == "llm_rl:groq:m:rpm"
+    assert args[4] == "llm_rl:groq:m:blocked"
+
+
+@patch("app.services.llm_providers.limiter.get_redis_client")
+def test_reserve_over_max_wait_raises(mock_redis):
+    mock_client = Mock()
+    mock_client.eval.return_value = "-300.0"
+    mock_redis.return_value = mock_client
+
+    with pytest.raises(LLMRateLimitError) as exc:
+        reserve("groq", "m", 500)
+    assert exc.value.retry_after == 300.0
+
+
+@patch("app.services.llm_providers.limiter.get_redis_client")
+def test_reserve_fails_open(mock_redis):
+    mock_redis.side_effect = Exception("Redis down")
+    assert reserve("groq", "m", 500) == 0.0
+
+
+@patch("app.services.llm_providers.limiter.get_redis_client")
+def test_reserve_disabled(mock_redis, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_ENABLED", False)
+    assert reserve("groq", "m", 500) == 0.0
+    mock_redis.assert_not_called()
+
+
+def test_get_limits_override(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {"openai:gpt-4o": {"rpm": 500}})
+    monkeypatch.setattr(settings, "LLM_PROVIDER_RATE_LIMITS", {"groq": {"rpm": 30, "tpm": 12000}})
+    assert get_limits("openai", "gpt-4o") == (500, 0)
+    assert get_limits("groq", "gpt-4o") == (30, 12000)
+
+
+@patch("app.services.llm_providers.limiter.get_redis_client")
+def test_unlisted_provider_is_unlimited(mock_redis, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", {})
+    assert get_limits("openai", "gpt-4o") == (0, 0)
+    assert reserve("openai", "gpt-4o", 500) == 0.0
+    mock_redis.assert_not_called()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({"retry-after": "garbage"}) is None
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm_providers.limiter.get_redis_client")
+async def test_llm_slot_settles_unused_tokens(mock_redis):
+    mock_client = Mock()
+    mock_client.eval.return_value = "0"
+    mock_redis.return_value = mock_client
+
+    loop_thread = threading.get_ident()
+    redis_threads = []
+    mock_client.hincrbyfloat.side_effect = lambda *a: redis_threads.append(threading.get_ident())
+
+    async with llm_slot("groq", "m", 1000) as slot:
+        await slot.settle(400)
+        await block_for("groq", "m", 5)
+
+    mock_client.hincrbyfloat.assert_called_once_with("llm_rl:groq:m:tpm", "level", 600)
+    assert mock_client.eval.call_args[0][2] == "llm_rl:groq:m:blocked"
+    # Redis calls stay off the event loop thread.
+    assert redis_threads and loop_thread not in redis_threads
+
+
+def test_retry_delay_honours_retry_after():
+    assert _retry_delay(LLMRateLimitError("429", retry_after=12), 1) == 12
+    assert _retry_delay(RuntimeError("boom"), 1) == settings.LLM_RETRY_BACKOFF_SEC
@@ -0,0 +1,169 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.core.config import settings
+from app.services.llm import _grown_budget, generate_explanation_async
+from app.services.llm_providers.circuit_breaker import reset_breakers
+from app.services.llm_providers.errors import (
+    LLMInvalidOutputError,
+    LLMOutputTruncatedError,
+    LLMRateLimitError,
+    LLMTransportError,
+    classify_error,
+    error_for_status,
+    is_transient,
+)
+from app.services.llm_providers.groq_provider import GroqProvider
+from app.services.llm_providers.prompts import parse_or_repair_json
+from app.services.parser import parse_medical_text
+from tests.test_llm import GOOD_RESPONSE
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+REPORT = "\n".join([
+    "Hemoglobin 10.2 g/dL 13.0 - 17.0",
+    "Platelet Count 2.5 lakh/cumm 1.5 - 4.5",
+    "Fasting Blood Sugar 130 mg/dL 70 - 100",
+    "TSH 2.1 mIU/L 0.4 - 4.0",
+])
+
+
+def test_errors_are_classified():
+    assert classify_error(LLMOutputTruncatedError("cut")) == "length"
+    assert classify_error(LLMInvalidOutputError("bad")) == "invalid_output"
+    assert is_transient(LLMRateLimitError("slow down"))
+    assert is_transient(LLMTransportError("timeout"))
+    assert is_transient(RuntimeError("unknown"))
+    assert not is_transient(LLMInvalidOutputError("bad"))
+    assert not is_transient(error_for_status(400, "bad request"))
+    assert not is_transient(error_for_status(401, "bad key"))
+    assert all(is_transient(error_for_status(code, "retry")) for code in (408, 409, 429, 500, 503))
+
+
+def test_truncated_json_carries_budget():
+    with pytest.raises(LLMOutputTruncatedError) as exc:
+        parse_or_repair_json('{"disclaimer": "x", "abnormal_values": [', max_tokens=2048, model="m")
+    assert (exc.value.max_tokens, exc.value.model) == (2048, "m")
+
+
+def test_grown_budget_doubles_up_to_ceiling():
+    model = settings.LLM_MODEL_HEAVY
+    assert _grown_budget(LLMOutputTruncatedError("", 2048, model)) == 4096
+    assert _grown_budget(LLMOutputTruncatedError("", settings.LLM_MAX_TOKENS_CEILING, model)) is None
+    # Small context windows keep half the window for the prompt.
+    assert _grown_budget(LLMOutputTruncatedError("", 4096, "llama3.1:8b")) is None
+    assert _grown_budget(LLMOutputTruncatedError("")) is None
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_truncated_output_retries_with_larger_budget(mock_get_provider):
+    provider = AsyncMock()
+    provider.generate.side_effect = [
+        LLMOutputTruncatedError("cut", max_tokens=2048, model=settings.LLM_MODEL_HEAVY),
+        GOOD_RESPONSE,
+    ]
+    mock_get_provider.return_value = provider
+
+    result = await generate_explanation_async({"tests": [], "raw_text": REPORT})
+
+    assert result["overall_summary"] == "Test summary"
+    assert provider.generate.await_count == 2
+    assert provider.generate.await_args.kwargs == {"max_tokens": 4096}
+
+
+@pytest.mark.asyncio
+async def test_bad_request_is_not_resent(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDER_CHAIN", ["groq"])
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    client = Mock()
+    client.chat.completions.create = AsyncMock(side_effect=openai.BadRequestError(
+        "context_length_exceeded", response=httpx.Response(400, request=request), body=None,
+    ))
+
+    with patch("app.services.llm.get_provider", return_value=GroqProvider()), \
+            patch("app.services.llm_providers.groq_provider._get_client", return_value=client), \
+            patch("app.services.llm_providers.limiter.reserve", return_value=0.0), \
+            patch("app.services.llm_providers.routing._log_decision"), \
+            patch("app.services.llm.asyncio.sleep", new=AsyncMock()) as sleep:
+        result = await generate_explanation_async({"tests": [], "raw_text": REPORT})
+
+    assert client.chat.completions.create.await_count == 1
+    sleep.assert_not_awaited()
+    assert result["confidence_score"] == 0.25
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_invalid_output_is_not_resent(mock_get_provider):
+    provider = AsyncMock()
+    provider.generate.side_effect = LLMInvalidOutputError("not JSON")
+    mock_get_provider.return_value = provider
+
+    result = await generate_explanation_async({"tests": [], "raw_text": REPORT})
+
+    assert provider.generate.await_count == 1
+    assert result["confidence_score"] == 0.25
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_output_that_never_fits_is_split_into_sections(mock_get_provider):
+    def generate(parsed, ctx, **kwargs):
+        if len(parsed["tests"]) > 2:
+            raise LLMOutputTruncatedError("cut", max_tokens=settings.LLM_MAX_TOKENS_CEILING)
+        return {
+            **GOOD_RESPONSE,
+            "abnormal_values": [
+                {"test_name": t["name"], "value": str(t["value"]), "normal_range": "",
+                 "severity": "mild", "what_it_means": ""}
+                for t in parsed["tests"]
+            ],
+        }
+
+    provider = AsyncMock()
+    provider.generate.side_effect = generate
+    mock_get_provider.return_value = provider
+
+    parsed = {**parse_medical_text(REPORT), "raw_text": REPORT}
+    result = await generate_explanation_async(parsed)
+
+    names = {a["test_name"] for a in result["abnormal_values"]}
+    assert len(names) == 4
+    # One truncated call for the whole report, then one per section.
+    assert provider.generate.await_count >= 3
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_truncated_output_keeps_partial_and_requests_only_the_rest(mock_get_provider):
+    parsed = {**parse_medical_text(REPORT), "raw_text": REPORT}
+    names = [t["name"] for t in parsed["tests"]]
+
+    def entry(name):
+        return {"test_name": name, "value": "1", "normal_range": "", "severity": "mild", "what_it_means": ""}
+
+    partial = {**GOOD_RESPONSE, "abnormal_values": [entry(n) for n in names[:2]]}
+    rest = {**GOOD_RESPONSE, "abnormal_values": [entry(n) for n in names[2:]]}
+
+    provider = AsyncMock()
+    provider.generate.side_effect = [
+        LLMOutputTruncatedError("cut", max_tokens=2048, partial=partial),
+        rest,
+    ]
+    mock_get_provider.return_value = provider
+
+    result = await generate_explanation_async(parsed)
+
+    assert [a["test_name"] for a in result["abnormal_values"]] == names
+    follow_up = provider.generate.await_args_list[1].args[0]
+    assert [t["name"] for t in follow_up["tests"]] == names[2:]
+    assert names[0] not in follow_up["raw_text"]
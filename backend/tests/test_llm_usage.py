@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.models import job  # noqa: F401 — llm_calls.job_id references jobs
+from app.services import llm_usage
+from app.services.llm import generate_explanation_async
+from app.services.llm_providers.circuit_breaker import reset_breakers
+from app.services.llm_providers.errors import LLMTransportError
+from tests.test_llm import GOOD_RESPONSE
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+def test_cost_bills_cached_prompt_tokens_at_cached_rate():
+    pricing = {"m": {"input": 1.0, "cached_input": 0.5, "output": 2.0}}
+    with patch.object(llm_usage.settings, "LLM_PRICING", pricing):
+        assert llm_usage.cost_usd("m", 1_000_000, 500_000, 400_000) == 0.6 + 0.2 + 1.0
+        assert llm_usage.cost_usd("unpriced", 1_000_000, 1_000_000) == 0.0
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_calls_are_collected_with_usage_and_outcome(mock_get_provider):
+    async def generate(parsed, ctx):
+        llm_usage.note_request(MODEL)
+        if provider.generate.await_count == 1:
+            raise LLMTransportError("connection reset")
+        llm_usage.note_usage(1200, 300, cached_tokens=200)
+        return dict(GOOD_RESPONSE)
+
+    provider = AsyncMock()
+    provider.generate.side_effect = generate
+    mock_get_provider.return_value = provider
+
+    with patch("app.services.llm.asyncio.sleep", new=AsyncMock()), llm_usage.collect() as calls:
+        await generate_explanation_async({"tests": []})
+
+    assert [(c["success"], c["error_kind"]) for c in calls] == [(False, "transport"), (True, None)]
+    assert calls[1]["prompt_tokens"] == 1200 and calls[1]["cost_usd"] > 0
+    summary = llm_usage.summarize(calls)
+    assert (summary["calls"], summary["failed_calls"], summary["completion_tokens"]) == (2, 1, 300)
+
+
+def test_usage_report_groups_and_percentiles(test_session):
+    calls = [
+        {"provider": "groq", "model": MODEL, "success": True, "prompt_tokens": 1000 * i,
+         "completion_tokens": 100, "latency_ms": 1000 * i, "cost_usd": 0.001}
+        for i in range(1, 5)
+    ] + [{"provider": "groq", "model": "other", "success": False, "latency_ms": 50, "error_kind": "transport"}]
+    llm_usage.persist_calls(test_session, None, calls, doc_type="lab_report")
+    test_session.flush()
+
+    report = llm_usage.usage_report(test_session, days=1, group_by="model")
+
+    assert report["totals"]["calls"] == 5
+    heavy = report["groups"][MODEL]
+    assert heavy["prompt_tokens"] == 10000
+    assert heavy["cost_usd"] == 0.004
+    assert heavy["latency_ms"]["p50"] == 2000  # nearest rank, as percentile_disc
+    assert heavy["latency_ms"]["p99"] == 4000
+    assert report["groups"]["other"]["failed_calls"] == 1
+    assert set(llm_usage.usage_report(test_session, 1, "doc_type")["groups"]) == {"lab_report"}
+
+
+def test_openai_cached_tokens_are_parsed():
+    usage = Mock(prompt_tokens=2000, completion_tokens=100, prompt_tokens_details=Mock(cached_tokens=1536))
+    assert llm_usage.cached_tokens_of(usage) == 1536
+    assert llm_usage.cached_tokens_of(Mock(prompt_tokens_details=None)) is None
+    assert llm_usage.cached_tokens_of(Mock(prompt_tokens_details={"cached_tokens": 64})) == 64
+
+
+def test_usage_report_splits_latency_by_cache_hit(test_session):
+    calls = [
+        {"provider": "openai", "model": MODEL, "prompt_version": "v1", "success": True,
+         "prompt_tokens": 2000, "completion_tokens": 100, "cached_tokens": cached, "latency_ms": latency}
+        for cached, latency in ((1024, 800), (1024, 900), (0, 2000), (None, 2200))
+    ]
+    llm_usage.persist_calls(test_session, None, calls)
+    test_session.flush()
+
+    report = llm_usage.usage_report(test_session, days=1, group_by="prompt_version")
+
+    group = report["groups"]["v1"]
+    assert group["cache_hit_rate"] == 0.5
+    assert group["cached_token_share"] == 0.256
+    assert group["latency_ms_cache_hit"]["p99"] == 900
+    assert group["latency_ms_cache_miss"]["p99"] == 2200
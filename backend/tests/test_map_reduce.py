@@ -0,0 +1,121 @@
+import copy
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.services.llm import generate_explanation_async
+from app.services.llm_providers.circuit_breaker import reset_breakers
+from app.services.map_reduce import (
+    merge_results,
+    should_map_reduce,
+    split_parsed,
+    split_text,
+)
+from app.services.ocr import PAGE_BREAK
+from tests.test_llm import GOOD_RESPONSE
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers():
+    reset_breakers()
+    with patch.object(settings, "LLM_MAP_REDUCE_ENABLED", True):
+        yield
+    reset_breakers()
+
+
+def _page(n: int, lines: int = 200) -> str:
+    return "\n".join(f"Observation {n * 1000 + i} recorded" for i in range(lines))
+
+
+LONG_REPORT = f"\n{PAGE_BREAK}\n".join(
+    [_page(1) + "\nHaemoglobin 10.2 g/dL"] + [_page(n) for n in range(2, 5)]
+)
+
+
+def _part(abnormal=(), normal=(), urgency="routine", **extra):
+    # GOOD_RESPONSE may carry internal keys set on it by earlier tests.
+    result = {k: v for k, v in copy.deepcopy(GOOD_RESPONSE).items() if not k.startswith("_")}
+    result["abnormal_values"] = [
+        {"test_name": n, "value": v, "normal_range": "", "severity": "mild", "what_it_means": ""}
+        for n, v in abnormal
+    ]
+    result["normal_values"] = [
+        {"test_name": n, "value": v, "normal_range": "", "what_it_means": ""}
+        for n, v in normal
+    ]
+    result["urgency_level"] = urgency
+    result.update(extra)
+    return result
+
+
+def test_should_map_reduce_only_for_long_reports():
+    assert should_map_reduce({"raw_text": LONG_REPORT})
+    assert not should_map_reduce({"raw_text": "Haemoglobin 10.2 g/dL"})
+
+
+def test_split_text_keeps_pages_together():
+    parts = split_text(LONG_REPORT)
+    assert len(parts) == 4
+    assert parts[0].startswith("Observation 1000 recorded")
+    assert all(PAGE_BREAK not in p for p in parts)
+
+
+def test_split_text_splits_oversized_section_on_lines():
+    parts = split_text(_page(1, lines=2000))
+    assert len(parts) > 1
+    assert sum(p.count("\n") + 1 for p in parts) == 2000
+
+
+def test_split_parsed_parses_each_part():
+    parts = split_parsed({"raw_text": LONG_REPORT})
+    assert [t["id"] for t in parts[0]["tests"]] == ["hemoglobin"]
+    assert parts[1]["tests"] == []
+
+
+def test_merge_results_dedupes_and_takes_highest_urgency():
+    merged = merge_results([
+        _part(abnormal=[("Haemoglobin", "10.2 g/dL")], normal=[("TSH", "2.1 mIU/L")],
+              _llm_model_used="m1", _llm_provider_used="groq",
+              _prompt_stats={"prompt_tokens": 100, "tokens_saved": 10}),
+        _part(normal=[("Haemoglobin", "10.2 g/dL"), ("tsh", "2.1  mIU/L")], urgency="soon",
+              _llm_model_used="m1", _llm_provider_used="groq",
+              _prompt_stats={"prompt_tokens": 80, "tokens_saved": 5}),
+    ])
+
+    assert [a["test_name"] for a in merged["abnormal_values"]] == ["Haemoglobin"]
+    assert [n["test_name"] for n in merged["normal_values"]] == ["TSH"]
+    assert merged["urgency_level"] == "soon"
+    assert merged["overall_summary"].startswith("1 of 2 test value(s)")
+    assert merged["_llm_model_used"] == "m1"
+    assert merged["_llm_provider_used"] == "groq"
+    assert merged["_prompt_stats"]["prompt_tokens"] == 180
+    assert merged["_prompt_stats"]["map_parts"] == 2
+
+
+def test_merge_with_a_fallback_part_is_marked_partial():
+    merged = merge_results([
+        _part(normal=[("TSH", "2.1 mIU/L")], confidence_score=0.9,
+              _llm_model_used="m1", _llm_provider_used="groq"),
+        _part(normal=[("Haemoglobin", "14.0 g/dL")], confidence_score=0.25),
+    ])
+
+    assert "_llm_model_used" not in merged and "_llm_provider_used" not in merged
+    assert merged["_fallback_parts"] == 1
+    assert merged["confidence_score"] == 0.25
+
+
+@pytest.mark.asyncio
+@patch("app.services.llm.get_provider")
+async def test_long_report_runs_one_call_per_part(mock_get_provider):
+    provider = AsyncMock()
+    provider.generate.side_effect = lambda parsed, ctx: _part(
+        abnormal=[(t["name"], str(t["value"])) for t in parsed["tests"]]
+    )
+    mock_get_provider.return_value = provider
+
+    result = await generate_explanation_async({"raw_text": LONG_REPORT, "tests": [], "medicines": []})
+
+    assert provider.generate.await_count == 4
+    assert [a["test_name"] for a in result["abnormal_values"]] == ["Hemoglobin"]
+    assert result["_llm_provider_used"] == "groq"
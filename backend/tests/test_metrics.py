@@ -0,0 +1,43 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app.services import metrics
+
+
+@pytest.fixture(autouse=True)
+def _empty_buffer():
+    metrics._pending.clear()
+    yield
+    metrics._pending.clear()
+
+
+def test_incr_buffers_without_touching_redis():
+    with patch("app.services.metrics.get_redis_client", side_effect=AssertionError("no Redis")):
+        metrics.incr("llm_hedge", "launched")
+        metrics.incr("llm_hedge", "launched")
+        metrics.incr("llm_prompt", "prompt_tokens", 1200)
+
+    assert metrics._pending == {("llm_hedge", "launched"): 2, ("llm_prompt", "prompt_tokens"): 1200}
+
+
+def test_flush_writes_summed_counts_in_one_pipeline():
+    redis = Mock()
+    pipe = redis.pipeline.return_value
+    metrics.incr("fast_path", "served")
+    metrics.incr("fast_path", "served", 2)
+
+    with patch("app.services.metrics.get_redis_client", return_value=redis):
+        metrics.flush()
+        metrics.flush()  # nothing pending: no second round trip
+
+    pipe.hincrby.assert_called_once_with("metrics:fast_path", "served", 3)
+    pipe.execute.assert_called_once()
+    assert metrics._pending == {}
+
+
+def test_flush_failure_is_swallowed():
+    metrics.incr("fast_path", "served")
+    with patch("app.services.metrics.get_redis_client", side_effect=ConnectionError("down")):
+        metrics.flush()
+    assert metrics._pending == {}
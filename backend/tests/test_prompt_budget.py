@@ -0,0 +1,175 @@
+from unittest.mock import patch
+
+from app.core.config import settings
+
+from app.services.llm_providers.prompt_budget import (
+    clean_ocr_text,
+    compact_structured,
+    fit_chunks,
+    input_budget,
+    truncate_to_tokens,
+)
+from app.services.llm_providers.prompts import PROMPT_VERSION, assemble_messages, build_messages
+from app.services.llm_providers.tokens import estimate_tokens
+
+
+SAMPLE_TEXT = """CITY DIAGNOSTICS
+12, MG Road, Bengaluru 560001
+Email: info@citylab.in
+Page 1 of 2
+Haemoglobin 10.2 g/dL 13.0 - 17.0
+pH 6.0 5.0 - 8.0
+CITY DIAGNOSTICS
+Page 2 of 2
+WBC Count 12,800 cells/uL 4000 - 11000
+This is a computer generated report
+"""
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hb 10.2") == 4
+    assert estimate_tokens("Haemoglobin") == 3
+
+
+def test_clean_ocr_text_drops_boilerplate_and_repeats():
+    cleaned, dropped = clean_ocr_text(SAMPLE_TEXT)
+    lines = cleaned.splitlines()
+    assert lines == [
+        "CITY DIAGNOSTICS",
+        "Haemoglobin 10.2 g/dL 13.0 - 17.0",
+        "pH 6.0 5.0 - 8.0",
+        "WBC Count 12,800 cells/uL 4000 - 11000",
+    ]
+    assert dropped == 6
+
+
+def test_clean_ocr_text_keeps_repeated_result_tokens():
+    text = "Urine Sugar\n+++\nUrine Albumin\n++\nKetones\nNegative\nBile salts\nNegative\nmg/dL\nmg/dL"
+    assert clean_ocr_text(text) == (text, 0)
+
+
+def test_clean_ocr_text_only_dedupes_lines_at_page_edges():
+    pages = [
+        "CITY LAB\nHb 10\nWBC 5\nRemarks: fasting sample\nRBC 4\nPlt 200\nReviewed by Dr. Rao",
+        "CITY LAB\nRemarks: fasting sample\nTSH 2.1\nRemarks: fasting sample\nT3 1.2\nT4 8\nReviewed by Dr. Rao",
+    ]
+    cleaned, dropped = clean_ocr_text("\f".join(pages))
+    lines = cleaned.splitlines()
+
+    assert lines.count("CITY LAB") == 1 and lines.count("Reviewed by Dr. Rao") == 1
+    assert lines.count("Remarks: fasting sample") == 3
+    assert dropped == 2
+
+
+def test_compact_structured_dedupes_against_text():
+    parsed = {
+        "tests": [
+            {"id": "hb", "name": "Haemoglobin", "value": 10.2, "unit": "g/dL",
+             "normal_min": 13.0, "normal_max": 17.0},
+            {"id": "hb", "name": "Haemoglobin", "value": 10.2, "unit": "g/dL"},
+            {"id": "wbc", "name": "WBC Count", "value": 12800, "unit": "cells/uL"},
+            {"id": "tsh", "name": "TSH", "value": 6.1, "unit": "mIU/L"},
+        ],
+        "medicines": ["Metformin"],
+    }
+    compact, in_text = compact_structured(parsed, SAMPLE_TEXT)
+
+    assert in_text == 2
+    assert compact["tests"][0] == {"name": "Haemoglobin", "range": [13.0, 17.0]}
+    assert compact["tests"][1] == {"name": "WBC Count"}
+    assert compact["tests"][2] == {"name": "TSH", "value": 6.1, "unit": "mIU/L"}
+    assert compact["medicines"] == [{"name": "Metformin"}]
+
+
+def test_fit_chunks_keeps_relevance_order_within_allowance():
+    chunks = ["a " * 50, "b " * 500, "c " * 50, "a " * 50]
+    kept, used = fit_chunks(chunks, 120)
+    assert kept == [chunks[0], chunks[2]]
+    assert used <= 120
+
+
+def test_truncate_to_tokens_cuts_on_line_boundary():
+    text = "\n".join(f"line {i} value {i}" for i in range(100))
+    cut, truncated = truncate_to_tokens(text, 50)
+    assert truncated
+    assert cut.endswith("…")
+    assert all(line.startswith("line") for line in cut.splitlines()[:-1])
+    assert truncate_to_tokens("short", 50) == ("short", False)
+
+
+@patch("app.services.llm_providers.prompt_budget.settings")
+def test_input_budget_respects_context_window(mock_settings):
+    mock_settings.LLM_INPUT_TOKEN_BUDGET = 6000
+    mock_settings.LLM_DEFAULT_CONTEXT_WINDOW = 8192
+    mock_settings.LLM_CONTEXT_WINDOWS = {"big": 131072}
+
+    assert input_budget("big", 4096) == 6000
+    assert input_budget("small", 4096) == 8192 - 4096 - 64
+
+
+def test_assemble_messages_fits_budget_and_reports_stats():
+    parsed = {
+        "raw_text": SAMPLE_TEXT + "\n".join(f"Test{i} {i}.5 mg/dL" for i in range(3000)),
+        "tests": [{"id": "hb", "name": "Haemoglobin", "value": 10.2}],
+        "medicines": [],
+    }
+    chunks = [f"Knowledge chunk {i} " + "detail " * 100 for i in range(20)]
+
+    messages, stats = assemble_messages(parsed, chunks, model="llama3.1:8b", max_tokens=4096)
+
+    assert messages[0]["role"] == "system"
+    assert stats["prompt_tokens"] <= stats["budget_tokens"]
+    assert stats["raw_text_truncated"] is True
+    assert stats["rag_chunks_used"] >= 1
+    assert stats["rag_chunks_used"] + stats["rag_chunks_dropped"] == 20
+    assert stats["tokens_saved"] > 0
+    assert "Knowledge chunk 0 " in messages[1]["content"]
+    assert "Page 1 of 2" not in messages[1]["content"]
+
+
+def test_value_cut_from_raw_text_is_kept_in_structured_fields():
+    parsed = {
+        "raw_text": "\n".join(f"Observation {i} noted {i}.5" for i in range(2000))
+        + "\nSerum Creatinine 3.7 mg/dL 0.6 - 1.2",
+        "tests": [{"id": "creatinine", "name": "Serum Creatinine", "value": 3.7, "unit": "mg/dL",
+                   "normal_min": 0.6, "normal_max": 1.2}],
+        "medicines": [],
+    }
+    chunks = [f"Knowledge chunk {i} " + "detail " * 100 for i in range(10)]
+
+    for budget in (2500, 1500):  # 1500 leaves no room for raw text at all
+        with patch.object(settings, "LLM_INPUT_TOKEN_BUDGET", budget):
+            messages, stats = assemble_messages(parsed, chunks, model="llama-3.3-70b-versatile", max_tokens=2048)
+
+        user = messages[1]["content"]
+        assert stats["raw_text_truncated"] is True
+        assert "Serum Creatinine 3.7" not in user
+        assert '"value":3.7' in user
+        assert stats["tests_in_raw_text"] == 0
+    assert stats["rag_chunks_used"] == 0
+
+    with patch.object(settings, "LLM_INPUT_TOKEN_BUDGET", 2500):
+        _, stats = assemble_messages(parsed, chunks, model="llama-3.3-70b-versatile", max_tokens=2048)
+    assert stats["prompt_tokens"] <= stats["budget_tokens"] == 2500
+
+
+def test_build_messages_keeps_small_reports_whole():
+    parsed = {"raw_text": "Haemoglobin 10.2 g/dL 13-17", "tests": [], "medicines": []}
+    messages = build_messages(parsed, ["Haemoglobin carries oxygen."])
+
+    assert "Haemoglobin 10.2 g/dL 13-17" in messages[1]["content"]
+    assert "Haemoglobin carries oxygen." in messages[1]["content"]
+    assert "…" not in messages[1]["content"]
+
+
+def test_static_instructions_form_a_shared_prefix():
+    a, stats = assemble_messages({"raw_text": "Haemoglobin 10.2 g/dL", "tests": [], "medicines": []}, ["b", "a"])
+    b, _ = assemble_messages({"raw_text": "TSH 2.1 mIU/L", "tests": [], "medicines": []}, ["b", "a"])
+
+    assert a[0] == b[0]
+    assert stats["prompt_version"] == PROMPT_VERSION
+    assert stats["static_prefix_tokens"] > 0
+    # Per-document content only in the user message; shared chunks first, in relevance order.
+    assert a[1]["content"].split("Pre-extracted")[0] == b[1]["content"].split("Pre-extracted")[0]
+    assert a[1]["content"].index("b\n---\na") < a[1]["content"].index("raw_text")
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.services.llm_providers.errors import (
+    LLMOutputTruncatedError,
+    LLMRateLimitError,
+    LLMTransportError,
+)
+from app.services.llm_providers.replay_provider import ReplayProvider
+from tests.test_llm import GOOD_RESPONSE
+
+PARSED = {"raw_text": "Hemoglobin 10.2 g/dL 13.0 - 17.0", "tests": [], "medicines": []}
+
+
+@pytest.fixture
+def replay_settings(tmp_path):
+    with patch.object(settings, "LLM_REPLAY_DIR", str(tmp_path)), \
+         patch.object(settings, "LLM_REPLAY_LATENCY_MODE", "fixed"), \
+         patch.object(settings, "LLM_REPLAY_LATENCY_MS", 0.0), \
+         patch.object(settings, "LLM_REPLAY_FAILURES", {}), \
+         patch.object(settings, "LLM_REPLAY_SEED", 7):
+        yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(replay_settings):
+    source = AsyncMock()
+    source.name = "groq"
+    source.generate.return_value = {**GOOD_RESPONSE, "_llm_model_used": "real-model"}
+
+    with patch.object(settings, "LLM_REPLAY_MODE", "record"), \
+         patch("app.services.llm_providers.factory.get_provider", return_value=source):
+        await ReplayProvider().generate(PARSED, ["chunk"])
+
+    fixtures = list(replay_settings.glob("*.json"))
+    assert len(fixtures) == 1
+    recorded = json.loads(fixtures[0].read_text())
+    assert recorded["model"] == "real-model" and "_llm_model_used" not in recorded["result"]
+
+    source.generate.reset_mock()
+    result = await ReplayProvider().generate(PARSED, ["chunk"])
+
+    source.generate.assert_not_awaited()
+    assert result["overall_summary"] == GOOD_RESPONSE["overall_summary"]
+    assert result["_llm_model_used"] == "real-model"
+
+
+@pytest.mark.asyncio
+async def test_miss_policies(replay_settings):
+    result = await ReplayProvider().generate(PARSED)
+    assert result["_llm_model_used"] == "replay"
+    assert "abnormal_values" in result
+
+    with patch.object(settings, "LLM_REPLAY_ON_MISS", "error"):
+        with pytest.raises(RuntimeError):
+            await ReplayProvider().generate(PARSED)
+
+    (replay_settings / "other.json").write_text(json.dumps({"model": "m", "result": GOOD_RESPONSE}))
+    with patch.object(settings, "LLM_REPLAY_ON_MISS", "any"):
+        assert (await ReplayProvider().generate(PARSED))["_llm_model_used"] == "m"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind, error", [
+    ("rate_limit", LLMRateLimitError),
+    ("timeout", LLMTransportError),
+    ("truncated", LLMOutputTruncatedError),
+])
+async def test_failure_injection(replay_settings, kind, error):
+    with patch.object(settings, "LLM_REPLAY_FAILURES", {kind: 1.0}):
+        with pytest.raises(error):
+            await ReplayProvider().generate(PARSED)
+
+
+def test_latency_distributions(replay_settings):
+    provider = ReplayProvider()
+    with patch.object(settings, "LLM_REPLAY_LATENCY_MODE", "recorded"):
+        assert provider._latency_sec({"latency_ms": 1200}) == 1.2
+    with patch.object(settings, "LLM_REPLAY_LATENCY_MODE", "uniform"), \
+         patch.object(settings, "LLM_REPLAY_LATENCY_MS", 1000.0):
+        samples = [provider._latency_sec({}) for _ in range(200)]
+        assert all(0.5 <= s <= 1.5 for s in samples)
+    with patch.object(settings, "LLM_REPLAY_LATENCY_MODE", "lognormal"), \
+         patch.object(settings, "LLM_REPLAY_LATENCY_MS", 1000.0):
+        samples = sorted(provider._latency_sec({}) for _ in range(501))
+        assert 0.7 < samples[250] < 1.4
@@ -0,0 +1,155 @@
+import struct
+
+import pytest
+from unittest.mock import Mock, patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.pg_copy import copy_buffer, encode_vector
+from app.services import retrieval
+
+
+@pytest.fixture
+def knowledge():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE medical_knowledge (id INTEGER PRIMARY KEY, source TEXT, entity_id TEXT, "
+            "chunk_type TEXT, content TEXT, content_hash TEXT)"
+        ))
+        rows = [
+            ("hemoglobin", "clinical", "hb clinical"), ("hemoglobin", "factual", "hb factual"),
+            ("tsh", "factual", "tsh factual"), ("tsh", "clinical", "tsh clinical"),
+            ("metformin", None, "metformin"), ("glucose", "factual", "glucose factual"),
+        ]
+        for eid, ct, content in rows:
+            conn.execute(
+                text(
+                    "INSERT INTO medical_knowledge (source, entity_id, chunk_type, content, content_hash) "
+                    "VALUES (:s, :e, :c, :t, :h)"
+                ),
+                {"s": "catalog_medicines" if ct is None else "catalog_tests", "e": eid, "c": ct,
+                 "t": content, "h": retrieval.content_hash(content)},
+            )
+    with patch("app.services.retrieval.SessionLocal", sessionmaker(bind=engine)), \
+         patch("app.services.retrieval.metrics"), \
+         patch.object(settings, "RAG_ENABLED", True), \
+         patch.object(settings, "RAG_RETRIEVAL_MODE", "entity"):
+        yield
+
+
+PARSED = {
+    "tests": [
+        {"id": "tsh", "name": "TSH", "value": 2.1, "normal_min": 0.4, "normal_max": 4.0},
+        {"id": "hemoglobin", "name": "Hb", "value": 9.0, "normal_min": 13.0, "normal_max": 17.0},
+    ],
+    "medicines": [{"id": "metformin", "name": "Metformin"}],
+}
+
+
+def test_entity_ids_put_abnormal_tests_first():
+    assert retrieval._entity_ids(PARSED) == ["hemoglobin", "tsh", "metformin"]
+
+
+def test_each_entity_gets_a_chunk_before_any_gets_two(knowledge):
+    chunks = [c for _, c in retrieval._fetch_entities(["hemoglobin", "tsh", "metformin"], 4)]
+    assert chunks == ["hb factual", "tsh factual", "metformin", "hb clinical"]
+
+
+@patch("app.services.retrieval.embed_queries")
+def test_exact_matches_skip_the_embedding_call(mock_embed, knowledge):
+    chunks = retrieval.retrieve_context(PARSED, top_k=3)
+
+    assert chunks == ["hb factual", "tsh factual", "metformin"]
+    mock_embed.assert_not_called()
+
+
+@patch("app.services.retrieval._search", return_value=[("related chunk", 0.2), ("far chunk", 0.9)])
+@patch("app.services.retrieval.embed_queries", return_value=[[0.1]])
+def test_vector_search_fills_the_rest(mock_embed, mock_search, knowledge):
+    chunks = retrieval.retrieve_context(PARSED, top_k=8)
+
+    assert chunks[:5] == ["hb factual", "tsh factual", "metformin", "hb clinical", "tsh clinical"]
+    assert chunks[5:] == ["related chunk"]
+    top_k, exclude = mock_search.call_args[0][1:]
+    assert top_k == 3 and len(exclude) == 5
+
+
+def test_ann_settings_are_applied_per_query():
+    db = Mock()
+    with patch.object(settings, "RAG_HNSW_EF_SEARCH", 40), patch.object(settings, "RAG_HNSW_ITERATIVE_SCAN", ""):
+        retrieval.apply_ann_settings(db, top_k=100)
+
+    statements = [str(c.args[0]) for c in db.execute.call_args_list]
+    assert statements == ["SET LOCAL hnsw.ef_search = 100", "SET LOCAL ivfflat.probes = 10"]
+
+
+def test_entity_queries_one_per_entity_abnormal_first():
+    assert retrieval._entity_queries(PARSED) == ["Hb 9.0", "TSH 2.1", "Metformin"]
+
+
+def test_multi_query_runs_one_lateral_statement():
+    db = Mock()
+    db.execute.return_value.fetchall.return_value = [(1, 7, "b", 0.3), (0, 5, "a", 0.1)]
+    with patch("app.services.retrieval.SessionLocal", return_value=db), \
+         patch.object(settings, "RAG_VECTOR_BACKEND", "pgvector"):
+        results = retrieval._search_many([[0.1], [0.2]], per_query=2)
+
+    assert results == [[(5, "a", 0.1)], [(7, "b", 0.3)]]
+    sql, params = db.execute.call_args_list[-1].args
+    assert "CROSS JOIN LATERAL" in str(sql) and "(1, CAST(:q1 AS vector))" in str(sql)
+    assert params["per_query"] == 2 and params["q0"] == "[0.1]"
+
+
+def test_merge_interleaves_dedupes_and_respects_budget():
+    results = [
+        [(1, "a" * 40, 0.1), (2, "b" * 40, 0.2)],
+        [(1, "a" * 40, 0.1), (3, "c" * 40, 0.7), (4, "d" * 40, 0.3)],
+        [(5, "e" * 40, 0.2)],
+    ]
+    with patch("app.services.retrieval.estimate_tokens", return_value=10):
+        assert retrieval._merge(results, budget_tokens=100) == ["a" * 40, "e" * 40, "b" * 40, "d" * 40]
+        assert retrieval._merge(results, budget_tokens=20) == ["a" * 40, "e" * 40]
+
+
+def test_copy_buffer_uses_binary_wire_format():
+    buf = copy_buffer([("text", [1.0, 0.5], None, "{}")], ["text", "vector", "text", "jsonb"]).getvalue()
+
+    assert buf.startswith(b"PGCOPY\n\xff\r\n\x00")
+    assert buf.endswith(struct.pack(">h", -1))
+    assert encode_vector([1.0, 0.5]) == struct.pack(">HHff", 2, 0, 1.0, 0.5)
+    assert struct.pack(">i", 12) + encode_vector([1.0, 0.5]) in buf
+    assert struct.pack(">i", -1) + struct.pack(">i", 3) + b"\x01{}" in buf
+
+
+def test_index_rows_keep_one_row_per_chunk_key():
+    metas = [
+        {"source": "catalog_tests", "test_id": "tsh", "chunk_type": "factual"},
+        {"source": "catalog_tests", "test_id": "tsh", "chunk_type": "clinical"},
+        {"source": "catalog_tests", "test_id": "tsh", "chunk_type": "factual"},
+    ]
+    chunks = retrieval._chunks_by_key(["a", "b", "c"], metas, ["1", "2", "3"])
+
+    assert sorted(chunks.values()) == ["b", "c"]
+
+
+@patch("app.services.retrieval._write")
+@patch("app.services.retrieval.embed_sync", side_effect=lambda texts: [[0.1] for _ in texts])
+def test_sync_embeds_only_new_and_changed_chunks(mock_embed, mock_write, knowledge):
+    documents = ["hb factual", "hb clinical v2", "tsh factual", "tsh clinical", "ldl factual"]
+    metas = [
+        {"source": "catalog_tests", "test_id": "hemoglobin", "chunk_type": "factual"},
+        {"source": "catalog_tests", "test_id": "hemoglobin", "chunk_type": "clinical"},
+        {"source": "catalog_tests", "test_id": "tsh", "chunk_type": "factual"},
+        {"source": "catalog_tests", "test_id": "tsh", "chunk_type": "clinical"},
+        {"source": "catalog_tests", "test_id": "ldl", "chunk_type": "factual"},
+    ]
+
+    summary = retrieval.sync_documents(documents, metas)
+
+    assert summary == {"added": 1, "changed": 1, "unchanged": 3, "deleted": 1}
+    mock_embed.assert_called_once_with(["ldl factual", "hb clinical v2"])
+    rows, orphans = mock_write.call_args[0]
+    assert len(rows) == 2 and len(orphans) == 1   # glucose; medicines untouched
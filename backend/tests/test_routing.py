@@ -0,0 +1,138 @@
+import json
+import queue
+import threading
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.core.config import settings
+from app.services.llm_providers import routing
+from app.services.llm_providers.routing import (
+    _log_decision,
+    complexity,
+    get_stats,
+    models_for,
+    record_outcome,
+    reset_stats,
+    result_quality,
+    route,
+)
+from app.services.ocr import PAGE_BREAK
+
+LIGHT = settings.LLM_MODEL_LIGHT
+HEAVY = settings.LLM_MODEL_HEAVY
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    reset_stats()
+    with patch("app.services.llm_providers.routing.metrics"), \
+         patch("app.services.llm_providers.routing._log_decision") as log:
+        yield log
+    reset_stats()
+
+
+def _test(test_id, value, lo=1.0, hi=10.0):
+    return {"id": test_id, "name": test_id, "value": value, "normal_min": lo, "normal_max": hi}
+
+
+SMALL_LAB = {"raw_text": "Hemoglobin 14 g/dL", "tests": [_test("hemoglobin", 5)], "medicines": []}
+BIG_LAB = {
+    "raw_text": "CBC",
+    "tests": [_test(f"t{i}", 20) for i in range(10)],
+    "medicines": [],
+}
+
+
+def test_complexity_counts_abnormal_tests_and_pages():
+    parsed = {
+        "raw_text": f"page one\n{PAGE_BREAK}\npage two",
+        "tests": [_test("a", 5), _test("b", 50), _test("c", "n/a")],
+        "medicines": [{"id": "metformin"}],
+    }
+    cx = complexity(parsed)
+    assert (cx["tests"], cx["abnormal"], cx["pages"], cx["medicines"]) == (3, 1, 2, 1)
+    assert cx["doc_class"] == "long_report"
+    assert cx["score"] == pytest.approx(3 + 2 + 3 + 1, abs=0.1)
+
+
+def test_simple_lab_report_goes_to_light_model():
+    assert route("groq", SMALL_LAB) == (LIGHT, settings.LLM_MAX_TOKENS_LIGHT)
+
+
+def test_complex_lab_report_goes_to_heavy_model():
+    assert route("groq", BIG_LAB) == (HEAVY, settings.LLM_MAX_TOKENS_HEAVY)
+
+
+def test_unhealthy_light_model_is_skipped():
+    stats = get_stats("groq", LIGHT)
+    for _ in range(settings.LLM_ROUTING_MIN_SAMPLES):
+        stats.record(False, 1.0, None)
+
+    assert route("groq", SMALL_LAB)[0] == HEAVY
+    # Other providers keep their own stats.
+    assert route("openai", SMALL_LAB)[0] == models_for("openai")[1]
+
+
+def test_low_quality_light_model_is_skipped():
+    stats = get_stats("groq", LIGHT)
+    for _ in range(settings.LLM_ROUTING_MIN_SAMPLES):
+        stats.record(True, 1.0, 0.5)
+    assert route("groq", SMALL_LAB)[0] == HEAVY
+
+
+def test_override_table_wins():
+    overrides = {"groq:lab_report": "pinned-model", "prescription": LIGHT}
+    with patch.object(settings, "LLM_ROUTING_OVERRIDES", overrides):
+        assert route("groq", BIG_LAB)[0] == "pinned-model"
+        assert route("openai", BIG_LAB)[0] == models_for("openai")[0]
+        assert route("openai", {"raw_text": "", "tests": [], "medicines": [{}]})[0] == LIGHT
+
+
+def test_each_provider_routes_to_its_own_models():
+    models = {"openai": {"heavy": "gpt-4o", "light": "gpt-4o-mini"}}
+    with patch.object(settings, "LLM_MODELS", models):
+        assert route("openai", SMALL_LAB) == ("gpt-4o-mini", settings.LLM_MAX_TOKENS_LIGHT)
+        assert route("openai", BIG_LAB) == ("gpt-4o", settings.LLM_MAX_TOKENS_HEAVY)
+        # Providers without an entry keep LLM_MODEL_HEAVY / LIGHT.
+        assert route("groq", SMALL_LAB)[0] == LIGHT
+
+
+def test_disabled_routing_keeps_old_rule():
+    with patch.object(settings, "LLM_ROUTING_ENABLED", False):
+        assert route("groq", SMALL_LAB)[0] == HEAVY
+
+
+def test_result_quality_is_share_of_tests_in_output():
+    parsed = {"tests": [{"id": "hemoglobin", "name": "Hb"}, {"id": "tsh", "name": "TSH"}]}
+    result = {"abnormal_values": [{"test_name": "Hemoglobin"}], "normal_values": []}
+    assert result_quality(parsed, result) == 0.5
+
+
+def test_outcome_is_recorded_against_routed_model(_fresh_stats):
+    routing.begin_call()
+    route("groq", SMALL_LAB)
+    record_outcome(True, 2.0, SMALL_LAB, {"abnormal_values": [{"test_name": "Hemoglobin"}]})
+
+    snapshot = get_stats("groq", LIGHT).snapshot()
+    assert snapshot["calls"] == 1 and snapshot["quality"] == 1.0
+    logged = _fresh_stats.call_args[0][0]
+    assert logged["model"] == LIGHT and logged["ok"] and logged["complexity"]["tests"] == 1
+
+    # Nothing routed since → nothing recorded.
+    record_outcome(False, 1.0)
+    assert get_stats("groq", LIGHT).snapshot()["calls"] == 1
+
+
+def test_decision_log_is_written_off_the_calling_thread():
+    redis, written = Mock(), queue.Queue()
+    pipe = redis.pipeline.return_value
+    pipe.execute.side_effect = lambda: written.put(threading.get_ident())
+
+    with patch("app.services.llm_providers.routing.get_redis_client", return_value=redis):
+        _log_decision({"model": LIGHT, "ok": True})
+        writer_thread = written.get(timeout=2)
+
+    assert writer_thread != threading.get_ident()
+    pipe.lpush.assert_called_once_with(routing.ROUTING_LOG_REDIS_KEY, json.dumps({"model": LIGHT, "ok": True}))
+    pipe.ltrim.assert_called_once_with(routing.ROUTING_LOG_REDIS_KEY, 0, settings.LLM_ROUTING_LOG_SIZE - 1)
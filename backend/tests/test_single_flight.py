@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.llm import is_llm_result
+from app.services.single_flight import single_flight
+
+
+class FakeRedis:
+    """Just enough of the Redis API for the single-flight lock + result.
+
+    Calls arrive from executor threads, so each one is atomic like Redis's,
+    and the calling threads are recorded.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            if nx and key in self.data:
+                return None
+            self.data[key] = value
+            return True
+
+    def setex(self, key, ttl, value):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            self.data[key] = value
+
+    def eval(self, script, numkeys, key, token, *args):
+        with self._lock:
+            self.threads.add(threading.get_ident())
+            if self.data.get(key) != token:
+                return 0
+            if "DEL" in script:
+                del self.data[key]
+            return 1
+
+
+@pytest.fixture
+def fake_redis():
+    r = FakeRedis()
+    with patch("app.services.single_flight.get_redis_client", return_value=r), \
+         patch("app.services.single_flight.metrics"):
+        yield r
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_computation(fake_redis):
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return {"text": "ocr output"}
+
+    results = await asyncio.gather(*(single_flight("ocr", "abc", compute) for _ in range(3)))
+
+    assert calls == 1
+    assert results == [{"text": "ocr output"}] * 3
+    assert "sf:ocr:abc:lock" not in fake_redis.data
+    # Redis calls stay off the event loop thread.
+    assert fake_redis.threads and threading.get_ident() not in fake_redis.threads
+
+
+@pytest.mark.asyncio
+async def test_recent_result_is_reused(fake_redis):
+    first = await single_flight("llm", "k", lambda: asyncio.sleep(0, result="one"))
+    second = await single_flight("llm", "k", lambda: asyncio.sleep(0, result="two"))
+    assert (first, second) == ("one", "one")
+
+
+@pytest.mark.asyncio
+async def test_fallback_result_is_not_shared(fake_redis):
+    fallback = {"confidence_score": 0.25}
+    llm = {"confidence_score": 0.9, "_llm_provider_used": "groq"}
+
+    first = await single_flight("llm", "f", lambda: asyncio.sleep(0, result=fallback), publish=is_llm_result)
+    second = await single_flight("llm", "f", lambda: asyncio.sleep(0, result=llm), publish=is_llm_result)
+    third = await single_flight("llm", "f", lambda: asyncio.sleep(0, result=fallback), publish=is_llm_result)
+
+    assert (first, second, third) == (fallback, llm, llm)
+    assert "sf:llm:f:lock" not in fake_redis.data
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_fails(fake_redis):
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("leader crashed")
+
+    leader = asyncio.create_task(single_flight("ocr", "x", failing))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(single_flight("ocr", "x", lambda: asyncio.sleep(0, result="mine")))
+
+    with pytest.raises(RuntimeError):
+        await leader
+    assert await follower == "mine"
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_expired_lease(fake_redis):
+    fake_redis.data["sf:ocr:y:lock"] = "dead-leader"
+
+    async def expire_lock():
+        await asyncio.sleep(0.15)
+        del fake_redis.data["sf:ocr:y:lock"]
+
+    expiry = asyncio.create_task(expire_lock())
+    assert await single_flight("ocr", "y", lambda: asyncio.sleep(0, result="recovered")) == "recovered"
+    await expiry
+
+
+@pytest.mark.asyncio
+@patch("app.services.single_flight.get_redis_client")
+async def test_redis_down_computes_directly(mock_redis):
+    mock_client = Mock()
+    mock_client.get.side_effect = ConnectionError("redis down")
+    mock_redis.return_value = mock_client
+
+    assert await single_flight("ocr", "z", lambda: asyncio.sleep(0, result="direct")) == "direct"
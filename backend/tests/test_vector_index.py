@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.services import retrieval, vector_index
+from app.services.vector_index import MemoryVectorIndex, load_snapshot, save_snapshot
+
+ROWS = [
+    {"id": 1, "source": "catalog_tests", "entity_id": "hemoglobin", "chunk_type": "factual", "content": "hb"},
+    {"id": 2, "source": "catalog_tests", "entity_id": "tsh", "chunk_type": "factual", "content": "tsh"},
+    {"id": 3, "source": "catalog_medicines", "entity_id": "metformin", "chunk_type": None, "content": "met"},
+]
+VECTORS = [[1.0, 0.0, 0.0], [0.6, 0.8, 0.0], [0.0, 0.0, 2.0]]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    vector_index.reset_index()
+    yield
+    vector_index.reset_index()
+
+
+def test_search_ranks_by_cosine_distance():
+    index = MemoryVectorIndex(ROWS, np.array(VECTORS))
+
+    hits = index.search([2.0, 0.1, 0.0], top_k=2)
+
+    assert [c for c, _ in hits] == ["hb", "tsh"]
+    assert hits[0][1] == pytest.approx(1 - 2.0 / np.linalg.norm([2.0, 0.1]), abs=1e-5)
+    assert [c for c, _ in index.search([2.0, 0.1, 0.0], top_k=2, exclude_ids=[1])] == ["tsh", "met"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    save_snapshot(MemoryVectorIndex(ROWS, np.array(VECTORS)), str(tmp_path / "knowledge"))
+    index = load_snapshot(str(tmp_path / "knowledge.npy"))
+
+    assert index.rows == ROWS
+    assert index.search([0.0, 0.0, 1.0], top_k=1)[0][0] == "met"
+
+
+def test_refresh_on_change_reloads_only_when_catalog_changes():
+    fingerprint = [(3, 3)]
+    with patch.object(settings, "RAG_MEMORY_REFRESH", "on_change"), \
+         patch.object(settings, "RAG_MEMORY_REFRESH_SEC", 0), \
+         patch("app.services.vector_index._fingerprint", side_effect=lambda: fingerprint[0]), \
+         patch("app.services.vector_index._load", side_effect=lambda: MemoryVectorIndex(ROWS, np.array(VECTORS))) as load:
+        first = vector_index.get_index()
+        assert vector_index.get_index() is first
+        fingerprint[0] = (4, 4)
+        assert vector_index.get_index() is not first
+        assert load.call_count == 2
+
+
+def test_fingerprint_changes_when_a_row_is_updated_in_place():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE medical_knowledge (id INTEGER PRIMARY KEY, content TEXT, created_at TIMESTAMP)"
+        ))
+        conn.execute(text(
+            "INSERT INTO medical_knowledge (content, created_at) VALUES ('hb', '2026-01-01 00:00:00')"
+        ))
+    with patch("app.services.vector_index.SessionLocal", sessionmaker(bind=engine)):
+        before = vector_index._fingerprint()
+        # What the indexer's ON CONFLICT DO UPDATE does: same id, same count, new created_at.
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE medical_knowledge SET content = 'hb v2', created_at = '2026-02-01 00:00:00' WHERE id = 1"
+            ))
+        after = vector_index._fingerprint()
+
+    assert before[:2] == after[:2] == (1, 1)
+    assert before != after
+
+
+@patch("app.services.retrieval.embed_queries", return_value=[[0.0, 0.1, 1.0]])
+def test_retrieval_uses_memory_backend_without_a_database(mock_embed):
+    index = MemoryVectorIndex(ROWS, np.array(VECTORS))
+    with patch.object(settings, "RAG_ENABLED", True), \
+         patch.object(settings, "RAG_RETRIEVAL_MODE", "entity"), \
+         patch.object(settings, "RAG_VECTOR_BACKEND", "memory"), \
+         patch("app.services.retrieval.metrics"), \
+         patch("app.services.vector_index.get_index", return_value=index), \
+         patch("app.services.retrieval.SessionLocal", side_effect=AssertionError("no DB")):
+        chunks = retrieval.retrieve_context({"tests": [{"id": "tsh", "name": "TSH", "value": 2}]}, top_k=2)
+
+    assert chunks == ["tsh", "met"]
@@ -52,7 +52,7 @@ export function ProcessingPage() {
         pollingStateRef.current.retryCount = 0;
         pollingStateRef.current.lastSuccessTime = Date.now();
 
-        if (response.status === 'completed') {
+        if (response.status === 'completed' || response.result_available) {
           if (intervalIdRef.current) clearInterval(intervalIdRef.current);
           if (timerIdRef.current) clearInterval(timerIdRef.current);
           navigate(`/result/${jobId}`);
@@ -19,6 +19,10 @@ import { getResult } from '../api/lumenApi';
 import { API_CONFIG } from '../config/constants';
 import type { ResultResponse, NormalValue } from '../types';
 
+// A provisional result is served while the job is still processing.
+const isProvisional = (result: ResultResponse): boolean =>
+  Boolean(result.provisional || result.metadata?.provisional) || result.status !== 'completed';
+
 export const ResultPage: React.FC = () => {
   const navigate = useNavigate();
   const { jobId } = useParams<{ jobId: string }>();
@@ -45,6 +49,13 @@ export const ResultPage: React.FC = () => {
 
         setResult(data);
         setError(null);
+        if (isProvisional(data)) {
+          // Rule-based preview — keep polling until the full explanation replaces it.
+          setTimeout(() => {
+            if (isMountedRef.current) fetchResult();
+          }, API_CONFIG.POLLING_INTERVAL_MS);
+          return;
+        }
         sessionStorage.removeItem(API_CONFIG.STORAGE_KEYS.CURRENT_JOB_ID);
         sessionStorage.removeItem(API_CONFIG.STORAGE_KEYS.JOB_START_TIME);
       } catch (err) {
@@ -172,6 +183,15 @@ export const ResultPage: React.FC = () => {
       </div>
 
       <div className="max-w-7xl mx-auto px-4 py-6 sm:px-6 lg:px-8">
+        {isProvisional(result) && (
+          <div className="flex items-center gap-3 bg-blue-50 border border-blue-200 rounded-lg p-4 mb-6">
+            <div className="w-4 h-4 border-2 border-blue-300 border-t-blue-600 rounded-full animate-spin flex-shrink-0" />
+            <p className="text-sm text-blue-800">
+              Preliminary results from your report&apos;s values. A detailed explanation is on its way and will appear here automatically.
+            </p>
+          </div>
+        )}
+
         {/* Navigation Tabs */}
         <div className="bg-white rounded-lg shadow-sm border border-gray-200 mb-6">
           <div className="flex border-b border-gray-200 overflow-x-auto">
@@ -12,6 +12,7 @@ export interface StatusResponse {
   progress: number;
   stage: string;
   updated_at: string;
+  result_available?: boolean;
 }
 
 export interface AbnormalValue {
@@ -75,6 +76,8 @@ export interface Metadata {
   llm_provider: string;
   model: string;
   cached: boolean;
+  provisional?: boolean;
+  version?: number;
 }
 
 export interface ResultResponse {
@@ -93,5 +96,6 @@ export interface ResultResponse {
   lifestyle_action_plan?: LifestyleActionPlan;
   red_flags?: string[];
   confidence_score: number;
+  provisional?: boolean;
   metadata: Metadata;
 }